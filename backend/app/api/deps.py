@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
 from app.db.session import SessionLocal
 from app.models import models
 
@@ -17,8 +18,11 @@ def get_db():
     finally:
         db.close()
 
-def _get_user_from_token_str(token: str, db: Session):
-    """Decodes a token string and retrieves the user from the database."""
+def _get_user_from_token_str(token: str, db: Session) -> Principal:
+    """
+    Decodes a token string and returns the user it belongs to, from the
+    principal cache when possible and from the database otherwise.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -32,10 +36,18 @@ def _get_user_from_token_str(token: str, db: Session):
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    principal = principal_cache.get(username)
+    if principal is None:
+        snapshot = principal_cache.snapshot()
+        user = db.query(models.User).filter(models.User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(principal, snapshot)
+
+    if principal.status == models.UserStatus.SUSPENDED:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is suspended")
+    return principal
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Standard dependency to get a user from the Authorization header."""
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.models import models
 from app.schemas import admin as admin_schema
 from app.core.auth import get_password_hash
+from app.core.cache import extraction_cache
+from app.core.principal_cache import principal_cache
+from app.core.summaries import upload_counts
 import secrets
+from typing import Optional
 
 router = APIRouter()
 
 @router.get("/users", response_model=admin_schema.UserListResponse)
 def get_all_users(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(deps.get_db),
     current_admin: models.User = Depends(deps.get_current_admin_user)
 ):
-    users = db.query(models.User).all()
-    return {"users": users}
+    """
+    Returns one page of users ordered by id, each with its upload count from
+    the card summaries.
+    """
+    query = db.query(models.User)
+    if cursor is not None:
+        query = query.filter(models.User.id > cursor)
+    users = query.order_by(models.User.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = users[-1].id
+
+    counts = upload_counts(db, [user.id for user in users])
+    items = [
+        {**admin_schema.UserView.model_validate(user).model_dump(), "upload_count": counts.get(user.id, 0)}
+        for user in users
+    ]
+    return {"users": items, "next_cursor": next_cursor}
 
 @router.post("/users/{user_id}/toggle-verify", response_model=admin_schema.UserView)
 def toggle_verify_user(
@@ -34,6 +57,7 @@ def toggle_verify_user(
     
     user.is_verified = not user.is_verified
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -49,6 +73,7 @@ def promote_user(
     if user.role == models.UserRole.SUPER_ADMIN: raise HTTPException(status_code=400, detail="Cannot change super admin role")
     user.role = models.UserRole.ADMIN
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -64,6 +89,7 @@ def demote_user(
     if user.role == models.UserRole.SUPER_ADMIN: raise HTTPException(status_code=400, detail="Cannot change super admin role")
     user.role = models.UserRole.USER
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -80,6 +106,7 @@ def toggle_suspend_user(
     
     user.status = models.UserStatus.SUSPENDED if user.status == models.UserStatus.ACTIVE else models.UserStatus.ACTIVE
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -97,4 +124,25 @@ def reset_password(
     new_password = secrets.token_urlsafe(12)
     user.hashed_password = get_password_hash(new_password)
     db.commit()
-    return {"message": f"Password for user '{user.username}' has been reset.", "new_password": new_password}
\ No newline at end of file
+    principal_cache.invalidate(user.id)
+    return {"message": f"Password for user '{user.username}' has been reset.", "new_password": new_password}
+
+
+@router.get("/cache/stats", response_model=admin_schema.CacheStats)
+def get_cache_stats(
+    db: Session = Depends(deps.get_db),
+    current_admin: models.User = Depends(deps.get_current_admin_user)
+):
+    """
+    Hit/miss counters of the shared extraction cache (since this process
+    started) together with its current size.
+    """
+    return extraction_cache.stats(db)
+
+
+@router.get("/principal-cache/stats", response_model=admin_schema.PrincipalCacheStats)
+def get_principal_cache_stats(
+    current_admin: models.User = Depends(deps.get_current_admin_user)
+):
+    """Hit/miss counters of this process's authenticated-user cache."""
+    return principal_cache.stats()
\ No newline at end of file
@@ -1,43 +1,107 @@
+import logging
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.api import deps
 from app.schemas import user as user_schema
-from app.core.auth import verify_password, create_access_token, get_password_hash
+from app.core.auth import create_access_token, password_hasher
+from app.core.executors import ExecutorBusy, io_executor
 from app.models import models
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/register", response_model=user_schema.UserInDB)
-def register(user_in: user_schema.UserCreate, db: Session = Depends(deps.get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user_in.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
-    hashed_password = get_password_hash(user_in.password)
-    new_user = models.User(username=user_in.username, hashed_password=hashed_password)
+def _server_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+def _username_taken():
+    return HTTPException(status_code=400, detail="Username already registered")
+
+# The database calls below run on the I/O executor. Each one hands its
+# connection back to the pool before returning, otherwise a burst of
+# sign-ins would hold every pooled connection while bcrypt runs.
+
+def _is_registered(db: Session, username: str) -> bool:
+    registered = db.query(models.User.id).filter(models.User.username == username).first() is not None
+    db.rollback()
+    return registered
+
+def _create_user(db: Session, username: str, hashed_password: str) -> models.User:
+    new_user = models.User(username=username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Registered by a concurrent request while the password was hashed
+        db.rollback()
+        raise _username_taken()
     db.refresh(new_user)
     return new_user
 
+def _credentials(db: Session, username: str) -> Optional[Tuple[str, models.UserStatus, models.UserRole]]:
+    row = db.query(models.User.hashed_password, models.User.status, models.User.role).filter(
+        models.User.username == username
+    ).first()
+    db.rollback()
+    return tuple(row) if row else None
+
+def _replace_hash(db: Session, username: str, hashed_password: str):
+    db.query(models.User).filter(models.User.username == username).update(
+        {models.User.hashed_password: hashed_password}, synchronize_session=False
+    )
+    db.commit()
+
+@router.post("/register", response_model=user_schema.UserInDB)
+async def register(user_in: user_schema.UserCreate, db: Session = Depends(deps.get_db)):
+    try:
+        if await io_executor.run(_is_registered, db, user_in.username):
+            raise _username_taken()
+        hashed_password = await password_hasher.hash(user_in.password)
+        return await io_executor.run(_create_user, db, user_in.username, hashed_password)
+    except ExecutorBusy:
+        raise _server_busy()
+
 
 # working login route
 @router.post("/login", response_model=user_schema.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(deps.get_db)):
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(deps.get_db)):
+    try:
+        credentials = await io_executor.run(_credentials, db, form_data.username)
+        valid, new_hash = False, None
+        if credentials:
+            valid, new_hash = await password_hasher.verify_and_update(form_data.password, credentials[0])
+    except ExecutorBusy:
+        raise _server_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if getattr(user, "status", None) == getattr(models, "UserStatus", None).SUSPENDED:
+    _, user_status, role = credentials
+    if user_status == models.UserStatus.SUSPENDED:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is suspended")
 
+    # The stored hash used an outdated bcrypt cost; replace it while we have the password
+    if new_hash:
+        try:
+            await io_executor.run(_replace_hash, db, form_data.username, new_hash)
+        except ExecutorBusy:
+            pass  # replaced on a later login
+        except Exception:
+            # The password was right, so the login goes ahead; a later one retries
+            logger.exception("Could not replace an outdated password hash", extra={"fields": {"username": form_data.username}})
+            db.rollback()
+
     # Create and return JWT token
-    token_data = {"sub": user.username, "role": getattr(user.role, "value", user.role)}
+    token_data = {"sub": form_data.username, "role": getattr(role, "value", role)}
     access_token = create_access_token(data=token_data)
 
     return {"access_token": access_token, "token_type": "bearer"}
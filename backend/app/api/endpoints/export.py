@@ -1,110 +1,233 @@
+import csv
 import io
 import json # Import the json library
-from fastapi import APIRouter, Depends, Query
+import os
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
+import xlsxwriter
 from docx import Document
 from fpdf import FPDF
-from typing import Optional
-from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from datetime import date, datetime, timedelta
 
 from app.api import deps
+from app.core.executors import ExecutorBusy, export_executor, iterate_in
+from app.core.metrics import timed_iter
+from app.db.session import SessionLocal
 from app.models import models
 
 router = APIRouter()
 
-def get_user_data_as_dataframe(db: Session, user: models.User, issuer: Optional[str] = None, period: Optional[str] = None):
-    """
-    Fetches user's upload history with filters and returns it as a pandas DataFrame.
-    """
-    query = db.query(models.FileUpload).filter(models.FileUpload.user_id == user.id)
+EXPORT_COLUMNS = [
+    'Filename', 'Issuer', 'Card (Last 4)', 'Card Variant',
+    'Billing Cycle', 'Payment Due Date', 'Total Balance',
+]
+# Rows fetched from the database cursor at a time
+EXPORT_BATCH_SIZE = 500
+# Bytes sent to the client per chunk when streaming a finished document
+STREAM_CHUNK_SIZE = 64 * 1024
 
+def period_start_date(period: Optional[str]) -> Optional[datetime]:
+    """Maps an export/history `period` filter to the earliest upload time it includes."""
+    today = datetime.utcnow()
+    if period == "day": return today - timedelta(days=1)
+    elif period == "week": return today - timedelta(weeks=1)
+    elif period == "month": return today - timedelta(days=30)
+    elif period == "year": return today - timedelta(days=365)
+    return None
+
+def filter_uploads(
+    query,
+    issuer: Optional[str] = None,
+    period: Optional[str] = None,
+    last_4_digits: Optional[str] = None,
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+):
+    """Applies the filters shared by history and exports; all of them run in SQL."""
     if issuer:
         query = query.filter(models.FileUpload.issuer == issuer)
-    
-    if period:
-        today = datetime.utcnow()
-        if period == "day": start_date = today - timedelta(days=1)
-        elif period == "week": start_date = today - timedelta(weeks=1)
-        elif period == "month": start_date = today - timedelta(days=30)
-        elif period == "year": start_date = today - timedelta(days=365)
-        else: start_date = None
-        
-        if start_date:
-            query = query.filter(models.FileUpload.uploaded_at >= start_date)
-
-    uploads = query.order_by(models.FileUpload.uploaded_at.desc()).all()
-    
-    records = []
-    for upload in uploads:
-        if isinstance(upload.extracted_data, str):
-            data = json.loads(upload.extracted_data)
-        else:
-            data = upload.extracted_data or {}
-
-        records.append({
-            'Filename': upload.filename,
-            'Issuer': upload.issuer,
+
+    start_date = period_start_date(period)
+    if start_date:
+        query = query.filter(models.FileUpload.uploaded_at >= start_date)
+
+    if last_4_digits:
+        query = query.filter(models.FileUpload.last_4_digits == last_4_digits)
+    if due_after:
+        query = query.filter(models.FileUpload.payment_due_date >= due_after)
+    if due_before:
+        query = query.filter(models.FileUpload.payment_due_date <= due_before)
+    return query
+
+def iter_user_records(db: Session, user_id: int, issuer: Optional[str] = None, period: Optional[str] = None) -> Iterator[dict]:
+    """
+    Yields the user's upload history with filters applied, one record at a
+    time. Rows come from a server-side cursor in batches of
+    EXPORT_BATCH_SIZE, so memory use does not grow with the history size.
+    """
+    query = db.query(
+        models.FileUpload.filename, models.FileUpload.issuer, models.FileUpload.extracted_data
+    ).filter(models.FileUpload.user_id == user_id)
+    query = filter_uploads(query, issuer, period)
+
+    query = query.order_by(models.FileUpload.uploaded_at.desc()).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for filename, upload_issuer, extracted_data in query:
+        data = extracted_data or {}
+        yield {
+            'Filename': filename,
+            'Issuer': upload_issuer,
             'Card (Last 4)': data.get('last_4_digits'), 'Card Variant': data.get('card_variant'),
             'Billing Cycle': data.get('billing_cycle'), 'Payment Due Date': data.get('payment_due_date'),
             'Total Balance': data.get('total_balance')
-        })
-    return pd.DataFrame(records)
+        }
+
+def _stream_records(user_id: int, issuer: Optional[str], period: Optional[str]) -> Iterator[dict]:
+    # The generator outlives the request's dependency-managed session, so it
+    # opens its own for as long as the response is being streamed.
+    db = SessionLocal()
+    try:
+        yield from timed_iter("export_query", iter_user_records(db, user_id, issuer, period))
+    finally:
+        db.close()
+
+def _stream_file(file_obj) -> Iterator[bytes]:
+    file_obj.seek(0)
+    while chunk := file_obj.read(STREAM_CHUNK_SIZE):
+        yield chunk
+
+def _csv_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for i, record in enumerate(records, start=1):
+        writer.writerow(record)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def _ndjson_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode('utf-8')
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode('utf-8')
+
+def _xlsx_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    # constant_memory makes xlsxwriter flush each row to disk as it is written;
+    # the zip container can only be sent once the workbook is closed.
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Extracted Data')
+        sheet.write_row(0, 0, EXPORT_COLUMNS)
+        for row, record in enumerate(records, start=1):
+            sheet.write_row(row, 0, [record[col] for col in EXPORT_COLUMNS])
+        workbook.close()
+        with open(path, "rb") as f:
+            yield from _stream_file(f)
+    finally:
+        os.remove(path)
+
+def _pdf_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt="Extracted Credit Card Data", ln=True, align='C')
+    for i, record in enumerate(records):
+        pdf.cell(200, 10, txt=f"--- Record {i+1} ---", ln=True)
+        for col, value in record.items():
+            pdf.cell(200, 10, txt=f"{col}: {value}", ln=True)
+        pdf.cell(200, 5, txt="", ln=True)
+    yield from _stream_file(io.BytesIO(pdf.output(dest='S').encode('latin-1')))
+
+def _docx_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    document = Document()
+    document.add_heading('Extracted Credit Card Data', 0)
+    for i, record in enumerate(records):
+        document.add_heading(f"Record {i+1}: {record['Filename']}", level=2)
+        for col, value in record.items():
+            if col != 'Filename': document.add_paragraph(f"{col}: {value}")
+        document.add_paragraph()
+    with tempfile.SpooledTemporaryFile(max_size=STREAM_CHUNK_SIZE * 16) as output:
+        document.save(output)
+        yield from _stream_file(output)
+
+def _admitted_first(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # An empty chunk ahead of the document: fetching it only gets the export
+    # admitted to the executor, without building anything
+    yield b""
+    yield from chunks
+
+async def _export_response(chunks: Iterator[bytes], filename: str, media_type: str) -> StreamingResponse:
+    """
+    Streams a document built on the export executor, one chunk per call.
+    The response starts as soon as the executor admits the export, so a busy
+    executor is a 503 rather than a download cut off after its headers were
+    sent, while the document itself is only built as it streams.
+    """
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    # Includes export_query, since rows are fetched while the document is built
+    stage_name = "export_" + filename.rsplit(".", 1)[-1]
+    stream = iterate_in(export_executor, _admitted_first(timed_iter(stage_name, chunks)))
+    try:
+        await anext(stream)
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=503, detail="Too many exports are in progress, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    return StreamingResponse(stream, headers=headers, media_type=media_type)
 
 @router.get("/export/xlsx")
 async def export_to_xlsx(
     issuer: Optional[str] = Query(None),
     period: Optional[str] = Query(None),
-    db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user_from_token)
 ):
-    df = get_user_data_as_dataframe(db, current_user, issuer, period)
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Extracted Data')
-    output.seek(0)
-    headers = {'Content-Disposition': 'attachment; filename="exported_data.xlsx"'}
-    return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    records = _stream_records(current_user.id, issuer, period)
+    return await _export_response(_xlsx_chunks(records), "exported_data.xlsx", 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
 @router.get("/export/pdf")
 async def export_to_pdf(
     issuer: Optional[str] = Query(None),
     period: Optional[str] = Query(None),
-    db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user_from_token)
 ):
-    df = get_user_data_as_dataframe(db, current_user, issuer, period)
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Extracted Credit Card Data", ln=True, align='C')
-    for i, row in df.iterrows():
-        pdf.cell(200, 10, txt=f"--- Record {i+1} ---", ln=True)
-        for col, value in row.items():
-            pdf.cell(200, 10, txt=f"{col}: {value}", ln=True)
-        pdf.cell(200, 5, txt="", ln=True)
-    output = io.BytesIO(pdf.output(dest='S').encode('latin-1'))
-    headers = {'Content-Disposition': 'attachment; filename="exported_data.pdf"'}
-    return StreamingResponse(output, headers=headers, media_type='application/pdf')
+    records = _stream_records(current_user.id, issuer, period)
+    return await _export_response(_pdf_chunks(records), "exported_data.pdf", 'application/pdf')
 
 @router.get("/export/docx")
 async def export_to_docx(
     issuer: Optional[str] = Query(None),
     period: Optional[str] = Query(None),
-    db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user_from_token)
 ):
-    df = get_user_data_as_dataframe(db, current_user, issuer, period)
-    document = Document()
-    document.add_heading('Extracted Credit Card Data', 0)
-    for i, row in df.iterrows():
-        document.add_heading(f"Record {i+1}: {row['Filename']}", level=2)
-        for col, value in row.items():
-            if col != 'Filename': document.add_paragraph(f"{col}: {value}")
-        document.add_paragraph()
-    output = io.BytesIO()
-    document.save(output)
-    output.seek(0)
-    headers = {'Content-Disposition': 'attachment; filename="exported_data.docx"'}
-    return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
\ No newline at end of file
+    records = _stream_records(current_user.id, issuer, period)
+    return await _export_response(_docx_chunks(records), "exported_data.docx", 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+
+@router.get("/export/csv")
+async def export_to_csv(
+    issuer: Optional[str] = Query(None),
+    period: Optional[str] = Query(None),
+    current_user: models.User = Depends(deps.get_current_user_from_token)
+):
+    records = _stream_records(current_user.id, issuer, period)
+    return await _export_response(_csv_chunks(records), "exported_data.csv", 'text/csv')
+
+@router.get("/export/ndjson")
+async def export_to_ndjson(
+    issuer: Optional[str] = Query(None),
+    period: Optional[str] = Query(None),
+    current_user: models.User = Depends(deps.get_current_user_from_token)
+):
+    records = _stream_records(current_user.id, issuer, period)
+    return await _export_response(_ndjson_chunks(records), "exported_data.ndjson", 'application/x-ndjson')
@@ -1,132 +1,277 @@
-import hashlib
-import ocrmypdf
-import pdfplumber
-import re
+import asyncio
+import base64
 import json
-import os
-import tempfile
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+import logging
+import math
+from datetime import date, datetime
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Response
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.api.endpoints.export import filter_uploads
 from app.models import models
 from app.schemas import file as file_schema
+from app.core.admission import RateLimited, SubmissionTooLarge, admission_backend, charge_quota, ocr_scheduler
+from app.core.cache import extraction_cache
+from app.core.executors import ExecutorBusy, cpu_executor, io_executor
+from app.core.extraction import extract_statement, statement_transactions
+from app.core.ingest import UploadTooLarge, spool_upload
+from app.core.metrics import ERRORS, FILES_PROCESSED, StageTimer, observe_ocr_pages, stage
+from app.core.pages import count_pages
+from app.core.persistence import ParsedUpload, existing_hashes, save_uploads
 from pydantic import BaseModel
 
 class UploadResponse(BaseModel):
     processed: List[file_schema.FileUploadResponse]
     skipped: List[str] # List of filenames that were skipped
+    failed: List[file_schema.FailedUpload] = [] # Files that could not be processed or saved
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 MAX_FILE_SIZE = 5 * 1024 * 1024
 ACCEPTED_FILE_TYPES = ["application/pdf"]
 
-def extract_data_from_text(text: str) -> dict:
-    issuer = "Unknown"
-    if re.search(r'HDFC Bank', text, re.IGNORECASE): issuer = "HDFC"
-    elif re.search(r'ICICI Bank', text, re.IGNORECASE): issuer = "ICICI"
-    elif re.search(r'State Bank of India|SBI', text, re.IGNORECASE): issuer = "SBI"
-    elif re.search(r'Axis Bank', text, re.IGNORECASE): issuer = "Axis Bank"
-    elif re.search(r'American Express|AMEX', text, re.IGNORECASE): issuer = "American Express"
-    card_no_pattern = re.search(r'Card No.*?(\d{4})', text, re.IGNORECASE | re.DOTALL)
-    due_date_pattern = re.search(r'Payment Due Date.*?(\d{2}[-/]\d{2}[-/]\d{4})', text, re.IGNORECASE | re.DOTALL)
-    total_due_pattern = re.search(r'Total Amount Due.*?([0-9,]+\.\d{2})', text, re.IGNORECASE | re.DOTALL)
-    statement_date_pattern = re.search(r'Statement Date.*?(\d{2}[-/]\d{2}[-/]\d{4})', text, re.IGNORECASE | re.DOTALL)
-    card_variant_pattern = re.search(r'\b(Platinum|Millennia|Regalia|Infinia|Signature|Ultimate)\b', text, re.IGNORECASE)
-    return {
-        "issuer": issuer, "last_4_digits": card_no_pattern.group(1) if card_no_pattern else "N/A",
-        "card_variant": card_variant_pattern.group(1) if card_variant_pattern else "N/A",
-        "billing_cycle": statement_date_pattern.group(1) if statement_date_pattern else "N/A",
-        "payment_due_date": due_date_pattern.group(1) if due_date_pattern else "N/A",
-        "total_balance": total_due_pattern.group(1) if total_due_pattern else "N/A",
-    }
-
 @router.post("/upload", response_model=UploadResponse)
 async def upload_files(
     files: List[UploadFile] = File(...),
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
+    """
+    Processes a batch of statements. Duplicates are resolved with one query
+    up front and every successful result is saved in a single commit; a file
+    that fails is reported under `failed` without affecting the others.
+    Extraction runs on the CPU executor and database calls on the I/O
+    executor, so the event loop keeps serving other requests meanwhile.
+    """
     if not current_user.is_verified:
         raise HTTPException(
             status_code=403, 
             detail="Your account is not verified. Please contact an admin to enable file uploads."
         )
 
-    processed_files = []
-    skipped_files = []
-    for file in files:
-        if file.content_type not in ACCEPTED_FILE_TYPES:
-            raise HTTPException(status_code=400, detail=f"File '{file.filename}' is not a PDF.")
-        if file.size > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail=f"File '{file.filename}' exceeds 5MB.")
-
-        content = await file.read()
-        file_hash = hashlib.sha256(content).hexdigest()
-
-        existing_file = db.query(models.FileUpload).filter(
-            models.FileUpload.file_hash == file_hash,
-            models.FileUpload.user_id == current_user.id
-        ).first()
-
-        if existing_file:
-            skipped_files.append(file.filename)
-            continue
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        ocr_output_path = temp_file_path.replace(".pdf", "_ocr.pdf")
-
-        try:
-            ocrmypdf.ocr(temp_file_path, ocr_output_path, force_ocr=True)
-            text = ""
-            with pdfplumber.open(ocr_output_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            data = extract_data_from_text(text)
-            
-            new_upload = models.FileUpload(
-                filename=file.filename,
-                file_hash=file_hash,
-                issuer=data.get("issuer"),
-                extracted_data=json.dumps(data),
-                user_id=current_user.id
+    spooled_files = []
+    try:
+        for file in files:
+            if file.content_type not in ACCEPTED_FILE_TYPES:
+                raise HTTPException(status_code=400, detail=f"File '{file.filename}' is not a PDF.")
+            if file.size is not None and file.size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail=f"File '{file.filename}' exceeds 5MB.")
+
+            stages = StageTimer()
+            try:
+                spooled_files.append((file.filename, await spool_upload(file, MAX_FILE_SIZE, stages=stages), stages))
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail=f"File '{file.filename}' exceeds 5MB.")
+            finally:
+                await file.close()
+
+        with stage("dedup_query"):
+            duplicates = await io_executor.run(
+                existing_hashes, db, current_user.id, [spooled.file_hash for _, spooled, _ in spooled_files]
             )
-            
-            db.add(new_upload)
-            db.commit()
-            db.refresh(new_upload)
-            
-            processed_files.append({"filename": file.filename, "issuer": data.get("issuer"), "data": data})
-
-        except Exception as e:
-            db.rollback()
-            print(f"An error occurred during file processing: {e}")
-            raise HTTPException(status_code=500, detail="An unexpected error occurred during file processing.")
-        finally:
-            if os.path.exists(temp_file_path): os.remove(temp_file_path)
-            if os.path.exists(ocr_output_path): os.remove(ocr_output_path)
-                
-    return {"processed": processed_files, "skipped": skipped_files}
+        skipped_files, failed_files, pending = [], [], []
+        for filename, spooled, stages in spooled_files:
+            if spooled.file_hash in duplicates:
+                skipped_files.append(filename)
+                _log_file(current_user.id, filename, spooled.file_hash, stages, "duplicate")
+                continue
+            # Also skip a file repeated within the same batch
+            duplicates.add(spooled.file_hash)
+            pending.append((filename, spooled, stages))
+
+        if pending:
+            pages = await io_executor.run(count_pages, [spooled.path for _, spooled, _ in pending])
+            await io_executor.run(charge_quota, admission_backend, current_user.id, len(pending), pages)
+
+        cached = await io_executor.run(_cache_lookups, db, pending)
+        outcomes = await asyncio.gather(*(
+            _process(current_user.id, spooled, stages, cached[spooled.file_hash]) for _, spooled, stages in pending
+        ), return_exceptions=True)
+        if any(isinstance(outcome, ExecutorBusy) for outcome in outcomes):
+            raise server_busy()
+
+        batch, results, new_results = [], {}, []
+        for (filename, spooled, stages), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("Could not process %s", filename, exc_info=outcome, extra={"fields": {"file_hash": spooled.file_hash}})
+                ERRORS.inc(stage="extraction")
+                failed_files.append({"filename": filename, "error": "An unexpected error occurred during file processing."})
+                _log_file(current_user.id, filename, spooled.file_hash, stages, "failed")
+                continue
+            result, transactions = outcome
+            if cached[spooled.file_hash] is None:
+                new_results.append((spooled.file_hash, result, stages))
+            batch.append(ParsedUpload(filename, spooled.file_hash, result.data, transactions))
+            results[spooled.file_hash] = (result, stages, transactions)
+
+        saved, failed = await io_executor.run(_save_batch, db, current_user.id, batch, new_results)
+    except HTTPException:
+        db.rollback()
+        raise
+    except ExecutorBusy:
+        db.rollback()
+        raise server_busy()
+    except RateLimited as error:
+        db.rollback()
+        raise rate_limited(error)
+    except SubmissionTooLarge as error:
+        db.rollback()
+        raise HTTPException(status_code=413, detail=error.detail)
+    except Exception:
+        db.rollback()
+        logger.exception("Upload batch failed", extra={"fields": {"user_id": current_user.id, "files": len(files)}})
+        ERRORS.inc(stage="upload")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred during file processing.")
+    finally:
+        for _, spooled, _ in spooled_files:
+            spooled.discard()
+
+    for parsed, error in failed:
+        failed_files.append({"filename": parsed.filename, "error": error})
+        result, stages, _ = results[parsed.file_hash]
+        _log_file(current_user.id, parsed.filename, parsed.file_hash, stages, "failed", result)
+    processed_files = []
+    for upload in saved:
+        result, stages, transactions = results[upload.file_hash]
+        _log_file(current_user.id, upload.filename, upload.file_hash, stages, "saved", result)
+        processed_files.append({
+            "filename": upload.filename, "issuer": result.data.get("issuer"), "data": result.data,
+            "extraction_method": result.method, "page_timings": result.page_timings,
+            "transaction_count": len(transactions) if transactions is not None else None,
+        })
+    return {"processed": processed_files, "skipped": skipped_files, "failed": failed_files}
+
+def server_busy():
+    return HTTPException(
+        status_code=503, detail="Too many uploads are being processed, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+def rate_limited(error: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail=error.detail,
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+
+def _cache_lookups(db: Session, pending: list) -> dict:
+    """Looks up each pending file in the extraction cache, timing every lookup under the file's stages."""
+    cached = {}
+    for _, spooled, stages in pending:
+        with stages.stage("cache_lookup"):
+            cached[spooled.file_hash] = extraction_cache.get(db, spooled.file_hash)
+    # Hit counts are committed now rather than with the batch, so the session
+    # holds no SQLite write lock while its files wait for OCR slots
+    db.commit()
+    return cached
+
+async def _process(user_id: int, spooled, stages: StageTimer, result):
+    """
+    Extracts a statement on the CPU executor, or for a cached result only
+    reads its transactions, and returns (result, transactions). Either way
+    it waits for one of the user's OCR slots first.
+    """
+    with stages.stage("ocr_slot_wait"):
+        lease = await ocr_scheduler.acquire(user_id)
+    try:
+        if result is None:
+            # The worker process times its own stages and returns them with the result
+            result = await cpu_executor.run(extract_statement, spooled.path)
+            stages.update(result.stage_timings)
+            return result, result.transactions
+        with stages.stage("transactions"):
+            transactions = await cpu_executor.run(statement_transactions, spooled.path, result.data, result.text)
+        return result, transactions
+    finally:
+        await ocr_scheduler.release(user_id, lease)
+
+def _save_batch(db: Session, user_id: int, batch: List[ParsedUpload], new_results: list):
+    """Caches the new extraction results and saves the batch, all in one commit."""
+    for file_hash, result, stages in new_results:
+        with stages.stage("cache_store"):
+            extraction_cache.put(db, file_hash, result.text, result.data, result.method)
+    with stage("db_insert"):
+        saved, failed = save_uploads(db, user_id, batch)
+    with stage("db_commit"):
+        db.commit()
+    return saved, failed
+
+def _log_file(user_id: int, filename: str, file_hash: str, stages: StageTimer, outcome: str, result=None):
+    """Records a file's stage timings in the metrics and logs them in one line."""
+    issuer = result.data.get("issuer") if result else None
+    method = result.method if result else None
+    pages = getattr(result, "page_count", None)
+    ocr_pages = len(getattr(result, "ocr_pages", []))
+    ocr_cached_pages = len(getattr(result, "ocr_cached_pages", []))
+    stages.observe(issuer, pages)
+    observe_ocr_pages(ocr_pages, ocr_cached_pages)
+    FILES_PROCESSED.inc(issuer=issuer or "unknown", method=method or "none", outcome=outcome)
+    logger.info("Processed upload", extra={"fields": {
+        "user_id": user_id, "filename": filename, "file_hash": file_hash, "outcome": outcome,
+        "issuer": issuer, "method": method, "pages": pages, "ocr_profile": getattr(result, "ocr_profile", None),
+        "ocr_pages": ocr_pages, "ocr_cached_pages": ocr_cached_pages,
+        "seconds": round(sum(stages.timings.values()), 4), "stages": stages.rounded(),
+    }})
+
+def _encode_cursor(upload: models.FileUpload) -> str:
+    raw = json.dumps([upload.uploaded_at.isoformat(), upload.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        uploaded_at, upload_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(uploaded_at), int(upload_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/history", response_model=List[file_schema.HistoryResponse])
 def get_history(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Value of the X-Next-Cursor header from the previous page"),
+    issuer: Optional[str] = Query(None),
+    period: Optional[str] = Query(None),
+    last_4_digits: Optional[str] = Query(None),
+    due_after: Optional[date] = Query(None),
+    due_before: Optional[date] = Query(None),
+    fields: Optional[List[str]] = Query(None, description="Extracted fields to include in `data`; all when omitted"),
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    uploads = db.query(models.FileUpload).filter(models.FileUpload.user_id == current_user.id).order_by(models.FileUpload.uploaded_at.desc()).all()
+    """
+    Returns one page of the user's upload history, newest first. Pages are
+    keyset-paginated on (uploaded_at, id): when more rows exist, the
+    X-Next-Cursor response header holds the cursor for the next page.
+    """
+    query = db.query(models.FileUpload).filter(models.FileUpload.user_id == current_user.id)
+    query = filter_uploads(query, issuer, period, last_4_digits, due_after, due_before)
+    if cursor:
+        cursor_at, cursor_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            models.FileUpload.uploaded_at < cursor_at,
+            and_(models.FileUpload.uploaded_at == cursor_at, models.FileUpload.id < cursor_id),
+        ))
+    uploads = query.order_by(
+        models.FileUpload.uploaded_at.desc(), models.FileUpload.id.desc()
+    ).limit(limit + 1).all()
+
+    if len(uploads) > limit:
+        uploads = uploads[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(uploads[-1])
+
     history = []
     for upload in uploads:
+        data = upload.extracted_data
+        if fields:
+            data = {key: value for key, value in (data or {}).items() if key in fields}
         history.append({
+            "id": upload.id,
             "filename": upload.filename,
             "issuer": upload.issuer,
-            "data": json.loads(upload.extracted_data) if isinstance(upload.extracted_data, str) else upload.extracted_data
+            "uploaded_at": upload.uploaded_at,
+            "data": data
         })
     return history
 
@@ -151,7 +296,7 @@ def export_data(
             "filename": upload.filename,
             "issuer": upload.issuer,
             "uploaded_at": upload.uploaded_at,
-            "data": json.loads(upload.extracted_data) if isinstance(upload.extracted_data, str) else upload.extracted_data,
+            "data": upload.extracted_data,
         }
         for upload in user_uploads
     ]
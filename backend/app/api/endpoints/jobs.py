@@ -0,0 +1,135 @@
+from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, status
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.api.endpoints.files import MAX_FILE_SIZE, ACCEPTED_FILE_TYPES, rate_limited, server_busy
+from app.core.admission import RateLimited, SubmissionTooLarge, admission_backend, charge_quota
+from app.core.config import settings
+from app.core.executors import ExecutorBusy, io_executor
+from app.core.ingest import UploadTooLarge, spool_upload
+from app.core.jobs import enqueue_job, job_queue, pending_job_hashes
+from app.core.pages import count_pages
+from app.core.persistence import existing_hashes
+from app.models import models
+from app.schemas import job as job_schema
+
+router = APIRouter()
+
+def _get_user_job(db: Session, user: models.User, job_id: str) -> models.ParseJob:
+    job = db.query(models.ParseJob).filter(
+        models.ParseJob.id == job_id,
+        models.ParseJob.user_id == user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("", response_model=job_schema.JobEnqueueResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_jobs(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Queues the uploaded statements for background parsing and returns
+    immediately with one job per file. Poll /jobs/{job_id} for progress.
+    The files and pages queued count against the user's upload quota.
+    """
+    if not current_user.is_verified:
+        raise HTTPException(
+            status_code=403,
+            detail="Your account is not verified. Please contact an admin to enable file uploads."
+        )
+
+    spooled_files = []
+    try:
+        for file in files:
+            if file.content_type not in ACCEPTED_FILE_TYPES:
+                raise HTTPException(status_code=400, detail=f"File '{file.filename}' is not a PDF.")
+            if file.size is not None and file.size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail=f"File '{file.filename}' exceeds 5MB.")
+
+            try:
+                spooled_files.append((file.filename, await spool_upload(file, MAX_FILE_SIZE, directory=settings.JOB_SPOOL_DIR)))
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail=f"File '{file.filename}' exceeds 5MB.")
+            finally:
+                await file.close()
+
+        hashes = [spooled.file_hash for _, spooled in spooled_files]
+        duplicates = await io_executor.run(existing_hashes, db, current_user.id, hashes)
+        duplicates |= await io_executor.run(pending_job_hashes, db, current_user.id, hashes)
+        accepted, skipped_files = [], []
+        for filename, spooled in spooled_files:
+            if spooled.file_hash in duplicates:
+                spooled.discard()
+                skipped_files.append(filename)
+                continue
+            # Also skip a file repeated within the same batch
+            duplicates.add(spooled.file_hash)
+            accepted.append((filename, spooled))
+
+        # Charged before the jobs are written, so a shared quota backend in the
+        # same SQLite database is never locked out by this session
+        if accepted:
+            pages = await io_executor.run(count_pages, [spooled.path for _, spooled in accepted])
+            await io_executor.run(charge_quota, admission_backend, current_user.id, len(accepted), pages)
+        jobs = await io_executor.run(_enqueue_jobs, db, current_user, accepted)
+    except RateLimited as error:
+        raise rate_limited(error)
+    except SubmissionTooLarge as error:
+        raise HTTPException(status_code=413, detail=error.detail)
+    except ExecutorBusy:
+        raise server_busy()
+    finally:
+        # Spools already moved to their job's path are left alone
+        for _, spooled in spooled_files:
+            spooled.discard()
+
+    job_queue.wake()
+    return {"jobs": jobs, "skipped": skipped_files}
+
+def _enqueue_jobs(db: Session, user: models.User, accepted: list) -> List[models.ParseJob]:
+    jobs = [enqueue_job(db, user, filename, spooled) for filename, spooled in accepted]
+    db.commit()
+    for job in jobs:
+        db.refresh(job)
+    return jobs
+
+@router.get("", response_model=List[job_schema.JobView])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    return db.query(models.ParseJob).filter(
+        models.ParseJob.user_id == current_user.id
+    ).order_by(models.ParseJob.created_at.desc()).limit(limit).all()
+
+@router.get("/{job_id}", response_model=job_schema.JobView)
+def get_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    return _get_user_job(db, current_user, job_id)
+
+@router.get("/{job_id}/result", response_model=job_schema.JobResult)
+def get_job_result(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    job = _get_user_job(db, current_user, job_id)
+    if job.status == models.JobStatus.FAILED:
+        raise HTTPException(status_code=422, detail=job.error or "Job failed")
+    if job.status != models.JobStatus.DONE or job.upload is None:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status.value}")
+
+    upload = job.upload
+    return {
+        "filename": upload.filename,
+        "issuer": upload.issuer,
+        "data": upload.extracted_data,
+        "extraction_method": job.extraction_method,
+    }
@@ -0,0 +1,22 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.summaries import user_summary
+from app.models import models
+from app.schemas.summary import SummaryResponse
+
+router = APIRouter()
+
+@router.get("/summary", response_model=SummaryResponse)
+def get_summary(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Upload counts per issuer, the outstanding total across cards and the
+    upcoming due dates, from the precomputed card summaries.
+    """
+    return user_summary(db, current_user.id, date.today())
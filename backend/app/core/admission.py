@@ -0,0 +1,412 @@
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.executors import ExecutorBusy, io_executor
+from app.core.metrics import ADMISSION_REJECTED
+from app.db.session import SessionLocal
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+# Slot pool shared by uploads and background jobs
+OCR_POOL = "ocr"
+
+class RateLimited(Exception):
+    """Raised when a user's quota cannot cover a submission; `retry_after` is in seconds."""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+class SubmissionTooLarge(Exception):
+    """Raised when a submission is bigger than a quota's burst, so waiting would never admit it."""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class AdmissionBackend(ABC):
+    """
+    Keeps the token buckets and slot leases admission control is based on.
+    MemoryBackend only sees this process; DatabaseBackend keeps them in the
+    application database, so every node using it enforces the same limits.
+    Any other store (e.g. Redis) can be plugged in through ADMISSION_BACKEND
+    by implementing the abstract methods, and renew_slots() when its leases
+    expire. They are blocking and thread-safe.
+    """
+
+    @abstractmethod
+    def take(self, key: str, amount: float, rate: float, capacity: float) -> float:
+        """
+        Takes `amount` tokens from the bucket `key`, which starts full and
+        refills at `rate` tokens per second up to `capacity`. Returns 0 when
+        they were taken, otherwise the seconds until enough will have
+        refilled, and nothing is taken. A negative `amount` gives tokens back.
+        """
+
+    @abstractmethod
+    def acquire_slot(self, pool: str, limit: int) -> Optional[str]:
+        """Leases one of the `limit` slots of `pool`; None when all are taken."""
+
+    @abstractmethod
+    def release_slot(self, pool: str, lease: str):
+        """Gives a slot of `pool` back."""
+
+    def renew_slots(self, pool: str, leases: List[str]):
+        """Called periodically with the slots of `pool` still held; leases that never expire need nothing."""
+
+
+class MemoryBackend(AdmissionBackend):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, monotonic time counted)
+        self._leases: Dict[str, set] = {}
+        self._next_lease = 0
+
+    def take(self, key: str, amount: float, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, counted_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - counted_at) * rate)
+            if tokens < amount:
+                self._buckets[key] = (tokens, now)
+                return (amount - tokens) / rate
+            self._buckets[key] = (tokens - amount, now)
+            return 0.0
+
+    def acquire_slot(self, pool: str, limit: int) -> Optional[str]:
+        with self._lock:
+            leases = self._leases.setdefault(pool, set())
+            if len(leases) >= limit:
+                return None
+            self._next_lease += 1
+            lease = str(self._next_lease)
+            leases.add(lease)
+            return lease
+
+    def release_slot(self, pool: str, lease: str):
+        with self._lock:
+            self._leases.get(pool, set()).discard(lease)
+
+
+class DatabaseBackend(AdmissionBackend):
+    """
+    Token buckets and slot leases in the admission_buckets and
+    admission_leases tables. Buckets are updated with a single conditional
+    UPDATE, so concurrent nodes never both spend the same tokens. A lease
+    expires ADMISSION_LEASE_SECONDS after it was last renewed, so the slots
+    of a node that crashed are eventually given to others.
+    """
+
+    def __init__(self, session_factory=SessionLocal, lease_seconds: Optional[float] = None):
+        self._session_factory = session_factory
+        self._lease_seconds = lease_seconds or settings.ADMISSION_LEASE_SECONDS
+
+    def take(self, key: str, amount: float, rate: float, capacity: float) -> float:
+        now = time.time()
+        bucket = models.AdmissionBucket
+        refilled = bucket.tokens + (now - bucket.updated_at) * rate
+        level = case((refilled > capacity, capacity), else_=refilled)
+        db = self._session_factory()
+        try:
+            taken = db.execute(
+                update(bucket).where(bucket.key == key, level >= amount)
+                .values(tokens=level - amount, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if taken:
+                db.commit()
+                return 0.0
+            tokens = db.execute(select(level).where(bucket.key == key)).scalar()
+            if tokens is None:
+                tokens = capacity
+                if amount <= capacity:
+                    try:
+                        db.execute(insert(bucket).values(key=key, tokens=capacity - amount, updated_at=now))
+                        db.commit()
+                        return 0.0
+                    except IntegrityError:
+                        # Another node created the bucket first; spend from that one
+                        db.rollback()
+                        return self.take(key, amount, rate, capacity)
+            db.rollback()
+            return (amount - tokens) / rate
+        finally:
+            db.close()
+
+    def acquire_slot(self, pool: str, limit: int) -> Optional[str]:
+        now = time.time()
+        lease = models.AdmissionLease
+        db = self._session_factory()
+        try:
+            db.execute(delete(lease).where(lease.expires_at < now))
+            lease_id = db.execute(
+                insert(lease).values(pool=pool, expires_at=now + self._lease_seconds)
+            ).inserted_primary_key[0]
+            db.commit()
+            # Slots go to the lowest lease ids, so of two nodes racing for the
+            # last one the later lease gives it up
+            ahead = db.execute(select(func.count()).select_from(lease).where(
+                lease.pool == pool, lease.id <= lease_id, lease.expires_at >= now,
+            )).scalar()
+            if ahead > limit:
+                db.execute(delete(lease).where(lease.id == lease_id))
+                db.commit()
+                return None
+            return str(lease_id)
+        finally:
+            db.close()
+
+    def release_slot(self, pool: str, lease: str):
+        db = self._session_factory()
+        try:
+            db.execute(delete(models.AdmissionLease).where(models.AdmissionLease.id == int(lease)))
+            db.commit()
+        finally:
+            db.close()
+
+    def renew_slots(self, pool: str, leases: List[str]):
+        if not leases:
+            return
+        lease = models.AdmissionLease
+        db = self._session_factory()
+        try:
+            db.execute(
+                update(lease).where(lease.id.in_([int(lease_id) for lease_id in leases]))
+                .values(expires_at=time.time() + self._lease_seconds)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+def load_backend(name: str) -> AdmissionBackend:
+    if name == "memory":
+        return MemoryBackend()
+    if name == "database":
+        return DatabaseBackend()
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+def statement_slots() -> int:
+    """
+    How many statements may be extracted at once. Each one fans its pages
+    out to PAGE_JOBS OCR processes, so it counts that many against OCR_SLOTS.
+    """
+    return max(1, settings.OCR_SLOTS // max(1, settings.PAGE_JOBS))
+
+
+def _quotas(files: int, pages: int) -> List[Tuple[str, int, float, int]]:
+    """(name, amount, per minute, burst) of each enabled quota."""
+    quotas = [
+        ("files", files, settings.USER_FILES_PER_MINUTE, settings.USER_FILES_BURST),
+        ("pages", pages, settings.USER_PAGES_PER_MINUTE, settings.USER_PAGES_BURST),
+    ]
+    return [quota for quota in quotas if quota[2] > 0 and quota[1] > 0]
+
+def charge_quota(backend: AdmissionBackend, user_id: int, files: int, pages: int):
+    """
+    Spends a submission's files and pages from the user's token buckets, or
+    raises RateLimited (or SubmissionTooLarge, when no bucket could ever
+    hold it) without spending anything.
+    """
+    quotas = _quotas(files, pages)
+    for name, amount, _, burst in quotas:
+        if amount > burst:
+            ADMISSION_REJECTED.inc(quota=name)
+            raise SubmissionTooLarge(f"At most {burst} {name} can be submitted at once.")
+    spent = []
+    try:
+        for name, amount, per_minute, burst in quotas:
+            key, rate = f"user:{user_id}:{name}", per_minute / 60
+            wait = backend.take(key, amount, rate, burst)
+            if wait:
+                ADMISSION_REJECTED.inc(quota=name)
+                raise RateLimited(f"Upload quota exceeded: {per_minute:g} {name} per minute.", wait)
+            spent.append((key, amount, rate, burst))
+    except RateLimited:
+        for key, amount, rate, burst in spent:
+            backend.take(key, -amount, rate, burst)
+        raise
+
+
+class FairScheduler:
+    """
+    Hands out the slots of one pool to async callers. When every slot is
+    taken, waiting callers are served by user rather than in arrival order:
+    first the user holding the fewest slots, then the one served longest
+    ago. A user with a large batch so waits behind one file of each other
+    user instead of everyone waiting behind the batch; a user also never
+    holds more than `per_user` slots at once.
+
+    Slots freed by other processes sharing the backend are only noticed by
+    polling, every `poll_interval` seconds. While any slot is held, the
+    leases are renewed every `renew_interval` seconds.
+    """
+
+    def __init__(
+        self, backend: AdmissionBackend, pool: str, limit: int, per_user: int, poll_interval: float,
+        renew_interval: Optional[float] = None,
+    ):
+        self.backend = backend
+        self.pool = pool
+        self.limit = limit
+        self.per_user = per_user
+        self.poll_interval = poll_interval
+        self.renew_interval = renew_interval or settings.ADMISSION_LEASE_SECONDS / 3
+        self._waiting: Dict[int, Deque[asyncio.Future]] = {}
+        self._held: Dict[int, int] = {}
+        self._leases: set = set()
+        self._renewer: Optional[asyncio.Task] = None
+        self._grants = 0
+        self._last_grant: Dict[int, int] = {}  # user -> number of their latest grant
+        self._dispatching = False
+        self._redispatch = False
+
+    async def acquire(self, user_id: int) -> str:
+        """Waits for a slot for the user and returns its lease, to be passed to release()."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(waiter)
+        try:
+            await self._dispatch()
+            while not waiter.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), self.poll_interval)
+                except asyncio.TimeoutError:
+                    await self._dispatch()
+            return waiter.result()
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller gave up
+                asyncio.ensure_future(self.release(user_id, waiter.result()))
+            else:
+                waiter.cancel()
+                self._forget(user_id, waiter)
+            raise
+
+    def _forget(self, user_id: int, waiter: asyncio.Future):
+        waiters = self._waiting.get(user_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[user_id]
+                self._forget_idle(user_id)
+
+    async def release(self, user_id: int, lease: str):
+        self._leases.discard(lease)
+        self._held[user_id] -= 1
+        if not self._held[user_id]:
+            del self._held[user_id]
+            self._forget_idle(user_id)
+        await self._release_lease(lease)
+        try:
+            await self._dispatch()
+        except ExecutorBusy:
+            pass  # the waiters try again on their next poll
+
+    async def _release_lease(self, lease: str):
+        try:
+            await io_executor.run(self.backend.release_slot, self.pool, lease)
+        except ExecutorBusy:
+            # A slot must never leak, and releasing it is one short call
+            self.backend.release_slot(self.pool, lease)
+
+    def _next_user(self) -> Optional[int]:
+        eligible = [user_id for user_id in self._waiting if self._held.get(user_id, 0) < self.per_user]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda user_id: (self._held.get(user_id, 0), self._last_grant.get(user_id, 0)))
+
+    def _forget_idle(self, user_id: int):
+        if user_id not in self._waiting and user_id not in self._held:
+            self._last_grant.pop(user_id, None)
+
+    async def _dispatch(self):
+        # One dispatch at a time; a call arriving meanwhile makes it go round again
+        if self._dispatching:
+            self._redispatch = True
+            return
+        self._dispatching = True
+        try:
+            while True:
+                self._redispatch = False
+                if not await self._grant_next() and not self._redispatch:
+                    return
+        finally:
+            self._dispatching = False
+
+    async def _grant_next(self) -> bool:
+        user_id = self._next_user()
+        if user_id is None:
+            return False
+        lease = await io_executor.run(self.backend.acquire_slot, self.pool, self.limit)
+        if lease is None:
+            return False
+        waiters = self._waiting.get(user_id)
+        while waiters and waiters[0].done():
+            waiters.popleft()
+        if not waiters:
+            # Every waiter of the user gave up while the slot was being leased
+            self._waiting.pop(user_id, None)
+            self._forget_idle(user_id)
+            await self._release_lease(lease)
+            return True
+        waiters.popleft().set_result(lease)
+        self._leases.add(lease)
+        if self._renewer is None or self._renewer.done():
+            self._renewer = asyncio.ensure_future(self._renew_while_held())
+        self._held[user_id] = self._held.get(user_id, 0) + 1
+        self._grants += 1
+        self._last_grant[user_id] = self._grants
+        if not waiters:
+            del self._waiting[user_id]
+        return True
+
+    async def _renew_while_held(self):
+        while self._leases:
+            await asyncio.sleep(self.renew_interval)
+            if not self._leases:
+                return
+            try:
+                await io_executor.run(self.backend.renew_slots, self.pool, list(self._leases))
+            except Exception:
+                # Tried again next time, well before the leases run out
+                logger.exception("Could not renew slot leases", extra={"fields": {"pool": self.pool}})
+
+
+def fair_order(jobs: Iterable[tuple], running: Dict[int, int]) -> List[tuple]:
+    """
+    Interleaves (job_id, user_id, ...) rows, oldest first per user, so each
+    user gets one job in turn; users with fewer jobs `running` go first.
+    """
+    per_user: Dict[int, Deque[tuple]] = {}
+    for job in jobs:
+        per_user.setdefault(job[1], deque()).append(job)
+    users = sorted(per_user, key=lambda user_id: running.get(user_id, 0))
+    ordered = []
+    while users:
+        for user_id in list(users):
+            ordered.append(per_user[user_id].popleft())
+            if not per_user[user_id]:
+                users.remove(user_id)
+    return ordered
+
+
+admission_backend = load_backend(settings.ADMISSION_BACKEND)
+ocr_scheduler = FairScheduler(
+    admission_backend, OCR_POOL, statement_slots(), settings.OCR_SLOTS_PER_USER, settings.ADMISSION_POLL_INTERVAL,
+)
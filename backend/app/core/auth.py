@@ -1,9 +1,19 @@
 from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import jwt
 from app.core.config import settings
+from app.core.executors import BoundedExecutor, password_executor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds pinned to the tuned cost, so any hash made with a different
+# cost is flagged by verify_and_update() and rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,4 +29,31 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded executor so it never blocks the event loop.
+    bcrypt releases the GIL, so the executor's threads hash in parallel;
+    once it is full callers get ExecutorBusy straight away.
+    """
+
+    def __init__(self, executor: BoundedExecutor):
+        self._executor = executor
+
+    async def hash(self, password: str) -> str:
+        return await self._executor.run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._executor.run(pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies the password and, when the stored hash was made with a
+        different cost than BCRYPT_ROUNDS, also returns a replacement hash.
+        """
+        return await self._executor.run(pwd_context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher(password_executor)
@@ -0,0 +1,138 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.parser import PARSER_VERSION, extract_data_from_text, missing_fields
+from app.models import models
+
+# Reported as the extraction method when a result comes from the cache
+METHOD_CACHE = "cache"
+
+@dataclass
+class CachedResult:
+    text: str
+    data: dict
+    method: str = METHOD_CACHE
+    page_timings: dict = field(default_factory=dict)  # nothing was OCR'd
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extraction results, keyed on the file's
+    SHA-256 and shared by all users.
+
+    Entries remember the parser version that produced them. When the parser
+    rules change, a hit is re-parsed from the cached raw text (no OCR); if
+    that no longer yields the required fields the entry is dropped and the
+    file goes through the full pipeline again. Least recently used entries
+    are evicted once the cache exceeds its entry or byte limit.
+
+    Methods only flush; the caller's commit makes the changes durable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reparsed = 0
+        self.evictions = 0
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, db: Session, file_hash: str) -> Optional[CachedResult]:
+        if not settings.EXTRACTION_CACHE_ENABLED:
+            return None
+        entry = db.get(models.ExtractionCacheEntry, file_hash)
+        if entry is None:
+            self._count("misses")
+            return None
+
+        if entry.parser_version != PARSER_VERSION:
+            data = extract_data_from_text(entry.raw_text)
+            if missing_fields(data, settings.TEXT_LAYER_REQUIRED_FIELDS):
+                db.delete(entry)
+                db.flush()
+                self._count("misses")
+                return None
+            entry.extracted_data = data
+            entry.parser_version = PARSER_VERSION
+            self._count("reparsed")
+
+        entry.hits += 1
+        entry.last_used_at = datetime.utcnow()
+        self._count("hits")
+        return CachedResult(text=entry.raw_text, data=dict(entry.extracted_data))
+
+    def put(self, db: Session, file_hash: str, text: str, data: dict, method: Optional[str] = None):
+        if not settings.EXTRACTION_CACHE_ENABLED:
+            return
+        entry = models.ExtractionCacheEntry(
+            file_hash=file_hash,
+            parser_version=PARSER_VERSION,
+            raw_text=text,
+            extracted_data=data,
+            extraction_method=method,
+            size_bytes=len(text.encode("utf-8")),
+            hits=0,
+        )
+        try:
+            # Savepoint, so losing a race with another upload of the same file
+            # does not roll back the caller's own work
+            with db.begin_nested():
+                db.merge(entry)
+        except IntegrityError:
+            return
+        self._evict(db)
+
+    def _evict(self, db: Session):
+        entries, total_bytes = db.query(
+            func.count(models.ExtractionCacheEntry.file_hash),
+            func.coalesce(func.sum(models.ExtractionCacheEntry.size_bytes), 0),
+        ).one()
+        if entries <= settings.EXTRACTION_CACHE_MAX_ENTRIES and total_bytes <= settings.EXTRACTION_CACHE_MAX_BYTES:
+            return
+
+        # Anything still over the byte limit is picked up by the next put()
+        batch = max(entries - settings.EXTRACTION_CACHE_MAX_ENTRIES, 0) + 100
+        oldest = db.query(
+            models.ExtractionCacheEntry.file_hash, models.ExtractionCacheEntry.size_bytes
+        ).order_by(models.ExtractionCacheEntry.last_used_at).limit(batch).all()
+        evicted = []
+        for file_hash, size_bytes in oldest:
+            if entries <= settings.EXTRACTION_CACHE_MAX_ENTRIES and total_bytes <= settings.EXTRACTION_CACHE_MAX_BYTES:
+                break
+            evicted.append(file_hash)
+            entries -= 1
+            total_bytes -= size_bytes
+        db.query(models.ExtractionCacheEntry).filter(
+            models.ExtractionCacheEntry.file_hash.in_(evicted)
+        ).delete(synchronize_session=False)
+        self._count("evictions", len(evicted))
+
+    def stats(self, db: Session) -> dict:
+        entries, total_bytes = db.query(
+            func.count(models.ExtractionCacheEntry.file_hash),
+            func.coalesce(func.sum(models.ExtractionCacheEntry.size_bytes), 0),
+        ).one()
+        lookups = self.hits + self.misses
+        return {
+            "parser_version": PARSER_VERSION,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reparsed": self.reparsed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total_bytes,
+        }
+
+
+extraction_cache = ExtractionCache()
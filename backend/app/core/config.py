@@ -14,10 +14,129 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here-change-in-production-use-openssl-rand-hex-32"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Authenticated users are cached this long between user-table lookups (0 disables)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # bcrypt cost; existing hashes with another cost are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    # Hashes running or queued before further logins/registrations get a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
     
     # Database Settings
     DATABASE_URL: str = "sqlite:///./credit_parser.db"
-    
+    # Async driver URL for AsyncSession; derived from DATABASE_URL when unset
+    # (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool (not used for in-memory SQLite)
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: float = 30
+    # Server databases only: recycle connections before the server drops them
+    # and test each one on checkout
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Extraction Settings
+    # "text_first" reads the embedded text layer and only OCRs pages that need it,
+    # "incremental" does the same page by page and stops once every field is found,
+    # "ocr" always OCRs every page.
+    EXTRACTION_MODE: str = "text_first"
+    # Most pages "incremental" mode reads before giving up on missing fields
+    EARLY_EXIT_MAX_PAGES: int = 3
+    # A page needs at least this many characters of embedded text to skip OCR
+    TEXT_LAYER_MIN_CHARS: int = 50
+    # Fields that must be found in the text layer, otherwise the file is OCR'd
+    TEXT_LAYER_REQUIRED_FIELDS: list = ["issuer", "last_4_digits", "payment_due_date", "total_balance"]
+    # Processes used to OCR the pages of one statement concurrently (1 = single ocrmypdf call)
+    PAGE_JOBS: int = 4
+    # Also read the transaction listing of each statement into the transactions table
+    TRANSACTIONS_ENABLED: bool = True
+
+    # OCR Settings
+    # "fast" only writes the recognised text (no output PDF, optimization or PDF/A)
+    # and downsamples large scans; "accurate" recognises scans at full resolution
+    # and, with PDF_IO_MODE "files", writes a PDF/A and reads its text layer back.
+    OCR_PROFILE: str = "fast"
+    # Per-issuer overrides of OCR_PROFILE, e.g. {"SBI": "accurate"}
+    OCR_ISSUER_PROFILES: dict = {}
+    # Re-OCR with "accurate" when a "fast" pass leaves required fields missing
+    OCR_FALLBACK_TO_ACCURATE: bool = True
+    # Longest image side, in pixels, the "fast" profile hands to tesseract
+    OCR_FAST_MAX_IMAGE_SIDE: int = 2000
+
+    # Page Cache Settings (OCR text of individual pages, keyed on what the page renders)
+    # Reuses the OCR of pages repeated across statements, such as terms and conditions
+    PAGE_CACHE_ENABLED: bool = True
+    # SQLite file on local disk, shared by every worker process of the node
+    PAGE_CACHE_PATH: str = "./page_cache.db"
+    PAGE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
+    # Extraction Cache Settings (results shared across users, keyed on file SHA-256)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MAX_ENTRIES: int = 10000
+    EXTRACTION_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Background Job Settings
+    JOB_QUEUE_ENABLED: bool = True
+    JOB_WORKERS: int = 2
+    JOB_SPOOL_DIR: str = "./job_spool"
+    JOB_POLL_INTERVAL: float = 2.0  # seconds between checks for newly queued jobs
+    # A running job's lease is renewed on every check; a job whose lease ran out
+    # (its process died) is re-queued by any dispatcher
+    JOB_LEASE_SECONDS: float = 60
+
+    # Scratch Settings (working files of uploads and OCR)
+    # Where uploads are spooled and OCR works, ideally on tmpfs (e.g. /dev/shm);
+    # the system temp dir when unset. The app works in its credit-card-parser
+    # subdirectory, each process in a directory of its own removed on shutdown.
+    SCRATCH_DIR: Optional[str] = None
+    # The startup janitor removes the scratch directories of processes that died,
+    # and files in JOB_SPOOL_DIR once this old and not needed by a queued job
+    SCRATCH_ORPHAN_AGE_SECONDS: float = 3600
+    # "buffered" parses text layers from a memory-mapped file and has every OCR
+    # profile output only its text; "files" opens PDFs through file handles and
+    # has the "accurate" profile write a PDF whose text layer is read back
+    PDF_IO_MODE: str = "buffered"
+
+    # Executor Settings (blocking work done on behalf of async endpoints)
+    CPU_WORKERS: int = 2  # processes extracting statements uploaded to /files/upload
+    IO_WORKERS: int = 8  # threads making database calls for async endpoints
+    EXPORT_WORKERS: int = 4  # threads building export documents, i.e. concurrent exports
+    # Calls running or queued on one executor before further requests get a 503
+    EXECUTOR_MAX_PENDING: int = 64
+
+    # Admission Control Settings
+    # Where quotas and slots are kept: "memory" (this process only), "database"
+    # (shared through DATABASE_URL by every node using it) or "package.module:Class"
+    # for another AdmissionBackend
+    ADMISSION_BACKEND: str = "memory"
+    # OCR processes run at once by uploads and background jobs together. Every
+    # statement being extracted takes PAGE_JOBS of them (at least one statement
+    # runs); waiting files are served round-robin across users
+    OCR_SLOTS: int = 8
+    # Statements one user has extracted at once
+    OCR_SLOTS_PER_USER: int = 2
+    # Per-user token buckets on submitted files and pages (a rate of 0 disables one);
+    # the burst is the most a user can submit at once
+    USER_FILES_PER_MINUTE: float = 30
+    USER_FILES_BURST: int = 50
+    USER_PAGES_PER_MINUTE: float = 600
+    USER_PAGES_BURST: int = 1000
+    # "database" backend: a node's slots are freed this long after it crashed,
+    # and waiting files check this often for slots freed by other nodes
+    ADMISSION_LEASE_SECONDS: float = 600
+    ADMISSION_POLL_INTERVAL: float = 0.5
+
+    # Observability Settings
+    METRICS_ENABLED: bool = True  # serves /metrics in the Prometheus text format
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+
     # CORS Settings
     BACKEND_CORS_ORIGINS: list = [
         "http://localhost:5173",
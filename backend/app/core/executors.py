@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Iterator, Optional
+
+from app.core.config import settings
+
+class ExecutorBusy(Exception):
+    """Raised when too many calls are already running or queued on an executor."""
+
+
+class BoundedExecutor:
+    """
+    Runs one kind of blocking work off the event loop, on a pool of its own
+    so a burst of one kind cannot starve the others. At most `workers` calls
+    run at once and at most `max_pending` may be running or queued; beyond
+    that callers get ExecutorBusy straight away instead of piling up.
+
+    With `processes` set the pool is a spawn-based process pool, for CPU-bound
+    work that would otherwise hold the GIL; the pool is started on first use.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int, processes: bool = False):
+        self.name = name
+        self.workers = workers
+        self.processes = processes
+        self._max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            return self._executor
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise ExecutorBusy(self.name)
+            self._pending += 1
+        try:
+            executor = self._get_executor()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                # A crashed worker breaks the whole pool; start a new one for the next call
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False)
+                raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_DONE = object()
+
+async def iterate_in(executor: BoundedExecutor, iterator: Iterator) -> AsyncIterator:
+    """
+    Drives a blocking iterator (e.g. a document being built from a database
+    cursor) on `executor`, one item per call, and closes it on the same
+    executor if the consumer stops early.
+    """
+    iterator = iter(iterator)
+    try:
+        while True:
+            item = await executor.run(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                await executor.run(close)
+            except ExecutorBusy:
+                close()
+
+
+# Statement extraction: pdfplumber, ocrmypdf and parsing
+cpu_executor = BoundedExecutor("cpu", settings.CPU_WORKERS, settings.EXECUTOR_MAX_PENDING, processes=True)
+# Synchronous database calls made from async endpoints
+io_executor = BoundedExecutor("io", settings.IO_WORKERS, settings.EXECUTOR_MAX_PENDING)
+# Building export documents (xlsxwriter, FPDF, python-docx) while reading the rows
+export_executor = BoundedExecutor("export", settings.EXPORT_WORKERS, settings.EXECUTOR_MAX_PENDING)
+# bcrypt for logins and registrations
+password_executor = BoundedExecutor("bcrypt", settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+def shutdown_executors():
+    for executor in (cpu_executor, io_executor, export_executor, password_executor):
+        executor.shutdown()
@@ -0,0 +1,281 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import StageTimer
+from app.core.ocr import PROFILE_ACCURATE, PROFILE_FAST, profile_for_issuer
+from app.core.pages import extract_pages, ocr_with_page_cache, process_page
+from app.core.pdfio import open_pdf, read_pages
+from app.core.parser import IncrementalParser, detect_issuer, extract_data_from_text, missing_fields
+from app.core.transactions import TransactionColumns, parse_text, read_transactions
+
+# Which path a file took through the pipeline
+METHOD_TEXT = "text"    # every page had a usable text layer
+METHOD_MIXED = "mixed"  # only some pages had to be OCR'd
+METHOD_OCR = "ocr"      # every page was OCR'd
+
+@dataclass
+class ExtractionResult:
+    text: str
+    data: dict
+    method: str
+    page_count: int = 0
+    ocr_pages: List[int] = field(default_factory=list)
+    ocr_cached_pages: List[int] = field(default_factory=list)  # OCR'd pages whose text came from the page cache
+    page_timings: Dict[int, float] = field(default_factory=dict)  # seconds per OCR'd page
+    pages_read: int = 0  # pages actually extracted; less than page_count after an early exit
+    stage_timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage: pdf_text, ocr, ocr_fallback, parse
+    ocr_profile: Optional[str] = None  # profile of the OCR text the data came from; None without OCR
+    transactions: Optional[TransactionColumns] = None  # only filled in by extract_statement
+
+
+def _join_pages(page_texts: List[str]) -> str:
+    text = ""
+    for page_text in page_texts:
+        if page_text:
+            text += page_text + "\n"
+    return text
+
+def _has_text_layer(page_text: str) -> bool:
+    return len(page_text.strip()) >= settings.TEXT_LAYER_MIN_CHARS
+
+def _ocr_pages(
+    pdf_path: str,
+    page_numbers: Optional[List[int]] = None,
+    timings: Optional[Dict[int, float]] = None,
+    profile: str = PROFILE_ACCURATE,
+    cached: Optional[Set[int]] = None,
+) -> Dict[int, str]:
+    """
+    Runs OCR with the given profile on the given 1-based page numbers (every
+    page when None) and returns the recognised text keyed by page number.
+    Pages already in the page cache are not OCR'd again; their numbers are
+    kept in `cached` when given. With PAGE_JOBS > 1 the pages are split out
+    and OCR'd concurrently; per-page timings are recorded into `timings`
+    when given.
+    """
+    if settings.PAGE_JOBS > 1:
+        results = extract_pages(pdf_path, page_numbers, ocr=True, jobs=settings.PAGE_JOBS, profile=profile)
+        if timings is not None:
+            timings.update({r.number: r.seconds for r in results})
+        if cached is not None:
+            cached.difference_update(r.number for r in results)
+            cached.update(r.number for r in results if r.cached)
+        return {r.number: r.text for r in results}
+    return ocr_with_page_cache(pdf_path, page_numbers, profile, cached)
+
+def _profile_for_text(text: str) -> str:
+    """The OCR profile of the issuer named in the text read so far, or the default one."""
+    issuer = detect_issuer(text) if text else None
+    return profile_for_issuer(issuer.name if issuer else None)
+
+def _needs_accurate(data: dict, profile: str) -> bool:
+    """
+    Whether a fast OCR pass has to be redone with the accurate profile: some
+    required fields are missing, or the detected issuer is configured for it.
+    """
+    if profile != PROFILE_FAST or not settings.OCR_FALLBACK_TO_ACCURATE:
+        return False
+    if missing_fields(data, settings.TEXT_LAYER_REQUIRED_FIELDS):
+        return True
+    return profile_for_issuer(data.get("issuer")) == PROFILE_ACCURATE
+
+def _method_for(ocr_pages: List[int], page_count: int) -> str:
+    if not ocr_pages:
+        return METHOD_TEXT
+    if len(ocr_pages) >= page_count:
+        return METHOD_OCR
+    return METHOD_MIXED
+
+
+def extract_with_ocr(pdf_path: str, stages: Optional[StageTimer] = None, profile: Optional[str] = None) -> ExtractionResult:
+    """
+    OCRs every page and parses the result. This is the original pipeline.
+    Uses the default OCR_PROFILE unless `profile` is given, falling back to
+    the accurate profile when the fast one was not good enough.
+    """
+    stages = stages or StageTimer()
+    profile = profile or profile_for_issuer(None)
+    timings, cached = {}, set()
+    with stages.stage("ocr"):
+        page_texts = _ocr_pages(pdf_path, timings=timings, profile=profile, cached=cached)
+    text = _join_pages([page_texts[n] for n in sorted(page_texts)])
+    with stages.stage("parse"):
+        data = extract_data_from_text(text)
+
+    if _needs_accurate(data, profile):
+        profile = PROFILE_ACCURATE
+        with stages.stage("ocr_fallback"):
+            page_texts = _ocr_pages(pdf_path, timings=timings, profile=profile, cached=cached)
+        text = _join_pages([page_texts[n] for n in sorted(page_texts)])
+        with stages.stage("parse"):
+            data = extract_data_from_text(text)
+
+    return ExtractionResult(
+        text=text, data=data, method=METHOD_OCR,
+        page_count=len(page_texts), ocr_pages=sorted(page_texts), ocr_cached_pages=sorted(cached), page_timings=timings,
+        pages_read=len(page_texts), stage_timings=stages.timings, ocr_profile=profile,
+    )
+
+def extract_text_first(pdf_path: str, stages: Optional[StageTimer] = None) -> ExtractionResult:
+    """
+    Reads the embedded text layer first and only OCRs the pages that fail the
+    quality check. If the parsed result is still missing required fields, the
+    remaining text-layer pages are OCR'd as well before giving up.
+    """
+    stages = stages or StageTimer()
+    with stages.stage("pdf_text"):
+        page_texts = read_pages(pdf_path)
+    page_count = len(page_texts)
+    ocr_pages = [n for n, page_text in enumerate(page_texts, start=1) if not _has_text_layer(page_text)]
+
+    # Scanned pages may still carry a few words, such as the issuer's name
+    profile = _profile_for_text(_join_pages(page_texts))
+    if len(ocr_pages) == page_count:
+        return extract_with_ocr(pdf_path, stages, profile)
+    timings, cached = {}, set()
+    if ocr_pages:
+        with stages.stage("ocr"):
+            for n, page_text in _ocr_pages(pdf_path, ocr_pages, timings, profile, cached).items():
+                page_texts[n - 1] = page_text
+
+    text = _join_pages(page_texts)
+    with stages.stage("parse"):
+        data = extract_data_from_text(text)
+
+    if missing_fields(data, settings.TEXT_LAYER_REQUIRED_FIELDS):
+        # The text layer may be present but unusable (e.g. broken font encodings)
+        remaining = [n for n in range(1, page_count + 1) if n not in ocr_pages]
+        with stages.stage("ocr"):
+            for n, page_text in _ocr_pages(pdf_path, remaining, timings, profile, cached).items():
+                page_texts[n - 1] = page_text
+        ocr_pages = sorted(ocr_pages + remaining)
+        text = _join_pages(page_texts)
+        with stages.stage("parse"):
+            data = extract_data_from_text(text)
+
+    if ocr_pages and _needs_accurate(data, profile):
+        profile = PROFILE_ACCURATE
+        with stages.stage("ocr_fallback"):
+            for n, page_text in _ocr_pages(pdf_path, ocr_pages, timings, profile, cached).items():
+                page_texts[n - 1] = page_text
+        text = _join_pages(page_texts)
+        with stages.stage("parse"):
+            data = extract_data_from_text(text)
+
+    return ExtractionResult(
+        text=text, data=data, method=_method_for(ocr_pages, page_count),
+        page_count=page_count, ocr_pages=ocr_pages, ocr_cached_pages=sorted(cached), page_timings=timings,
+        pages_read=page_count, stage_timings=stages.timings,
+        ocr_profile=profile if ocr_pages else None,
+    )
+
+def extract_incremental(pdf_path: str, max_pages: Optional[int] = None, stages: Optional[StageTimer] = None) -> ExtractionResult:
+    """
+    Extracts pages one at a time and feeds them to an IncrementalParser,
+    stopping as soon as every field of TEXT_LAYER_REQUIRED_FIELDS has been
+    found or `max_pages` pages have been read. Pages without a usable text layer are OCR'd individually.
+    """
+    max_pages = max_pages or settings.EARLY_EXIT_MAX_PAGES
+    stages = stages or StageTimer()
+    parser = IncrementalParser(settings.TEXT_LAYER_REQUIRED_FIELDS)
+    page_texts = []
+    ocr_pages = []
+    timings, cached = {}, set()
+    profile = None  # fast if any page was OCR'd with it, so the fallback can redo them
+
+    with open_pdf(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        for n in range(1, min(page_count, max_pages) + 1):
+            with stages.stage("pdf_text"):
+                page = pdf.pages[n - 1]
+                page_text = page.extract_text() or ""
+                page.close()
+            if not _has_text_layer(page_text):
+                page_profile = _profile_for_text(_join_pages(page_texts + [page_text]))
+                if profile != PROFILE_FAST:
+                    profile = page_profile
+                with stages.stage("ocr"):
+                    ocr_result = process_page(pdf_path, n, ocr=True, profile=page_profile)
+                page_text = ocr_result.text
+                timings[n] = ocr_result.seconds
+                if ocr_result.cached:
+                    cached.add(n)
+                ocr_pages.append(n)
+            page_texts.append(page_text)
+            with stages.stage("parse"):
+                parser.feed(page_text)
+            if parser.complete:
+                break
+
+    pages_read = len(page_texts)
+    if missing_fields(parser.result(), settings.TEXT_LAYER_REQUIRED_FIELDS):
+        # Same fallback as text_first, limited to the pages already read
+        remaining = [n for n in range(1, pages_read + 1) if n not in ocr_pages]
+        if remaining:
+            profile = profile or _profile_for_text(_join_pages(page_texts))
+            with stages.stage("ocr"):
+                for n, page_text in _ocr_pages(pdf_path, remaining, timings, profile, cached).items():
+                    page_texts[n - 1] = page_text
+            ocr_pages = sorted(ocr_pages + remaining)
+            parser = IncrementalParser()
+            with stages.stage("parse"):
+                for page_text in page_texts:
+                    parser.feed(page_text)
+
+    if ocr_pages and _needs_accurate(parser.result(), profile):
+        profile = PROFILE_ACCURATE
+        with stages.stage("ocr_fallback"):
+            for n, page_text in _ocr_pages(pdf_path, ocr_pages, timings, profile, cached).items():
+                page_texts[n - 1] = page_text
+        parser = IncrementalParser()
+        with stages.stage("parse"):
+            for page_text in page_texts:
+                parser.feed(page_text)
+
+    return ExtractionResult(
+        text=_join_pages(page_texts), data=parser.result(),
+        method=_method_for(ocr_pages, pages_read),
+        page_count=page_count, ocr_pages=ocr_pages, ocr_cached_pages=sorted(cached), page_timings=timings,
+        pages_read=pages_read, stage_timings=stages.timings, ocr_profile=profile,
+    )
+
+def statement_transactions(
+    pdf_path: str,
+    data: dict,
+    text: str = "",
+    stages: Optional[StageTimer] = None,
+    text_is_complete: bool = False,
+) -> Optional[TransactionColumns]:
+    """
+    Reads the statement's transaction listing when TRANSACTIONS_ENABLED.
+    When `text` already holds every page, its lines are parsed directly
+    instead of reading the pages again. Also called for results taken from
+    the extraction cache, which only hold the summary fields.
+    """
+    if not settings.TRANSACTIONS_ENABLED:
+        return None
+    stages = stages or StageTimer()
+    with stages.stage("transactions"):
+        if text_is_complete:
+            return parse_text(text, data.get("issuer"))
+        return read_transactions(pdf_path, data.get("issuer"), text)
+
+def _extract_fields(pdf_path: str, stages: StageTimer) -> ExtractionResult:
+    if settings.EXTRACTION_MODE == "ocr":
+        return extract_with_ocr(pdf_path, stages)
+    if settings.EXTRACTION_MODE == "incremental":
+        return extract_incremental(pdf_path, stages=stages)
+    return extract_text_first(pdf_path, stages)
+
+def extract_statement(pdf_path: str, stages: Optional[StageTimer] = None) -> ExtractionResult:
+    """
+    Extracts and parses a statement using the configured EXTRACTION_MODE,
+    then reads its transactions. Stage timings are added to `stages` when
+    given.
+    """
+    stages = stages or StageTimer()
+    result = _extract_fields(pdf_path, stages)
+    text_is_complete = result.pages_read == result.page_count
+    result.transactions = statement_transactions(pdf_path, result.data, result.text, stages, text_is_complete)
+    return result
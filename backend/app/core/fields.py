@@ -0,0 +1,40 @@
+import re
+from datetime import date, datetime
+from typing import Optional
+
+# Statement dates are printed day first, e.g. 05/10/2025 or 05-10-2025
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y")
+_AMOUNT = re.compile(r'^(\d+)(?:\.(\d{1,2}))?$')
+
+def parse_statement_date(value: Optional[str]) -> Optional[date]:
+    if not value or value == "N/A":
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def parse_amount_paise(value: Optional[str]) -> Optional[int]:
+    """Converts an amount such as "1,23,456.78" to integer paise (12345678)."""
+    if not value or value == "N/A":
+        return None
+    match = _AMOUNT.match(value.replace(",", "").strip())
+    if not match:
+        return None
+    rupees, paise = match.groups()
+    return int(rupees) * 100 + int((paise or "0").ljust(2, "0"))
+
+def _text_or_none(value: Optional[str]) -> Optional[str]:
+    return None if value in (None, "", "N/A") else value
+
+def typed_columns(data: dict) -> dict:
+    """Maps parsed statement fields to the typed FileUpload columns."""
+    return {
+        "last_4_digits": _text_or_none(data.get("last_4_digits")),
+        "card_variant": _text_or_none(data.get("card_variant")),
+        "statement_date": parse_statement_date(data.get("billing_cycle")),
+        "payment_due_date": parse_statement_date(data.get("payment_due_date")),
+        "total_balance_paise": parse_amount_paise(data.get("total_balance")),
+    }
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.core.metrics import StageTimer
+
+# Bytes read from an upload at a time
+CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload turns out to be bigger than the allowed size while streaming it."""
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    file_hash: str  # SHA-256 hex digest of the content
+    size: int
+
+    def discard(self):
+        if os.path.exists(self.path): os.remove(self.path)
+
+
+async def spool_upload(file: UploadFile, max_size: int, directory: Optional[str] = None, stages: Optional[StageTimer] = None) -> SpooledUpload:
+    """
+    Streams an upload to a temporary file in `directory`, hashing it in the
+    same pass. At most one chunk is held in memory at a time, and the size
+    limit is enforced on the bytes actually read, since `file.size` is not
+    always known. The partial file is removed if anything goes wrong.
+    Time spent reading, hashing and writing is added to `stages` when given.
+    """
+    stages = stages or StageTimer()
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                with stages.stage("upload_read"):
+                    chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(file.filename)
+                with stages.stage("sha256"):
+                    digest.update(chunk)
+                with stages.stage("temp_write"):
+                    out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path=path, file_hash=digest.hexdigest(), size=size)
@@ -0,0 +1,314 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set
+from uuid import uuid4
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.admission import OCR_POOL, admission_backend, fair_order, statement_slots
+from app.core.cache import extraction_cache
+from app.core.config import settings
+from app.core.extraction import extract_statement, statement_transactions
+from app.core.ingest import SpooledUpload
+from app.core.metrics import ERRORS, FILES_PROCESSED, StageTimer, observe_ocr_pages
+from app.core.persistence import HASH_LOOKUP_CHUNK, ParsedUpload, _new_upload
+from app.core.transactions import insert_transactions
+from app.db.session import SessionLocal
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+# Oldest queued jobs considered for each dispatch, interleaved by user
+DISPATCH_WINDOW = 500
+
+def run_extraction(pdf_path: str) -> dict:
+    """Entry point executed inside a worker process."""
+    result = extract_statement(pdf_path)
+    return {
+        "data": result.data, "method": result.method, "text": result.text,
+        "pages": result.pages_read or result.page_count, "stages": result.stage_timings,
+        "ocr_profile": result.ocr_profile, "transactions": result.transactions,
+        "ocr_pages": len(result.ocr_pages), "ocr_cached_pages": len(result.ocr_cached_pages),
+    }
+
+def run_cached(pdf_path: str, data: dict, text: str, method: str) -> dict:
+    """Entry point for a file already in the extraction cache: only its transactions are read."""
+    return {"data": data, "method": method, "transactions": statement_transactions(pdf_path, data, text)}
+
+def enqueue_job(db: Session, user: models.User, filename: str, spooled: SpooledUpload) -> models.ParseJob:
+    """
+    Moves an upload already streamed into JOB_SPOOL_DIR to its job's path and
+    records a queued job for it.
+    """
+    job_id = uuid4().hex
+    spool_path = os.path.join(settings.JOB_SPOOL_DIR, f"{job_id}.pdf")
+    os.replace(spooled.path, spool_path)
+
+    job = models.ParseJob(
+        id=job_id, filename=filename, file_hash=spooled.file_hash,
+        spool_path=spool_path, user_id=user.id,
+    )
+    db.add(job)
+    return job
+
+def pending_job_hashes(db: Session, user_id: int, hashes: Iterable[str]) -> Set[str]:
+    """Returns the hashes among `hashes` the user already has a queued or running job for."""
+    hashes = list(set(hashes))
+    found = set()
+    for i in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+        chunk = hashes[i:i + HASH_LOOKUP_CHUNK]
+        found.update(h for (h,) in db.query(models.ParseJob.file_hash).filter(
+            models.ParseJob.user_id == user_id,
+            models.ParseJob.file_hash.in_(chunk),
+            models.ParseJob.status.in_([models.JobStatus.QUEUED, models.JobStatus.RUNNING]),
+        ))
+    return found
+
+
+class JobQueue:
+    """
+    Dispatches queued ParseJobs to a pool of worker processes.
+
+    Job state lives in the database: a single dispatcher thread claims queued
+    jobs (never more than there are workers, so a worker holds at most one
+    job), hands them to the pool and writes the outcome back. Several
+    dispatchers (workers or nodes) can share the database: each claimed job
+    carries its dispatcher's id and a lease it renews while the job runs,
+    and jobs whose lease ran out because their process died are re-queued.
+
+    Each running job holds an OCR slot, renewed along with the job's lease,
+    and queued jobs are claimed round-robin across users, so one user's
+    large batch does not hold up everyone else's files.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.owner = uuid4().hex
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, tuple] = {}  # job id -> (future, user id, OCR slot lease, pool)
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._requeue_stale()
+        self._executor = self._new_executor()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-dispatcher", daemon=True)
+        self._thread.start()
+        self.wake()
+
+    def stop(self):
+        self._stopping.set()
+        self.wake()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            # Unfinished jobs stay RUNNING and are re-queued once their lease runs out
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        for _, _, lease, _ in self._in_flight.values():
+            admission_backend.release_slot(OCR_POOL, lease)
+        self._in_flight.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # "spawn" keeps the workers from inheriting the server's threads and sockets
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        # Every job still on the broken pool fails with BrokenProcessPool; only the first replaces it
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wake.wait(settings.JOB_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self._collect()
+                self._renew_leases()
+                self._requeue_stale()
+                self._dispatch()
+            except Exception:
+                logger.exception("Job dispatcher error")
+                ERRORS.inc(stage="job_dispatch")
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+    def _renew_leases(self):
+        if not self._in_flight:
+            return
+        admission_backend.renew_slots(OCR_POOL, [lease for _, _, lease, _ in self._in_flight.values()])
+        db = SessionLocal()
+        try:
+            db.query(models.ParseJob).filter(
+                models.ParseJob.id.in_(list(self._in_flight)),
+                models.ParseJob.owner == self.owner,
+            ).update({models.ParseJob.lease_expires_at: self._lease_expiry()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue_stale(self):
+        """Re-queues RUNNING jobs whose dispatcher stopped renewing their lease."""
+        db = SessionLocal()
+        try:
+            db.query(models.ParseJob).filter(
+                models.ParseJob.status == models.JobStatus.RUNNING,
+                models.ParseJob.lease_expires_at.is_(None) | (models.ParseJob.lease_expires_at < datetime.utcnow()),
+            ).update({
+                models.ParseJob.status: models.JobStatus.QUEUED,
+                models.ParseJob.owner: None,
+                models.ParseJob.lease_expires_at: None,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _dispatch(self):
+        free = self.workers - len(self._in_flight)
+        if free <= 0:
+            return
+        running: Dict[int, int] = {}
+        for _, user_id, _, _ in self._in_flight.values():
+            running[user_id] = running.get(user_id, 0) + 1
+        db = SessionLocal()
+        try:
+            queued = (
+                db.query(models.ParseJob.id, models.ParseJob.user_id, models.ParseJob.file_hash, models.ParseJob.spool_path)
+                .filter(models.ParseJob.status == models.JobStatus.QUEUED)
+                .order_by(models.ParseJob.created_at)
+                .limit(DISPATCH_WINDOW)
+                .all()
+            )
+            for job_id, user_id, file_hash, spool_path in fair_order(queued, running):
+                if free <= 0:
+                    break
+                if running.get(user_id, 0) >= settings.OCR_SLOTS_PER_USER:
+                    continue
+                # Shared with /files/upload, so both together stay within OCR_SLOTS
+                lease = admission_backend.acquire_slot(OCR_POOL, statement_slots())
+                if lease is None:
+                    break
+                # Conditional update so a job is only ever claimed once
+                claimed = db.query(models.ParseJob).filter(
+                    models.ParseJob.id == job_id,
+                    models.ParseJob.status == models.JobStatus.QUEUED,
+                ).update({
+                    models.ParseJob.status: models.JobStatus.RUNNING,
+                    models.ParseJob.started_at: datetime.utcnow(),
+                    models.ParseJob.attempts: models.ParseJob.attempts + 1,
+                    models.ParseJob.owner: self.owner,
+                    models.ParseJob.lease_expires_at: self._lease_expiry(),
+                }, synchronize_session=False)
+                db.commit()
+                if not claimed:
+                    admission_backend.release_slot(OCR_POOL, lease)
+                    continue
+                try:
+                    cached = extraction_cache.get(db, file_hash)
+                    db.commit()
+                except Exception:
+                    # The job is claimed and holds a slot, so fall back to a full parse
+                    logger.exception("Could not read the extraction cache", extra={"fields": {"job_id": job_id}})
+                    ERRORS.inc(stage="extraction_cache")
+                    db.rollback()
+                    cached = None
+                if cached is not None:
+                    future = self._executor.submit(run_cached, spool_path, cached.data, cached.text, cached.method)
+                else:
+                    future = self._executor.submit(run_extraction, spool_path)
+                future.add_done_callback(lambda _: self.wake())
+                self._in_flight[job_id] = (future, user_id, lease, self._executor)
+                running[user_id] = running.get(user_id, 0) + 1
+                free -= 1
+        finally:
+            db.close()
+
+    def _collect(self):
+        for job_id, (future, _, lease, pool) in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            del self._in_flight[job_id]
+            admission_backend.release_slot(OCR_POOL, lease)
+            try:
+                outcome = future.result()
+                error = None
+            except BrokenProcessPool:
+                self._replace_executor(pool)
+                outcome, error = None, "Worker process crashed while parsing the file."
+            except Exception:
+                logger.exception("Could not process job %s", job_id, extra={"fields": {"job_id": job_id}})
+                ERRORS.inc(stage="extraction")
+                outcome, error = None, "An unexpected error occurred during file processing."
+            self._finish(job_id, outcome, error)
+
+    def _finish(self, job_id: str, outcome: Optional[dict], error: Optional[str]):
+        db = SessionLocal()
+        try:
+            job = db.query(models.ParseJob).filter(models.ParseJob.id == job_id).first()
+            if job is None:
+                return
+            if job.owner != self.owner or job.status != models.JobStatus.RUNNING:
+                # The lease ran out and another dispatcher took the job over
+                logger.warning("Dropping the outcome of a job no longer held", extra={"fields": {"job_id": job_id}})
+                return
+            if outcome is not None:
+                data = outcome["data"]
+                upload = _new_upload(job.user_id, ParsedUpload(job.filename, job.file_hash, data))
+                db.add(upload)
+                try:
+                    db.flush()
+                except IntegrityError:
+                    # Only the upload's unique (user, file hash) constraint means a duplicate
+                    db.rollback()
+                    job = db.query(models.ParseJob).filter(models.ParseJob.id == job_id).first()
+                    job.status = models.JobStatus.FAILED
+                    job.error = "This file has already been uploaded."
+                else:
+                    insert_transactions(db, [(upload, outcome.get("transactions"))])
+                    if "text" in outcome:
+                        # Handles losing a race with another upload of the file itself
+                        extraction_cache.put(db, job.file_hash, outcome["text"], data, outcome["method"])
+                    job.upload_id = upload.id
+                    job.extraction_method = outcome["method"]
+                    job.status = models.JobStatus.DONE
+            else:
+                job.status = models.JobStatus.FAILED
+                job.error = error
+            job.finished_at = datetime.utcnow()
+            job.lease_expires_at = None
+            db.commit()
+            if os.path.exists(job.spool_path): os.remove(job.spool_path)
+            self._record(job, outcome)
+        finally:
+            db.close()
+
+    def _record(self, job: models.ParseJob, outcome: Optional[dict]):
+        stages = StageTimer()
+        stages.update((outcome or {}).get("stages", {}))
+        issuer = outcome["data"].get("issuer") if outcome else None
+        stages.observe(issuer, (outcome or {}).get("pages"))
+        observe_ocr_pages((outcome or {}).get("ocr_pages", 0), (outcome or {}).get("ocr_cached_pages", 0))
+        outcome_label = "saved" if job.status == models.JobStatus.DONE else "failed"
+        FILES_PROCESSED.inc(issuer=issuer or "unknown", method=job.extraction_method or "none", outcome=outcome_label)
+        logger.info("Processed job", extra={"fields": {
+            "job_id": job.id, "user_id": job.user_id, "filename": job.filename, "file_hash": job.file_hash,
+            "outcome": outcome_label, "issuer": issuer, "method": job.extraction_method,
+            "pages": (outcome or {}).get("pages"), "ocr_profile": (outcome or {}).get("ocr_profile"),
+            "ocr_pages": (outcome or {}).get("ocr_pages"), "ocr_cached_pages": (outcome or {}).get("ocr_cached_pages"),
+            "error": job.error, "stages": stages.rounded(),
+        }})
+
+
+job_queue = JobQueue(workers=settings.JOB_WORKERS)
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from fast DB queries up to multi-page OCR
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{labels} {count}"
+            total = series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {total}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {total}"
+
+
+STAGE_SECONDS = Histogram(
+    "ccp_stage_seconds", "Time spent in each processing stage.", ("stage", "issuer", "pages"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "ccp_http_request_seconds", "HTTP request latency, until the last body byte is sent.", ("method", "route", "status"),
+)
+FILES_PROCESSED = Counter(
+    "ccp_files_processed", "Uploaded files by issuer, extraction method and outcome.", ("issuer", "method", "outcome"),
+)
+ERRORS = Counter(
+    "ccp_errors", "Errors by the stage they happened in.", ("stage",),
+)
+ADMISSION_REJECTED = Counter(
+    "ccp_admission_rejected", "Submissions rejected by the quota they exceeded, with a 429 or, over its burst, a 413.", ("quota",),
+)
+OCR_PAGES = Counter(
+    "ccp_ocr_pages", "Pages that needed OCR, by whether their text was recognised or taken from the page cache.", ("source",),
+)
+REGISTRY = [STAGE_SECONDS, HTTP_REQUEST_SECONDS, FILES_PROCESSED, ERRORS, ADMISSION_REJECTED, OCR_PAGES]
+
+def observe_ocr_pages(ocr_pages: int, cached_pages: int):
+    """Counts a file's OCR'd pages; the page cache hit rate is cache / (ocr + cache)."""
+    if cached_pages:
+        OCR_PAGES.inc(cached_pages, source="cache")
+    if ocr_pages > cached_pages:
+        OCR_PAGES.inc(ocr_pages - cached_pages, source="ocr")
+
+def render_metrics() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def page_bucket(pages: Optional[int]) -> str:
+    """Groups page counts so the `pages` label stays low-cardinality."""
+    if not pages:
+        return "unknown"
+    if pages <= 2:
+        return str(pages)
+    if pages <= 5:
+        return "3-5"
+    if pages <= 10:
+        return "6-10"
+    return "11+"
+
+@contextmanager
+def stage(name: str, issuer: str = "all", pages: Optional[int] = None):
+    """Times the enclosed block as one observation of the `name` stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=name, issuer=issuer, pages=page_bucket(pages))
+
+def timed_iter(name: str, chunks: Iterator, **labels) -> Iterator:
+    """
+    Passes `chunks` through and records the time spent producing them, but
+    not the time the consumer spends between chunks (e.g. a slow client).
+    """
+    elapsed = 0.0
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - started
+        yield chunk
+    STAGE_SECONDS.observe(elapsed, stage=name, issuer=labels.get("issuer", "all"), pages=page_bucket(labels.get("pages")))
+
+
+class StageTimer:
+    """
+    Collects the stage timings of one file. The issuer and page count are
+    only known once the file has been parsed, so the timings are kept here
+    and recorded in the histogram together by observe().
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def update(self, timings: Dict[str, float]):
+        for name, seconds in timings.items():
+            self.add(name, seconds)
+
+    def observe(self, issuer: Optional[str] = None, pages: Optional[int] = None):
+        for name, seconds in self.timings.items():
+            STAGE_SECONDS.observe(seconds, stage=name, issuer=issuer or "unknown", pages=page_bucket(pages))
+
+    def rounded(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.timings.items()}
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording every request in HTTP_REQUEST_SECONDS. Routes
+    are labelled by their path template (e.g. /jobs/{job_id}) so the label
+    set stays bounded; streamed responses are timed until the last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+        recorded = False
+
+        def record():
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"],
+                route=getattr(route, "path", "unmatched"), status=status["code"],
+            )
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not recorded:
+                recorded = True
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record()
@@ -0,0 +1,83 @@
+import io
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional
+
+import ocrmypdf
+
+from app.core.config import settings
+from app.core.pdfio import buffered, read_pages
+
+# OCR profiles, trading accuracy for speed
+PROFILE_FAST = "fast"          # sidecar text only: no output PDF, no optimization or PDF/A
+PROFILE_ACCURATE = "accurate"  # full resolution; writes a PDF/A and reads its text layer back in "files" PDF_IO_MODE
+PROFILES = (PROFILE_FAST, PROFILE_ACCURATE)
+
+# ocrmypdf writes this in place of the text of pages it did not OCR; a run of
+# consecutive skipped pages shares one entry ("[OCR skipped on page(s) 2-4]")
+_SKIPPED = re.compile(r"^\[OCR skipped on page\(s\) (\d+)(?:-(\d+))?\]$")
+
+def profile_for_issuer(issuer: Optional[str]) -> str:
+    """The profile configured for `issuer`, or the default OCR_PROFILE."""
+    return settings.OCR_ISSUER_PROFILES.get(issuer or "", settings.OCR_PROFILE)
+
+def profile_options(profile: str, jobs: Optional[int] = None) -> dict:
+    """The ocrmypdf keyword arguments of a profile."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown OCR profile: {profile}")
+    options = {"force_ocr": True, "progress_bar": False}
+    if jobs:
+        options["jobs"] = jobs
+    if sidecar_only(profile):
+        options.update({"output_type": "none", "optimize": 0})
+    if profile == PROFILE_FAST:
+        options.update({
+            # Match the page pool instead of claiming every core
+            "jobs": jobs or settings.PAGE_JOBS,
+            # Large scans are shrunk before tesseract sees them instead of
+            # being recognised at their full resolution
+            "tesseract_downsample_large_images": True,
+            "tesseract_downsample_above": settings.OCR_FAST_MAX_IMAGE_SIDE,
+        })
+    return options
+
+def sidecar_only(profile: str) -> bool:
+    """Whether OCR with `profile` outputs only the recognised text, without writing a PDF."""
+    return profile == PROFILE_FAST or buffered()
+
+def parse_sidecar(sidecar: str, first_page: int = 1) -> Dict[int, str]:
+    """Splits an ocrmypdf sidecar into the text of each OCR'd page, keyed by page number."""
+    page_texts = {}
+    number = first_page
+    for chunk in sidecar.split("\f"):
+        skipped = _SKIPPED.match(chunk.strip())
+        if skipped:
+            first, last = int(skipped.group(1)), int(skipped.group(2) or skipped.group(1))
+            number += last - first + 1
+            continue
+        page_texts[number] = chunk
+        number += 1
+    return page_texts
+
+def run_ocr(pdf_path: str, page_numbers: Optional[List[int]] = None, profile: str = PROFILE_ACCURATE, jobs: Optional[int] = None) -> Dict[int, str]:
+    """
+    OCRs the given 1-based page numbers (every page when None) with one
+    ocrmypdf call and returns the recognised text keyed by page number.
+    """
+    options = profile_options(profile, jobs)
+    if page_numbers:
+        options["pages"] = ",".join(str(n) for n in page_numbers)
+
+    if sidecar_only(profile):
+        sidecar = io.BytesIO()
+        ocrmypdf.ocr(pdf_path, os.devnull, sidecar=sidecar, **options)
+        page_texts = parse_sidecar(sidecar.getvalue().decode("utf-8"))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            ocr_output_path = os.path.join(work_dir, "ocr.pdf")
+            ocrmypdf.ocr(pdf_path, ocr_output_path, **options)
+            page_texts = dict(enumerate(read_pages(ocr_output_path), start=1))
+
+    wanted = page_numbers or sorted(page_texts)
+    return {n: page_texts[n] for n in wanted if n in page_texts}
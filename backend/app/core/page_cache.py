@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pikepdf
+
+from app.core.config import settings
+from app.core.ocr import PROFILE_FAST, sidecar_only
+
+logger = logging.getLogger(__name__)
+
+# Bump when the fingerprint changes, so entries made by the old one stop matching
+FINGERPRINT_VERSION = "1"
+# Page attributes that affect how it renders; the others (e.g. /Parent, /Annots) do not
+_PAGE_KEYS = ("/Contents", "/Resources", "/MediaBox", "/CropBox", "/Rotate", "/UserUnit")
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def _hash_object(obj, digest, seen: set):
+    """Feeds everything `obj` draws with (streams, fonts, images, forms) into `digest`."""
+    if isinstance(obj, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)) and obj.is_indirect:
+        if obj.objgen in seen:
+            digest.update(b"ref")
+            return
+        seen.add(obj.objgen)
+    if isinstance(obj, pikepdf.Stream):
+        digest.update(b"stream")
+        _hash_object(obj.stream_dict, digest, seen)
+        # Raw bytes are enough to tell streams apart, without decoding images
+        digest.update(obj.read_raw_bytes())
+    elif isinstance(obj, pikepdf.Dictionary):
+        digest.update(b"<<")
+        for key in sorted(obj.keys()):
+            if key in ("/Parent", "/P"):
+                continue
+            digest.update(key.encode())
+            _hash_object(obj[key], digest, seen)
+        digest.update(b">>")
+    elif isinstance(obj, pikepdf.Array):
+        digest.update(b"[")
+        for item in obj:
+            _hash_object(item, digest, seen)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode())
+
+def _inherited(page: pikepdf.Dictionary, key: str):
+    node = page
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node.get("/Parent")
+    return None
+
+def page_fingerprint(page: pikepdf.Page) -> str:
+    """
+    A hash of everything a page renders from: its content streams and the
+    fonts, images and forms they use, its boxes and rotation. Pages that
+    look the same in different files (e.g. an issuer's terms and
+    conditions) get the same fingerprint.
+    """
+    digest = hashlib.sha256(FINGERPRINT_VERSION.encode())
+    seen = set()
+    for key in _PAGE_KEYS:
+        value = _inherited(page.obj, key) if key in _INHERITABLE else page.obj.get(key)
+        if value is not None:
+            digest.update(key.encode())
+            _hash_object(value, digest, seen)
+    return digest.hexdigest()
+
+def _profile_tag(profile: str) -> str:
+    """The OCR settings a cached text depends on besides the page."""
+    if profile == PROFILE_FAST:
+        return f"{profile}:{settings.OCR_FAST_MAX_IMAGE_SIDE}"
+    if sidecar_only(profile):
+        # Tesseract's own text, rather than the text layer of the PDF it wrote
+        return f"{profile}:sidecar"
+    return profile
+
+def page_keys(pdf_path: str, page_numbers: Optional[List[int]], profile: str) -> Dict[int, str]:
+    """
+    The page cache key of each of the given 1-based pages (every page when
+    None) for OCR with `profile`. Empty when PAGE_CACHE_ENABLED is off or
+    the file cannot be read, so every page is OCR'd as usual.
+    """
+    if not settings.PAGE_CACHE_ENABLED:
+        return {}
+    tag = _profile_tag(profile)
+    try:
+        with pikepdf.open(pdf_path) as pdf:
+            numbers = page_numbers or range(1, len(pdf.pages) + 1)
+            return {n: f"{tag}:{page_fingerprint(pdf.pages[n - 1])}" for n in numbers}
+    except (pikepdf.PdfError, IndexError):
+        return {}
+
+
+class PageCache:
+    """
+    OCR text of pages seen before, keyed by page fingerprint and OCR
+    profile. Lives in a SQLite file on local disk, shared by every process
+    of the node (the upload, job and page workers all OCR). Least recently
+    used pages are evicted once the stored text exceeds `max_bytes`.
+
+    The cache only ever saves work: if the file cannot be read or written,
+    lookups miss and the pages are OCR'd as usual.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None, check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_used_at ON pages (used_at)")
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        try:
+            with self._lock:
+                conn = self._connect()
+                found = dict(conn.execute(f"SELECT key, text FROM pages WHERE key IN ({placeholders})", keys).fetchall())
+                if found:
+                    hits = list(found)
+                    conn.execute(
+                        f"UPDATE pages SET used_at = ? WHERE key IN ({','.join('?' * len(hits))})", [time.time(), *hits]
+                    )
+                return found
+        except sqlite3.Error:
+            logger.warning("Page cache lookup failed", exc_info=True)
+            return {}
+
+    def put_many(self, texts: Dict[str, str]):
+        if not texts:
+            return
+        now = time.time()
+        rows = [(key, text, len(text.encode("utf-8")), now) for key, text in texts.items()]
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO pages (key, text, size, used_at) VALUES (?, ?, ?, ?)", rows)
+                    self._evict(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            logger.warning("Page cache store failed", exc_info=True)
+
+    def _evict(self, conn: sqlite3.Connection):
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        oldest = conn.execute("SELECT key, size FROM pages ORDER BY used_at")
+        for key, size in oldest:
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        oldest.close()
+        conn.executemany("DELETE FROM pages WHERE key = ?", evicted)
+
+
+page_cache = PageCache(settings.PAGE_CACHE_PATH, settings.PAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+import pikepdf
+
+from app.core.config import settings
+from app.core.ocr import PROFILE_ACCURATE, run_ocr
+from app.core.page_cache import page_cache, page_keys
+from app.core.pdfio import open_pdf
+
+@dataclass
+class PageResult:
+    number: int  # 1-based page number in the source PDF
+    text: str
+    ocr: bool
+    seconds: float
+    cached: bool = False  # the OCR text came from the page cache
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+
+def _get_pool(jobs: int) -> ProcessPoolExecutor:
+    """Returns a process pool shared by every call in this process, resized if `jobs` changes."""
+    global _pool, _pool_size
+    if _pool is None or _pool_size != jobs:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"))
+        _pool_size = jobs
+    return _pool
+
+def page_count(pdf_path: str) -> int:
+    with pikepdf.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+def count_pages(pdf_paths: List[str]) -> int:
+    """Total pages of the given PDFs; one that cannot be opened counts as a single page."""
+    total = 0
+    for pdf_path in pdf_paths:
+        try:
+            total += page_count(pdf_path)
+        except pikepdf.PdfError:
+            total += 1
+    return total
+
+def split_page(pdf_path: str, number: int, dest_path: str):
+    """Writes page `number` (1-based) of `pdf_path` to its own single-page PDF."""
+    with pikepdf.open(pdf_path) as src:
+        single = pikepdf.new()
+        single.pages.append(src.pages[number - 1])
+        single.save(dest_path)
+
+def _read_page(pdf_path: str, index: int) -> str:
+    with open_pdf(pdf_path) as pdf:
+        return pdf.pages[index].extract_text() or ""
+
+def process_page(pdf_path: str, number: int, ocr: bool = True, profile: str = PROFILE_ACCURATE) -> PageResult:
+    """
+    Extracts the text of a single page, OCR'ing it first with the given
+    profile when `ocr` is set, unless the page cache already has its text.
+    Runs inside a pool worker, so it only touches its own temp files.
+    """
+    started = time.perf_counter()
+    cached = False
+    if not ocr:
+        text = _read_page(pdf_path, number - 1)
+    else:
+        key = page_keys(pdf_path, [number], profile).get(number)
+        text = page_cache.get_many([key]).get(key) if key else None
+        cached = text is not None
+        if not cached:
+            with tempfile.TemporaryDirectory() as work_dir:
+                page_path = os.path.join(work_dir, "page.pdf")
+                split_page(pdf_path, number, page_path)
+                # One page per call, so ocrmypdf's own parallelism would only add overhead
+                text = run_ocr(page_path, profile=profile, jobs=1).get(1, "")
+            if key:
+                page_cache.put_many({key: text})
+    return PageResult(number=number, text=text, ocr=ocr, seconds=time.perf_counter() - started, cached=cached)
+
+def ocr_with_page_cache(
+    pdf_path: str,
+    page_numbers: Optional[List[int]] = None,
+    profile: str = PROFILE_ACCURATE,
+    cached: Optional[Set[int]] = None,
+) -> Dict[int, str]:
+    """
+    run_ocr() in one call for the given pages (every page when None) that
+    are not in the page cache, and the cached text for the others. The
+    numbers of the pages answered from the cache are kept in `cached`.
+    """
+    keys = page_keys(pdf_path, page_numbers, profile)
+    hits = page_cache.get_many(keys.values())
+    page_texts = {n: hits[key] for n, key in keys.items() if key in hits}
+    if cached is not None:
+        cached.difference_update(page_numbers or keys)
+        cached.update(page_texts)
+    if not keys or len(page_texts) < len(keys):
+        missing = [n for n in keys if n not in page_texts] or page_numbers
+        recognised = run_ocr(pdf_path, missing, profile)
+        page_cache.put_many({keys[n]: text for n, text in recognised.items() if n in keys})
+        page_texts.update(recognised)
+    return page_texts
+
+def extract_pages(
+    pdf_path: str,
+    page_numbers: Optional[List[int]] = None,
+    ocr: bool = True,
+    jobs: Optional[int] = None,
+    profile: str = PROFILE_ACCURATE,
+) -> List[PageResult]:
+    """
+    Extracts the given pages (every page when None) concurrently across
+    `jobs` processes and returns the results in page order.
+    """
+    jobs = jobs or settings.PAGE_JOBS
+    if page_numbers is None:
+        page_numbers = list(range(1, page_count(pdf_path) + 1))
+
+    if jobs <= 1 or len(page_numbers) <= 1:
+        results = [process_page(pdf_path, n, ocr, profile) for n in page_numbers]
+    else:
+        pool = _get_pool(jobs)
+        futures = [pool.submit(process_page, pdf_path, n, ocr, profile) for n in page_numbers]
+        results = [future.result() for future in futures]
+    return sorted(results, key=lambda r: r.number)
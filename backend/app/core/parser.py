@@ -0,0 +1,179 @@
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# ---------------------------------------------------------------------------
+# Rule registry
+#
+# Everything the parser knows about a statement lives in these tables. Each
+# field rule is a (label, value) pair: the label is searched for and the
+# value pattern is then only tried within FIELD_WINDOW characters after it,
+# instead of an unbounded `label.*?value` match across the whole document.
+# ---------------------------------------------------------------------------
+
+DATE = r'\d{2}[-/]\d{2}[-/]\d{4}'
+AMOUNT = r'[0-9,]+\.\d{2}'
+
+# How far past a label the value may appear
+FIELD_WINDOW = 300
+
+DEFAULT_FIELD_RULES = {
+    "last_4_digits": (r'Card No', r'\d{4}'),
+    "billing_cycle": (r'Statement Date', DATE),
+    "payment_due_date": (r'Payment Due Date', DATE),
+    "total_balance": (r'Total Amount Due', AMOUNT),
+}
+
+# Card variant names, looked for whatever the issuer: statements name
+# co-branded and partner cards too, so no issuer's list is narrowed
+CARD_VARIANTS = ["Platinum", "Millennia", "Regalia", "Infinia", "Signature", "Ultimate"]
+
+# Issuers in detection priority order: when a statement mentions several
+# banks, the first one listed wins. "detect" lists plain phrases (matched
+# case-insensitively) and "fields" overrides DEFAULT_FIELD_RULES.
+ISSUER_RULES = [
+    {"issuer": "HDFC", "detect": ["HDFC Bank"], "fields": {}},
+    {"issuer": "ICICI", "detect": ["ICICI Bank"], "fields": {}},
+    {"issuer": "SBI", "detect": ["State Bank of India", "SBI"], "fields": {}},
+    {"issuer": "Axis Bank", "detect": ["Axis Bank"], "fields": {}},
+    {"issuer": "American Express", "detect": ["American Express", "AMEX"], "fields": {}},
+]
+
+# Used when no issuer is detected
+UNKNOWN_ISSUER = {"issuer": "Unknown", "fields": {}}
+
+FIELD_NAMES = ["issuer", "last_4_digits", "card_variant", "billing_cycle", "payment_due_date", "total_balance"]
+
+# Changes whenever the rules above change, so stored results can be re-parsed
+PARSER_VERSION = hashlib.sha256(json.dumps(
+    [DEFAULT_FIELD_RULES, CARD_VARIANTS, ISSUER_RULES, UNKNOWN_ISSUER, FIELD_WINDOW], sort_keys=True
+).encode()).hexdigest()[:12]
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CompiledIssuer:
+    name: str
+    fields: Dict[str, Tuple[Pattern, Pattern]]
+    variants: Pattern
+
+_VARIANTS = re.compile(r'\b(' + '|'.join(CARD_VARIANTS) + r')\b', re.IGNORECASE)
+
+def _compile_issuer(rule: dict) -> CompiledIssuer:
+    field_rules = {**DEFAULT_FIELD_RULES, **rule["fields"]}
+    return CompiledIssuer(
+        name=rule["issuer"],
+        fields={
+            name: (re.compile(label, re.IGNORECASE), re.compile(value, re.IGNORECASE))
+            for name, (label, value) in field_rules.items()
+        },
+        variants=_VARIANTS,
+    )
+
+_ISSUERS: List[CompiledIssuer] = [_compile_issuer(rule) for rule in ISSUER_RULES]
+_UNKNOWN: CompiledIssuer = _compile_issuer(UNKNOWN_ISSUER)
+
+# One alternation over every issuer's detection phrases, so the text is
+# scanned once no matter how many issuers are registered. The matched phrase
+# is mapped back to its issuer through a dict: capturing groups per issuer or
+# re.IGNORECASE would disable the regex engine's prefix scan and make this
+# an order of magnitude slower on large inputs, so it runs on lower-cased text.
+_ISSUER_PRIORITY = {
+    phrase.lower(): priority
+    for priority, rule in enumerate(ISSUER_RULES)
+    for phrase in rule["detect"]
+}
+_ISSUER_SCAN = re.compile('|'.join(re.escape(phrase) for phrase in _ISSUER_PRIORITY))
+# Text is lower-cased and scanned in chunks so that finding the top-priority
+# issuer near the start does not pay for lower-casing the whole document.
+_SCAN_CHUNK = 16 * 1024
+_SCAN_OVERLAP = max(len(phrase) for phrase in _ISSUER_PRIORITY) - 1
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def detect_issuer(text: str) -> Optional[CompiledIssuer]:
+    """Returns the highest-priority issuer mentioned in the text, if any."""
+    best = None
+    for start in range(0, len(text), _SCAN_CHUNK):
+        chunk = text[start:start + _SCAN_CHUNK + _SCAN_OVERLAP].lower()
+        for match in _ISSUER_SCAN.finditer(chunk):
+            priority = _ISSUER_PRIORITY[match.group(0)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    return _ISSUERS[0]
+    return _ISSUERS[best] if best is not None else None
+
+def _find_value(text: str, label: Pattern, value: Pattern) -> Optional[str]:
+    for label_match in label.finditer(text):
+        start = label_match.end()
+        value_match = value.search(text, start, start + FIELD_WINDOW)
+        if value_match:
+            return value_match.group(0)
+    return None
+
+def extract_fields(text: str, issuer: Optional[CompiledIssuer]) -> dict:
+    rules = issuer or _UNKNOWN
+    data = {"issuer": rules.name}
+    for name, (label, value) in rules.fields.items():
+        data[name] = _find_value(text, label, value) or "N/A"
+    variant = rules.variants.search(text)
+    data["card_variant"] = variant.group(1) if variant else "N/A"
+    return {name: data[name] for name in FIELD_NAMES}
+
+def extract_data_from_text(text: str) -> dict:
+    return extract_fields(text, detect_issuer(text))
+
+def missing_fields(data: dict, fields) -> list:
+    """Returns the names of the given fields that the parser could not fill in."""
+    return [name for name in fields if data.get(name) in (None, "N/A", "Unknown")]
+
+# Characters of the previous page kept when parsing the next one, so a label
+# at the bottom of one page still pairs with a value at the top of the next.
+PAGE_OVERLAP_CHARS = 200
+
+class IncrementalParser:
+    """
+    Parses a statement one page at a time, keeping the first value found for
+    each field. `complete` turns true once every field in `fields` has been
+    filled in, at which point the remaining pages do not need to be extracted
+    at all; pass only the fields a statement must have, since e.g. the card
+    variant is often not printed anywhere.
+    """
+
+    def __init__(self, fields=FIELD_NAMES):
+        self.fields = list(fields)
+        self.data = {}
+        self.pages_fed = 0
+        self._issuer: Optional[CompiledIssuer] = None
+        self._tail = ""
+
+    def feed(self, page_text: str):
+        window = self._tail + page_text
+        if self._issuer is None:
+            self._issuer = detect_issuer(window)
+            if self._issuer is not None:
+                self.data["issuer"] = self._issuer.name
+        found = extract_fields(window, self._issuer)
+        for name in FIELD_NAMES:
+            if name not in self.data and found[name] not in ("N/A", "Unknown"):
+                self.data[name] = found[name]
+        self._tail = page_text[-PAGE_OVERLAP_CHARS:]
+        self.pages_fed += 1
+
+    @property
+    def complete(self) -> bool:
+        return all(name in self.data for name in self.fields)
+
+    def result(self) -> dict:
+        result = {name: self.data.get(name, "N/A") for name in FIELD_NAMES}
+        result["issuer"] = self.data.get("issuer", "Unknown")
+        return result
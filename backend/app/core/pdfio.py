@@ -0,0 +1,50 @@
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pdfplumber
+
+from app.core.config import settings
+
+# How PDFs are read and what OCR writes (PDF_IO_MODE)
+PDF_IO_BUFFERED = "buffered"  # text layers parsed from a memory map; OCR writes only its text
+PDF_IO_FILES = "files"        # pdfplumber reads through a file handle; "accurate" OCR rewrites the PDF
+PDF_IO_MODES = (PDF_IO_BUFFERED, PDF_IO_FILES)
+
+def buffered() -> bool:
+    if settings.PDF_IO_MODE not in PDF_IO_MODES:
+        raise ValueError(f"Unknown PDF_IO_MODE: {settings.PDF_IO_MODE}")
+    return settings.PDF_IO_MODE == PDF_IO_BUFFERED
+
+@contextmanager
+def open_pdf(pdf_path: str) -> Iterator[pdfplumber.PDF]:
+    """
+    pdfplumber.open() on `pdf_path`. In buffered PDF_IO_MODE the file is
+    memory-mapped and parsed from the mapping, so pdfminer's many small
+    seeks and reads are served from the page cache (or tmpfs) without a
+    system call each.
+    """
+    if not buffered():
+        with pdfplumber.open(pdf_path) as pdf:
+            yield pdf
+        return
+    with open(pdf_path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped; let pdfplumber report them as usual
+            buffer = None
+    if buffer is None:
+        with pdfplumber.open(pdf_path) as pdf:
+            yield pdf
+        return
+    try:
+        with pdfplumber.open(buffer) as pdf:
+            yield pdf
+    finally:
+        buffer.close()
+
+def read_pages(pdf_path: str) -> List[str]:
+    """The text layer of every page of `pdf_path`, "" for pages without one."""
+    with open_pdf(pdf_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
@@ -0,0 +1,82 @@
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.fields import typed_columns
+from app.core.transactions import TransactionColumns, insert_transactions
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+# Hashes per IN (...) clause; stays well below SQLite's bound-parameter limit
+HASH_LOOKUP_CHUNK = 500
+
+@dataclass
+class ParsedUpload:
+    """A processed statement waiting to be stored as a FileUpload."""
+    filename: str
+    file_hash: str
+    data: dict
+    transactions: Optional[TransactionColumns] = None
+
+def existing_hashes(db: Session, user_id: int, hashes: Iterable[str]) -> Set[str]:
+    """Returns the hashes among `hashes` that the user has already uploaded."""
+    hashes = list(set(hashes))
+    found = set()
+    for i in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+        chunk = hashes[i:i + HASH_LOOKUP_CHUNK]
+        found.update(h for (h,) in db.query(models.FileUpload.file_hash).filter(
+            models.FileUpload.user_id == user_id,
+            models.FileUpload.file_hash.in_(chunk),
+        ))
+    return found
+
+def _new_upload(user_id: int, parsed: ParsedUpload) -> models.FileUpload:
+    return models.FileUpload(
+        filename=parsed.filename,
+        file_hash=parsed.file_hash,
+        issuer=parsed.data.get("issuer"),
+        extracted_data=parsed.data,
+        user_id=user_id,
+        **typed_columns(parsed.data)
+    )
+
+def save_uploads(db: Session, user_id: int, batch: List[ParsedUpload]) -> Tuple[List[models.FileUpload], List[Tuple[ParsedUpload, str]]]:
+    """
+    Inserts a batch of processed statements and returns (saved, failed).
+
+    The whole batch is flushed in one savepoint, followed by a single bulk
+    insert of its transactions. If that fails, the rows are retried one
+    savepoint each, so a bad row only costs its own record. Nothing is
+    committed; the caller commits once for the batch.
+    """
+    if not batch:
+        return [], []
+    uploads = [_new_upload(user_id, parsed) for parsed in batch]
+    try:
+        with db.begin_nested():
+            db.add_all(uploads)
+            db.flush()
+            insert_transactions(db, [(upload, parsed.transactions) for upload, parsed in zip(uploads, batch)])
+        return uploads, []
+    except SQLAlchemyError:
+        pass
+
+    saved, failed = [], []
+    for parsed in batch:
+        upload = _new_upload(user_id, parsed)
+        try:
+            with db.begin_nested():
+                db.add(upload)
+                db.flush()
+                insert_transactions(db, [(upload, parsed.transactions)])
+            saved.append(upload)
+        except IntegrityError:
+            failed.append((parsed, "This file has already been uploaded."))
+        except SQLAlchemyError as e:
+            logger.warning("Could not save %s: %s", parsed.filename, e, extra={"fields": {"file_hash": parsed.file_hash}})
+            failed.append((parsed, "Could not save the extracted data."))
+    return saved, failed
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.models.models import User, UserRole, UserStatus
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of the authenticated user, safe to share between requests."""
+    id: int
+    username: str
+    role: UserRole
+    is_verified: bool
+    status: UserStatus
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id, username=user.username, role=user.role,
+            is_verified=user.is_verified, status=user.status,
+        )
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated principals keyed by token subject
+    (username), so most requests skip the user-table lookup.
+
+    Entries expire after PRINCIPAL_CACHE_TTL_SECONDS and the admin endpoints
+    invalidate a user as soon as they change it. The cache is per process,
+    so with several server processes the TTL bounds how long another process
+    can serve a stale entry.
+
+    A request that read the user before an admin changed them must not store
+    its stale copy after the invalidation. Callers take a snapshot() before
+    reading the user and pass it to put(), which skips users invalidated
+    since.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated_at: Dict[int, int] = {}  # user id -> generation of their latest invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, username: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[0]
+
+    def snapshot(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def put(self, principal: Principal, snapshot: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self._invalidated_at.get(principal.id, 0) > snapshot:
+                return
+            self._entries[principal.username] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at[user_id] = self._generation
+            for username, (principal, _) in list(self._entries.items()):
+                if principal.id == user_id:
+                    del self._entries[username]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,131 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import models
+
+logger = logging.getLogger(__name__)
+
+# The temp dir this process was started with, before use_scratch_dir() replaces it
+_SYSTEM_TMP = tempfile.gettempdir()
+# The app only ever works, and cleans up, inside this directory of SCRATCH_DIR,
+# in per-process directories named with this prefix and the pid
+APP_DIR_NAME = "credit-card-parser"
+PROCESS_DIR_PREFIX = "worker-"
+
+def scratch_root() -> str:
+    return os.path.join(settings.SCRATCH_DIR or _SYSTEM_TMP, APP_DIR_NAME)
+
+def _process_dir(pid: int) -> str:
+    return os.path.join(scratch_root(), f"{PROCESS_DIR_PREFIX}{pid}")
+
+def _process_dir_pid(name: str) -> Optional[int]:
+    """The pid of a process directory's name; None for anything the app did not create."""
+    pid = name[len(PROCESS_DIR_PREFIX):]
+    if name.startswith(PROCESS_DIR_PREFIX) and pid.isdigit():
+        return int(pid)
+    return None
+
+def use_scratch_dir() -> str:
+    """
+    Gives this process a directory of its own under SCRATCH_DIR and makes it
+    the temp dir of the process and of everything it starts (extraction
+    workers, ocrmypdf, tesseract, ghostscript). Spooled uploads and OCR
+    working files then land there, named after the process that made them.
+    """
+    path = _process_dir(os.getpid())
+    # Left by an earlier process with the same pid, e.g. before a container restart
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["TMPDIR"] = path
+    tempfile.tempdir = path
+    return path
+
+def remove_scratch_dir():
+    shutil.rmtree(_process_dir(os.getpid()), ignore_errors=True)
+
+def _running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running, as another user
+    return True
+
+def _remove(path: str) -> bool:
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _is_old(path: str, now: float) -> bool:
+    try:
+        return now - os.path.getmtime(path) >= settings.SCRATCH_ORPHAN_AGE_SECONDS
+    except FileNotFoundError:
+        return False
+
+def _clean_scratch() -> int:
+    root = scratch_root()
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        pid = _process_dir_pid(name)
+        if pid is None or pid == os.getpid() or os.path.islink(path) or not os.path.isdir(path):
+            continue
+        if not _running(pid) and _remove(path):
+            removed += 1
+    return removed
+
+def _queued_spool_paths() -> Set[str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.ParseJob.spool_path).filter(
+            models.ParseJob.status.in_([models.JobStatus.QUEUED, models.JobStatus.RUNNING])
+        )
+        return {os.path.abspath(spool_path) for spool_path, in rows}
+    finally:
+        db.close()
+
+def _clean_job_spool(now: float) -> int:
+    spool_dir = settings.JOB_SPOOL_DIR
+    if not os.path.isdir(spool_dir):
+        return 0
+    needed = _queued_spool_paths()
+    removed = 0
+    for name in os.listdir(spool_dir):
+        path = os.path.abspath(os.path.join(spool_dir, name))
+        # Spooled uploads and job files are all *.pdf files
+        if not name.endswith(".pdf") or not os.path.isfile(path):
+            continue
+        if path not in needed and _is_old(path, now) and _remove(path):
+            removed += 1
+    return removed
+
+def clean_orphans(now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Startup janitor for working files left behind by processes that crashed
+    or were killed: the scratch directories of processes no longer running,
+    and in JOB_SPOOL_DIR the uploads no queued or running job points at
+    (a /jobs request that died while spooling, or a job whose file was not
+    removed when it finished). Spooled files are only removed once older
+    than SCRATCH_ORPHAN_AGE_SECONDS, so uploads other workers of the node
+    are still spooling are left alone. Nothing the app did not create is
+    touched. Returns how many entries were removed.
+    """
+    now = now or time.time()
+    removed = {"scratch": _clean_scratch(), "job_spool": _clean_job_spool(now)}
+    if any(removed.values()):
+        logger.info("Removed orphaned working files", extra={"fields": removed})
+    return removed
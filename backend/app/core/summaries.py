@@ -0,0 +1,165 @@
+from datetime import date
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import CardSummary, FileUpload
+
+# (user_id, issuer, last_4_digits) of a CardSummary row
+CardKey = Tuple[int, str, str]
+
+# FileUpload attributes a card summary is computed from
+_SUMMARY_ATTRS = ("user_id", "issuer", "last_4_digits", "statement_date", "payment_due_date", "total_balance_paise")
+
+def card_key(upload: FileUpload) -> CardKey:
+    return (upload.user_id, upload.issuer or "", upload.last_4_digits or "")
+
+def _recency(statement_date, upload_id) -> tuple:
+    """Orders statements of a card; undated ones count as the oldest."""
+    return (statement_date or date.min, upload_id or 0)
+
+def _summary_filter(key: CardKey) -> tuple:
+    user_id, issuer, last_4_digits = key
+    return (CardSummary.user_id == user_id, CardSummary.issuer == issuer, CardSummary.last_4_digits == last_4_digits)
+
+def _upload_filter(key: CardKey) -> tuple:
+    user_id, issuer, last_4_digits = key
+    return (
+        FileUpload.user_id == user_id,
+        func.coalesce(FileUpload.issuer, "") == issuer,
+        FileUpload.last_4_digits.is_(None) if not last_4_digits else FileUpload.last_4_digits == last_4_digits,
+    )
+
+def _latest_values(upload_id, statement_date, payment_due_date, total_balance_paise) -> dict:
+    return {
+        "latest_upload_id": upload_id, "statement_date": statement_date,
+        "payment_due_date": payment_due_date, "total_balance_paise": total_balance_paise,
+    }
+
+def _summary_row(conn: Connection, key: CardKey):
+    return conn.execute(
+        select(CardSummary.id, CardSummary.statement_date, CardSummary.latest_upload_id).where(*_summary_filter(key))
+    ).first()
+
+def _insert_summary(conn: Connection, key: CardKey, values: dict) -> bool:
+    """
+    Creates a card's summary row. Returns False when a concurrent flush of
+    the same card created it first, in which case the caller updates that
+    row instead.
+    """
+    user_id, issuer, last_4_digits = key
+    try:
+        # Savepoint, so losing the race does not roll back the flush itself
+        with conn.begin_nested():
+            conn.execute(insert(CardSummary).values(user_id=user_id, issuer=issuer, last_4_digits=last_4_digits, **values))
+        return True
+    except IntegrityError:
+        return False
+
+def add_uploads(conn: Connection, uploads: Iterable[FileUpload]):
+    """Counts newly inserted uploads into their cards' summaries, one query pair per card."""
+    groups: Dict[CardKey, List[FileUpload]] = {}
+    for upload in uploads:
+        groups.setdefault(card_key(upload), []).append(upload)
+
+    for key, group in groups.items():
+        latest = max(group, key=lambda u: _recency(u.statement_date, u.id))
+        values = _latest_values(latest.id, latest.statement_date, latest.payment_due_date, latest.total_balance_paise)
+        row = _summary_row(conn, key)
+        if row is None:
+            if _insert_summary(conn, key, {"upload_count": len(group), **values}):
+                continue
+            row = _summary_row(conn, key)
+        changes = {"upload_count": CardSummary.upload_count + len(group)}
+        if _recency(latest.statement_date, latest.id) > _recency(row.statement_date, row.latest_upload_id):
+            changes.update(values)
+        conn.execute(update(CardSummary).where(CardSummary.id == row.id).values(**changes))
+
+def rebuild_cards(conn: Connection, keys: Iterable[CardKey]):
+    """
+    Recomputes the given cards' summaries from their uploads. Used after
+    deletes and updates, which cannot be applied incrementally.
+    """
+    for key in keys:
+        count = conn.execute(select(func.count()).select_from(FileUpload).where(*_upload_filter(key))).scalar()
+        if not count:
+            conn.execute(delete(CardSummary).where(*_summary_filter(key)))
+            continue
+        latest = conn.execute(
+            select(FileUpload.id, FileUpload.statement_date, FileUpload.payment_due_date, FileUpload.total_balance_paise)
+            .where(*_upload_filter(key))
+            .order_by(FileUpload.statement_date.is_(None), FileUpload.statement_date.desc(), FileUpload.id.desc())
+            .limit(1)
+        ).first()
+        values = {"upload_count": count, **_latest_values(*latest)}
+        updated = conn.execute(update(CardSummary).where(*_summary_filter(key)).values(**values))
+        if not updated.rowcount and not _insert_summary(conn, key, values):
+            conn.execute(update(CardSummary).where(*_summary_filter(key)).values(**values))
+
+def rebuild_all(conn: Connection):
+    """Recomputes every card summary from the uploads table."""
+    conn.execute(delete(CardSummary))
+    keys = conn.execute(select(
+        FileUpload.user_id, func.coalesce(FileUpload.issuer, ""), func.coalesce(FileUpload.last_4_digits, "")
+    ).distinct()).all()
+    rebuild_cards(conn, [tuple(key) for key in keys])
+
+@event.listens_for(Session, "after_flush")
+def _update_card_summaries(session: Session, flush_context):
+    """
+    Applies the uploads inserted, updated or deleted by a flush to the card
+    summaries on the flush's own connection, so they commit or roll back
+    together with the uploads.
+    """
+    added = [obj for obj in session.new if isinstance(obj, FileUpload)]
+    stale: Set[CardKey] = {card_key(obj) for obj in session.deleted if isinstance(obj, FileUpload)}
+    for obj in session.dirty:
+        if not isinstance(obj, FileUpload):
+            continue
+        state = inspect(obj)
+        histories = {attr: state.attrs[attr].history for attr in _SUMMARY_ATTRS}
+        if not any(history.has_changes() for history in histories.values()):
+            continue
+        # Both the card the upload left and the one it now belongs to
+        old = {attr: (h.deleted[0] if h.deleted else getattr(obj, attr)) for attr, h in histories.items()}
+        stale.add((old["user_id"], old["issuer"] or "", old["last_4_digits"] or ""))
+        stale.add(card_key(obj))
+    if not added and not stale:
+        return
+
+    conn = session.connection()
+    add_uploads(conn, [upload for upload in added if card_key(upload) not in stale])
+    rebuild_cards(conn, stale)
+
+
+def user_summary(db: Session, user_id: int, today: date) -> dict:
+    """Totals of a user's statements, read from their card summaries only."""
+    cards = db.query(CardSummary).filter(CardSummary.user_id == user_id).order_by(
+        CardSummary.issuer, CardSummary.last_4_digits
+    ).all()
+    issuers: Dict[str, int] = {}
+    for card in cards:
+        issuers[card.issuer] = issuers.get(card.issuer, 0) + card.upload_count
+    upcoming = sorted(
+        (card for card in cards if card.payment_due_date and card.payment_due_date >= today),
+        key=lambda card: card.payment_due_date,
+    )
+    return {
+        "upload_count": sum(card.upload_count for card in cards),
+        "total_outstanding_paise": sum(card.total_balance_paise or 0 for card in cards),
+        "issuers": [{"issuer": issuer, "upload_count": count} for issuer, count in issuers.items()],
+        "cards": cards,
+        "upcoming_due_dates": upcoming,
+    }
+
+def upload_counts(db: Session, user_ids: List[int]) -> Dict[int, int]:
+    """Number of uploads of each of the given users."""
+    if not user_ids:
+        return {}
+    rows = db.query(CardSummary.user_id, func.sum(CardSummary.upload_count)).filter(
+        CardSummary.user_id.in_(user_ids)
+    ).group_by(CardSummary.user_id)
+    return {user_id: int(count) for user_id, count in rows}
@@ -0,0 +1,166 @@
+import re
+import sys
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.fields import parse_amount_paise
+from app.core.pdfio import open_pdf
+from app.models import models
+
+# How a transaction row is laid out, cell by cell from left to right. A row
+# starts with a date cell and ends with an amount, optionally followed by a
+# credit marker; the cells in between are the description.
+DEFAULT_COLUMNS = {
+    "date": r'(\d{2})[-/](\d{2})[-/](\d{4})',  # day, month, year
+    "amount": r'[0-9,]+\.\d{2}',
+    "credit": r'Cr|CR|Credit',
+    "skip": 0,  # cells between the date and the description, e.g. a posting date
+}
+
+# Per-issuer overrides of DEFAULT_COLUMNS, keyed like parser.ISSUER_RULES. An
+# issuer is only added once a real statement of it is known to lay its rows
+# out differently, together with a test on such a row.
+ISSUER_COLUMNS: Dict[str, dict] = {}
+
+# Description cells that identify the transaction rather than the merchant
+# (e.g. REF12345678), left out so the same merchant always interns to one string
+_REFERENCE = re.compile(r'[A-Za-z#]{0,4}\d{6,}')
+# Words closer than this many points vertically are on the same row
+ROW_TOLERANCE = 3
+
+
+@dataclass
+class CompiledColumns:
+    date: re.Pattern
+    amount: re.Pattern
+    credit: re.Pattern
+    skip: int
+
+def _compile(rule: dict) -> CompiledColumns:
+    return CompiledColumns(
+        date=re.compile(rule["date"]), amount=re.compile(rule["amount"]),
+        credit=re.compile(rule["credit"]), skip=rule["skip"],
+    )
+
+_DEFAULT = _compile(DEFAULT_COLUMNS)
+_COLUMNS = {issuer: _compile({**DEFAULT_COLUMNS, **rule}) for issuer, rule in ISSUER_COLUMNS.items()}
+
+
+@dataclass
+class TransactionColumns:
+    """
+    A statement's transactions stored column by column: dates as ordinals
+    and amounts in paise in typed arrays, and merchants as indexes into a
+    table of interned strings, so a thousand rows take a few kilobytes.
+    """
+    dates: array = field(default_factory=lambda: array("i"))    # date.toordinal()
+    amounts: array = field(default_factory=lambda: array("q"))  # paise; credits are negative
+    merchant_ids: array = field(default_factory=lambda: array("I"))
+    merchants: List[str] = field(default_factory=list)
+    _merchant_index: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    def append(self, ordinal: int, paise: int, merchant: str):
+        merchant_id = self._merchant_index.get(merchant)
+        if merchant_id is None:
+            merchant_id = self._merchant_index[merchant] = len(self.merchants)
+            self.merchants.append(sys.intern(merchant))
+        self.dates.append(ordinal)
+        self.amounts.append(paise)
+        self.merchant_ids.append(merchant_id)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def rows(self) -> Iterator[Tuple[date, str, int]]:
+        for ordinal, paise, merchant_id in zip(self.dates, self.amounts, self.merchant_ids):
+            yield date.fromordinal(ordinal), self.merchants[merchant_id], paise
+
+
+def _parse_row(cells: List[str], columns: CompiledColumns, ordinals: Dict[str, int]) -> Optional[Tuple[int, int, str]]:
+    if len(cells) < 3 + columns.skip:
+        return None
+    day = columns.date.fullmatch(cells[0])
+    if day is None:
+        return None
+    end = len(cells)
+    credit = columns.credit.fullmatch(cells[end - 1]) is not None
+    if credit:
+        end -= 1
+    if not columns.amount.fullmatch(cells[end - 1]):
+        return None
+    paise = parse_amount_paise(cells[end - 1])
+    if paise is None:
+        # The amount pattern also matches a cell of separators, such as ",.00"
+        return None
+    description = [cell for cell in cells[1 + columns.skip:end - 1] if not _REFERENCE.fullmatch(cell)]
+    if not description:
+        return None
+
+    # Statements repeat the same few dates, so each is only converted once
+    ordinal = ordinals.get(cells[0])
+    if ordinal is None:
+        try:
+            ordinal = ordinals[cells[0]] = date(int(day.group(3)), int(day.group(2)), int(day.group(1))).toordinal()
+        except ValueError:
+            return None
+    return ordinal, -paise if credit else paise, " ".join(description)
+
+def parse_rows(rows: Iterable[List[str]], issuer: Optional[str]) -> TransactionColumns:
+    """Collects the rows that match the issuer's column layout; all other rows are ignored."""
+    columns = _COLUMNS.get(issuer, _DEFAULT)
+    transactions = TransactionColumns()
+    ordinals: Dict[str, int] = {}
+    for cells in rows:
+        parsed = _parse_row(cells, columns, ordinals)
+        if parsed is not None:
+            transactions.append(*parsed)
+    return transactions
+
+def rows_from_words(words: List[dict]) -> List[List[str]]:
+    """Groups pdfplumber words into rows by their vertical position, each row read left to right."""
+    rows, row, row_top = [], [], None
+    for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+        if row_top is not None and word["top"] - row_top > ROW_TOLERANCE:
+            rows.append([w["text"] for w in sorted(row, key=lambda w: w["x0"])])
+            row = []
+        if not row:
+            row_top = word["top"]
+        row.append(word)
+    if row:
+        rows.append([w["text"] for w in sorted(row, key=lambda w: w["x0"])])
+    return rows
+
+def parse_text(text: str, issuer: Optional[str]) -> TransactionColumns:
+    """Parses text that pdfplumber or OCR already laid out in lines, one row per line."""
+    return parse_rows((line.split() for line in text.splitlines()), issuer)
+
+def read_transactions(pdf_path: str, issuer: Optional[str], text: str = "") -> TransactionColumns:
+    """
+    Reads the transactions from the word positions of every page's text
+    layer. Scanned statements have no words to position, so their OCR'd
+    `text` is split into rows line by line instead.
+    """
+    with open_pdf(pdf_path) as pdf:
+        rows = []
+        for page in pdf.pages:
+            rows.extend(rows_from_words(page.extract_words()))
+            page.close()
+    transactions = parse_rows(rows, issuer)
+    if not transactions and text:
+        transactions = parse_text(text, issuer)
+    return transactions
+
+def insert_transactions(db: Session, saved: List[Tuple[models.FileUpload, TransactionColumns]]):
+    """Bulk-inserts the transactions of uploads that have been flushed (so have ids), in one executemany."""
+    rows = [
+        {"upload_id": upload.id, "user_id": upload.user_id, "posted_on": posted_on, "description": merchant, "amount_paise": paise}
+        for upload, transactions in saved if transactions
+        for posted_on, merchant, paise in transactions.rows()
+    ]
+    if rows:
+        db.execute(insert(models.Transaction), rows)
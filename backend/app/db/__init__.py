@@ -1,3 +1,3 @@
-from app.db.database import engine, SessionLocal, Base, get_db
+from app.db.database import engine, SessionLocal, Base, get_db, get_async_db
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = ["engine", "SessionLocal", "Base", "get_db", "get_async_db"]
@@ -0,0 +1,91 @@
+import json
+import logging
+
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.fields import typed_columns
+from app.core.summaries import rebuild_all
+from app.models.models import Base, FileUpload, SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+# Rows read per query by data migrations
+BATCH_SIZE = 1000
+
+def add_missing_columns(engine: Engine):
+    """
+    Adds nullable columns declared on the models that are missing from
+    existing tables. `create_all` never alters a table that already exists.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def ensure_indexes(engine: Engine):
+    """
+    Creates indexes declared on the models that are missing from existing
+    tables. `create_all` only creates indexes together with new tables, so
+    databases created before an index was added would never get it.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+
+def backfill_upload_fields(conn: Connection):
+    """
+    Decodes extracted_data blobs that were stored as json.dumps() strings and
+    fills the typed field columns from them.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(FileUpload.id, FileUpload.extracted_data)
+            .where(FileUpload.id > last_id)
+            .order_by(FileUpload.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for upload_id, extracted_data in rows:
+            data = json.loads(extracted_data) if isinstance(extracted_data, str) else extracted_data
+            values = typed_columns(data or {})
+            values["extracted_data"] = data
+            conn.execute(update(FileUpload).where(FileUpload.id == upload_id).values(**values))
+        last_id = rows[-1][0]
+
+# Data migrations in the order they must run; each runs once per database
+DATA_MIGRATIONS = [
+    ("0001_backfill_upload_fields", backfill_upload_fields),
+    ("0002_build_card_summaries", rebuild_all),
+]
+
+def run_data_migrations(engine: Engine):
+    with engine.begin() as conn:
+        applied = set(conn.execute(select(SchemaMigration.name)).scalars())
+    for name, migrate in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        logger.info("Applying data migration %s", name)
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(name=name))
+
+def run_migrations(engine: Engine):
+    """Brings an existing database up to date with the models. Safe to run on every start."""
+    add_missing_columns(engine)
+    ensure_indexes(engine)
+    run_data_migrations(engine)
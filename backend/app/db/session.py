@@ -1,10 +1,100 @@
-from sqlalchemy import create_engine
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core import summaries  # noqa: F401  (keeps card_summaries in step with every flush of uploads)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Drivers used for the async engine when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _engine_options(url) -> dict:
+    """Pool and driver options for the database behind `url`."""
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        # Sessions are handed between threads (threadpool endpoints, the job
+        # queue), which the sqlite3 module refuses by default.
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(url):
+            return options
+    else:
+        options["pool_pre_ping"] = settings.DATABASE_POOL_PRE_PING
+        options["pool_recycle"] = settings.DATABASE_POOL_RECYCLE
+    options["pool_size"] = settings.DATABASE_POOL_SIZE
+    options["max_overflow"] = settings.DATABASE_MAX_OVERFLOW
+    options["pool_timeout"] = settings.DATABASE_POOL_TIMEOUT
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the single writer; busy_timeout makes a
+    # blocked writer wait instead of failing with "database is locked".
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+def create_db_engine(database_url: Optional[str] = None, **overrides) -> Engine:
+    """
+    Creates an engine for `database_url` (DATABASE_URL by default) with the
+    pool settings and, for SQLite, the connection pragmas from Settings.
+    """
+    url = make_url(database_url or settings.DATABASE_URL)
+    engine = create_engine(url, **{**_engine_options(url), **overrides})
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+def async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver known for {url.get_backend_name()}; set ASYNC_DATABASE_URL.")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+def create_async_db_engine(database_url: Optional[str] = None, **overrides):
+    """
+    Async counterpart of create_db_engine. Needs the async driver for the
+    database (aiosqlite or asyncpg) to be installed.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(database_url or async_database_url())
+    engine = create_async_engine(url, **{**_engine_options(url), **overrides})
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+engine = create_db_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The async engine is created on first use so that deployments without an
+# async driver installed never import it.
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            create_async_db_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    # connect_args is needed only for SQLite.
-    connect_args={"check_same_thread": False},
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    """Dependency yielding an AsyncSession for async endpoints."""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,12 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, files, export , admin
+from fastapi.responses import PlainTextResponse
+from app.api.endpoints import auth, files, export , admin, jobs, summary
+from app.core.config import settings
+from app.core.executors import shutdown_executors
+from app.core.jobs import job_queue
+from app.core.log import configure_logging
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.scratch import clean_orphans, remove_scratch_dir, use_scratch_dir
 from app.models.models import Base
 from app.db.session import engine
+from app.db.migrations import run_migrations
 
+configure_logging()
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
-app = FastAPI(title="Credit Card Parser API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Before any worker process is started, so they all inherit the scratch dir
+    use_scratch_dir()
+    clean_orphans()
+    if settings.JOB_QUEUE_ENABLED:
+        job_queue.start()
+    yield
+    if settings.JOB_QUEUE_ENABLED:
+        job_queue.stop()
+    shutdown_executors()
+    remove_scratch_dir()
+
+app = FastAPI(title="Credit Card Parser API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,12 +39,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(files.router, prefix="/files", tags=["Files"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
 app.include_router(export.router, prefix="/data", tags=["Data"])
+app.include_router(summary.router, prefix="/data", tags=["Data"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the Credit Card Parser API"}
\ No newline at end of file
+    return {"message": "Welcome to the Credit Card Parser API"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, ForeignKey, DateTime, JSON,
-    Enum as SQLAlchemyEnum, Boolean, UniqueConstraint
+    Column, Integer, BigInteger, Float, String, Text, ForeignKey, Date, DateTime, JSON,
+    Enum as SQLAlchemyEnum, Boolean, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
@@ -37,12 +37,139 @@ class FileUpload(Base):
     filename = Column(String, index=True, nullable=False)
     file_hash = Column(String, index=True, nullable=False)  # 🔹 removed unique=True
     issuer = Column(String, nullable=True)
-    extracted_data = Column(JSON, nullable=True)
+    extracted_data = Column(JSON, nullable=True)  # parser output as printed on the statement
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    # Typed copies of the parsed fields for filtering, sorting and aggregation
+    # in SQL. NULL where the parser found nothing ("N/A").
+    last_4_digits = Column(String(4), nullable=True)
+    card_variant = Column(String, nullable=True)
+    statement_date = Column(Date, nullable=True)
+    payment_due_date = Column(Date, nullable=True)
+    total_balance_paise = Column(BigInteger, nullable=True)
+
     owner = relationship("User", back_populates="uploads")
+    transactions = relationship("Transaction", cascade="all, delete-orphan")
 
     __table_args__ = (
         UniqueConstraint('file_hash', 'user_id', name='uix_file_hash_user'),
+        # Backs the keyset-paginated history: WHERE user_id = ? ORDER BY uploaded_at DESC, id DESC
+        Index('ix_uploads_user_uploaded_at', 'user_id', 'uploaded_at'),
+        Index('ix_uploads_user_issuer', 'user_id', 'issuer'),
+        Index('ix_uploads_user_last4', 'user_id', 'last_4_digits'),
+        Index('ix_uploads_user_due_date', 'user_id', 'payment_due_date'),
+        Index('ix_uploads_user_balance', 'user_id', 'total_balance_paise'),
     )
+
+
+class Transaction(Base):
+    """A line of a statement's transaction listing."""
+    __tablename__ = "transactions"
+
+    id = Column(Integer, primary_key=True)
+    upload_id = Column(Integer, ForeignKey("uploads.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    posted_on = Column(Date, nullable=False)
+    description = Column(String, nullable=False)  # merchant, without reference numbers
+    amount_paise = Column(BigInteger, nullable=False)  # negative for credits such as payments and refunds
+
+    __table_args__ = (
+        Index('ix_transactions_upload', 'upload_id'),
+        Index('ix_transactions_user_posted_on', 'user_id', 'posted_on'),
+    )
+
+
+class CardSummary(Base):
+    """
+    Running totals of one user's statements for one card, kept up to date
+    by app.core.summaries whenever uploads are flushed, so summaries never
+    have to read the user's whole history.
+    """
+    __tablename__ = "card_summaries"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    issuer = Column(String, nullable=False)  # "" when the upload has none
+    last_4_digits = Column(String(4), nullable=False)  # "" when the parser found none
+    upload_count = Column(Integer, default=0, nullable=False)
+    # Taken from the card's latest statement (by statement date, then upload id)
+    latest_upload_id = Column(Integer, nullable=True)  # no foreign key, so deleting that upload is not blocked
+    statement_date = Column(Date, nullable=True)
+    payment_due_date = Column(Date, nullable=True)
+    total_balance_paise = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'issuer', 'last_4_digits', name='uix_card_summary'),
+    )
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ParseJob(Base):
+    __tablename__ = "parse_jobs"
+
+    id = Column(String(32), primary_key=True)
+    filename = Column(String, nullable=False)
+    file_hash = Column(String, index=True, nullable=False)
+    spool_path = Column(String, nullable=False)  # uploaded PDF waiting on disk for a worker
+    status = Column(SQLAlchemyEnum(JobStatus), default=JobStatus.QUEUED, index=True, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    extraction_method = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Dispatcher running the job, and until when; renewed while it runs
+    owner = Column(String(32), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    upload_id = Column(Integer, ForeignKey("uploads.id"), nullable=True)
+
+    upload = relationship("FileUpload")
+
+
+class ExtractionCacheEntry(Base):
+    """Extraction result shared by every upload of the same file content."""
+    __tablename__ = "extraction_cache"
+
+    file_hash = Column(String, primary_key=True)
+    parser_version = Column(String, nullable=False)  # parser rules the data was produced with
+    raw_text = Column(Text, nullable=False)
+    extracted_data = Column(JSON, nullable=False)
+    extraction_method = Column(String, nullable=True)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AdmissionBucket(Base):
+    """Token bucket of a per-user quota, for the database admission backend."""
+    __tablename__ = "admission_buckets"
+
+    key = Column(String, primary_key=True)  # e.g. "user:42:pages"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix time the tokens were last counted
+
+
+class AdmissionLease(Base):
+    """An OCR slot held by one node, for the database admission backend."""
+    __tablename__ = "admission_leases"
+
+    id = Column(Integer, primary_key=True)  # leases are granted in id order
+    pool = Column(String, nullable=False, index=True)
+    expires_at = Column(Float, nullable=False, index=True)  # Unix time; frees the slots of a crashed node
+
+
+class SchemaMigration(Base):
+    """Data migrations that have already been applied to this database."""
+    __tablename__ = "schema_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List
+from typing import List, Optional
 from app.models.models import UserStatus # <-- Import UserStatus from your models
 
 class UserView(BaseModel):
@@ -11,5 +11,27 @@ class UserView(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class UserListItem(UserView):
+    upload_count: int = 0
+
 class UserListResponse(BaseModel):
-    users: List[UserView]
\ No newline at end of file
+    users: List[UserListItem]
+    next_cursor: Optional[int] = None  # pass as `cursor` to get the next page; None on the last one
+
+class CacheStats(BaseModel):
+    parser_version: str
+    hits: int
+    misses: int
+    reparsed: int  # hits re-parsed from cached text after a parser rule change
+    evictions: int
+    hit_rate: float
+    entries: int
+    size_bytes: int
+
+class PrincipalCacheStats(BaseModel):
+    hits: int
+    misses: int
+    invalidations: int
+    hit_rate: float
+    entries: int
+    ttl_seconds: float
\ No newline at end of file
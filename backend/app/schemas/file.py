@@ -7,11 +7,21 @@ class FileUploadResponse(BaseModel):
     filename: str
     issuer: str
     data: Dict[str, Any]
+    extraction_method: Optional[str] = None  # "text", "mixed" or "ocr"
+    page_timings: Optional[Dict[int, float]] = None  # seconds spent on each OCR'd page
+    transaction_count: Optional[int] = None  # None when transaction extraction is disabled
+
+class FailedUpload(BaseModel):
+    """A file from an upload batch that was not saved"""
+    filename: str
+    error: str
 
 class HistoryResponse(BaseModel):
     """Schema for history response"""
+    id: Optional[int] = None
     filename: str
     issuer: str
+    uploaded_at: Optional[datetime] = None
     data: Dict[str, Any]
     
     class Config:
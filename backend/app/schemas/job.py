@@ -0,0 +1,30 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+from app.models.models import JobStatus
+
+class JobView(BaseModel):
+    """Schema for a background parse job"""
+    id: str
+    filename: str
+    status: JobStatus
+    error: Optional[str] = None
+    extraction_method: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class JobEnqueueResponse(BaseModel):
+    """Schema for the response to a job submission"""
+    jobs: List[JobView]
+    skipped: List[str] # List of filenames that were skipped
+
+class JobResult(BaseModel):
+    """Schema for the parsed result of a finished job"""
+    filename: str
+    issuer: str
+    data: Dict[str, Any]
+    extraction_method: Optional[str] = None
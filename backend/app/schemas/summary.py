@@ -0,0 +1,27 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+class CardSummaryView(BaseModel):
+    """A card's upload count and the fields of its latest statement"""
+    issuer: str
+    last_4_digits: str  # "" when the parser found none
+    upload_count: int
+    statement_date: Optional[date] = None
+    payment_due_date: Optional[date] = None
+    total_balance_paise: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class IssuerCount(BaseModel):
+    issuer: str
+    upload_count: int
+
+class SummaryResponse(BaseModel):
+    """Schema for the dashboard summary of a user's statements"""
+    upload_count: int
+    total_outstanding_paise: int  # sum of each card's latest total balance
+    issuers: List[IssuerCount]
+    cards: List[CardSummaryView]
+    upcoming_due_dates: List[CardSummaryView]  # cards due today or later, soonest first
@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import time
+
+from common import latency_summary, use_temp_database
+
+use_temp_database("bench_api_")
+
+import httpx
+
+from bench_parser import ISSUER_HEADERS
+from synthetic import text_pdf
+
+from app.core.auth import create_access_token
+from app.core.persistence import ParsedUpload, save_uploads
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+EXPORT_FORMATS = ["csv", "ndjson", "xlsx", "pdf", "docx"]
+# Issuer names as the parser reports them, used for seeded history rows
+SEED_ISSUERS = ["HDFC", "ICICI", "SBI", "Axis Bank", "American Express"]
+USERNAME = "bench_api_user"
+
+def create_user() -> dict:
+    """Creates a verified user and returns the headers that authenticate as it."""
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.username == USERNAME).first()
+        if user is None:
+            user = models.User(username=USERNAME, hashed_password="-", is_verified=True)
+            db.add(user)
+            db.commit()
+        token = create_access_token({"sub": user.username, "role": user.role.value})
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+def seed_history(rows: int):
+    """Inserts `rows` uploads directly so history and export run against a realistic table size."""
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.username == USERNAME).first()
+        batch = []
+        for i in range(rows):
+            data = {
+                "issuer": SEED_ISSUERS[i % len(SEED_ISSUERS)],
+                "last_4_digits": f"{i % 10000:04d}", "card_variant": "Platinum",
+                "billing_cycle": "15/09/2025", "payment_due_date": f"{i % 28 + 1:02d}/10/2025",
+                "total_balance": f"{i * 37 % 100000:,}.50",
+            }
+            batch.append(ParsedUpload(f"seed_{i}.pdf", f"seed-{i:064d}"[-64:], data))
+            if len(batch) == 1000:
+                save_uploads(db, user.id, batch)
+                db.commit()
+                batch = []
+        save_uploads(db, user.id, batch)
+        db.commit()
+    finally:
+        db.close()
+
+async def _timed(send, latencies: list, statuses: dict):
+    started = time.perf_counter()
+    response = await send()
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return response
+
+async def _load(name: str, make_request, requests: int, concurrency: int) -> dict:
+    """Sends `requests` requests built by make_request(i), at most `concurrency` at a time."""
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await _timed(lambda: make_request(i), latencies, statuses)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "benchmark": "api", "endpoint": name, "concurrency": concurrency,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        **latency_summary(latencies, elapsed),
+    }
+
+async def run_async(args) -> list:
+    headers = create_user()
+    issuers = list(ISSUER_HEADERS)
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        def upload(i):
+            # Every request carries new statements, so none is skipped as a duplicate
+            files = [
+                ("files", (f"upload_{i}_{j}.pdf", text_pdf(issuers[(i + j) % len(issuers)], args.pages, seed=i * 1000 + j), "application/pdf"))
+                for j in range(args.files_per_upload)
+            ]
+            return client.post("/files/upload", headers=headers, files=files)
+        results.append(await _load("/files/upload", upload, args.uploads, args.concurrency))
+
+        seed_history(args.history_rows)
+
+        def history(i):
+            return client.get("/files/history", headers=headers, params={"limit": 100})
+        results.append(await _load("/files/history", history, args.requests, args.concurrency))
+
+        def history_filtered(i):
+            params = {"limit": 100, "issuer": SEED_ISSUERS[i % 3], "due_after": "2025-10-10"}
+            return client.get("/files/history", headers=headers, params=params)
+        results.append(await _load("/files/history?issuer&due_after", history_filtered, args.requests, args.concurrency))
+
+        for fmt in EXPORT_FORMATS:
+            def export(i, fmt=fmt):
+                # Downloads take the token as a query parameter
+                return client.get(f"/data/export/{fmt}", params={"authorization": headers["Authorization"]})
+            results.append(await _load(f"/data/export/{fmt}", export, args.export_requests, args.concurrency))
+    for r in results:
+        r["history_rows"] = args.history_rows
+    return results
+
+def run(args) -> list:
+    return asyncio.run(run_async(args))
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+    parser.add_argument("--uploads", type=int, default=20, help="Upload requests to send.")
+    parser.add_argument("--files-per-upload", type=int, default=3, help="Statements per upload request.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per uploaded statement.")
+    parser.add_argument("--history-rows", type=int, default=5000, help="Uploads inserted before the history and export runs.")
+    parser.add_argument("--requests", type=int, default=200, help="History requests per measurement.")
+    parser.add_argument("--export-requests", type=int, default=4, help="Requests per export format.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the upload, history and export endpoints on a local SQLite database.")
+    add_arguments(parser)
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args)
+    for r in results:
+        print(f"{r['endpoint']:<32} p50 {r['p50_ms']:>9.1f} ms  p95 {r['p95_ms']:>9.1f} ms  "
+              f"p99 {r['p99_ms']:>9.1f} ms  {r['requests_per_sec']:>8.1f}/s  {r['statuses']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
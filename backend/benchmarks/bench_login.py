@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import json
+import time
+
+from common import latency_summary, percentile, use_temp_database
+
+use_temp_database("bench_login_")
+
+import httpx
+
+from app.core.auth import get_password_hash
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+PASSWORD = "bench-password"
+
+def create_users(count: int) -> list:
+    hashed = get_password_hash(PASSWORD)
+    usernames = [f"bench_user_{i}" for i in range(count)]
+    db = SessionLocal()
+    try:
+        existing = {u for (u,) in db.query(models.User.username).filter(models.User.username.in_(usernames))}
+        db.add_all(models.User(username=u, hashed_password=hashed) for u in usernames if u not in existing)
+        db.commit()
+    finally:
+        db.close()
+    return usernames
+
+async def _login(client, username: str, latencies: list, statuses: dict):
+    started = time.perf_counter()
+    response = await client.post("/auth/login", data={"username": username, "password": PASSWORD})
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+async def _probe(client, stop: asyncio.Event, latencies: list):
+    # A cheap endpoint hit throughout the burst: if bcrypt ran on the event
+    # loop its latency would track the login latency.
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+async def run_level(usernames: list, concurrency: int, rounds: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies, probe_latencies, statuses = [], [], {}
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, stop, probe_latencies))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(
+                _login(client, usernames[i % len(usernames)], latencies, statuses)
+                for i in range(concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    return {
+        "benchmark": "login",
+        "concurrency": concurrency,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        **latency_summary(latencies, elapsed),
+        "root_p99_ms": round(percentile(probe_latencies, 99) * 1000, 1),
+    }
+
+def run(levels: list, rounds: int) -> list:
+    usernames = create_users(max(levels))
+    return [asyncio.run(run_level(usernames, level, rounds)) for level in levels]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure /auth/login latency under concurrent users.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128],
+                        help="Concurrent logins per round; one measurement per value.")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds of concurrent logins per measurement.")
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.concurrency, args.rounds)
+    for r in results:
+        print(f"concurrency {r['concurrency']:>4}  p50 {r['p50_ms']:>8.1f} ms  p95 {r['p95_ms']:>8.1f} ms  "
+              f"p99 {r['p99_ms']:>8.1f} ms  {r['requests_per_sec']:>7.1f}/s  / p99 {r['root_p99_ms']:>6.1f} ms  {r['statuses']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
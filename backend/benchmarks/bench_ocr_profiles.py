@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import tempfile
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from bench_parser import ISSUER_HEADERS
+from bench_pipeline import time_extraction
+from synthetic import scanned_pdf
+
+from app.core.config import settings
+from app.core.extraction import extract_with_ocr
+from app.core.ocr import PROFILE_ACCURATE, PROFILE_FAST
+from app.core.parser import missing_fields
+
+# profile, whether a fast pass may fall back to accurate
+CONFIGURATIONS = {
+    "fast": (PROFILE_FAST, False),
+    "fast+fallback": (PROFILE_FAST, True),
+    "accurate": (PROFILE_ACCURATE, False),
+}
+
+def run(pages: int, repeat: int, configurations: list) -> list:
+    """
+    OCRs the scanned statement of every issuer with each profile and reports
+    the time taken and how many required fields were found. Errors (e.g. no
+    tesseract installed) are reported instead of a time.
+    """
+    required = settings.TEXT_LAYER_REQUIRED_FIELDS
+    fallback_setting = settings.OCR_FALLBACK_TO_ACCURATE
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_ocr_profiles_") as tmp:
+        for issuer in ISSUER_HEADERS:
+            pdf_path = os.path.join(tmp, "scanned.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(scanned_pdf(issuer, pages))
+            for name in configurations:
+                profile, fallback = CONFIGURATIONS[name]
+                record = {"benchmark": "ocr_profiles", "issuer": issuer, "profile": name, "pages": pages}
+                settings.OCR_FALLBACK_TO_ACCURATE = fallback
+                try:
+                    seconds, result = time_extraction(lambda path: extract_with_ocr(path, profile=profile), pdf_path, repeat)
+                except Exception as e:
+                    record["error"] = f"{type(e).__name__}: {e}"
+                else:
+                    record.update({
+                        "ms": round(seconds * 1000, 1),
+                        "ms_per_page": round(seconds * 1000 / pages, 1),
+                        "ocr_profile": result.ocr_profile,
+                        "fields_found": len(required) - len(missing_fields(result.data, required)),
+                        "issuer_detected": result.data.get("issuer") == issuer,
+                    })
+                finally:
+                    settings.OCR_FALLBACK_TO_ACCURATE = fallback_setting
+                results.append(record)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the OCR profiles on scanned synthetic statements.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per statement.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the best one is reported.")
+    parser.add_argument("--profile", nargs="+", choices=list(CONFIGURATIONS), default=list(CONFIGURATIONS))
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.repeat, args.profile)
+    for r in results:
+        outcome = r.get("error") or (f"{r['ms']:>9.1f} ms  {r['ms_per_page']:>8.1f} ms/page  "
+                                     f"fields {r['fields_found']}/{len(settings.TEXT_LAYER_REQUIRED_FIELDS)}  used {r['ocr_profile']}")
+        print(f"{r['issuer']:<18} {r['profile']:<14} {outcome}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
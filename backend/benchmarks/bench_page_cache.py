@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from bench_parser import ISSUER_HEADERS
+from synthetic import scanned_pdf
+
+from app.core import pages as pages_module
+from app.core.config import settings
+from app.core.extraction import extract_with_ocr
+from app.core.ocr import PROFILE_ACCURATE
+from app.core.page_cache import PageCache, page_keys
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def run(pages: int) -> list:
+    """
+    Measures what fingerprinting a scanned statement's pages costs, then OCRs
+    it twice: once with an empty page cache and once with its pages cached,
+    as for a statement whose pages were all seen before. An OCR run that
+    cannot happen here (no tesseract) is reported with its error.
+    """
+    # Pages are OCR'd in this process, against an empty cache of its own
+    page_jobs, cache = settings.PAGE_JOBS, pages_module.page_cache
+    settings.PAGE_JOBS = 1
+    with tempfile.TemporaryDirectory(prefix="bench_page_cache_") as tmp:
+        pages_module.page_cache = PageCache(os.path.join(tmp, "page_cache.db"), settings.PAGE_CACHE_MAX_BYTES)
+        try:
+            results = [_run_issuer(tmp, seed, issuer, pages) for seed, issuer in enumerate(ISSUER_HEADERS)]
+        finally:
+            settings.PAGE_JOBS, pages_module.page_cache = page_jobs, cache
+    return results
+
+def _run_issuer(tmp: str, seed: int, issuer: str, pages: int) -> dict:
+    pdf_path = os.path.join(tmp, f"statement_{seed}.pdf")
+    with open(pdf_path, "wb") as f:
+        # A new seed per issuer, so no page is cached before its cold run
+        f.write(scanned_pdf(issuer, pages, seed=seed))
+
+    fingerprint_seconds, _ = _timed(page_keys, pdf_path, None, PROFILE_ACCURATE)
+    record = {
+        "benchmark": "page_cache", "issuer": issuer, "pages": pages,
+        "fingerprint_ms_per_page": round(fingerprint_seconds * 1000 / pages, 3),
+    }
+    try:
+        cold_seconds, _ = _timed(extract_with_ocr, pdf_path)
+        warm_seconds, warm = _timed(extract_with_ocr, pdf_path)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    else:
+        record.update({
+            "cold_ms": round(cold_seconds * 1000, 1),
+            "warm_ms": round(warm_seconds * 1000, 1),
+            "ocr_pages": len(warm.ocr_pages),
+            "cached_pages": len(warm.ocr_cached_pages),
+        })
+    return record
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the per-page OCR cache on synthetic scanned statements.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per statement.")
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.pages)
+    for r in results:
+        outcome = r.get("error") or (f"cold {r['cold_ms']:>9.1f} ms  warm {r['warm_ms']:>9.1f} ms  "
+                                     f"cached {r['cached_pages']}/{r['ocr_pages']} pages")
+        print(f"{r['issuer']:<18} fingerprint {r['fingerprint_ms_per_page']:>7.3f} ms/page  {outcome}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
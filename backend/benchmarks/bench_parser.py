@@ -0,0 +1,104 @@
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.parser import extract_data_from_text
+
+ISSUER_HEADERS = {
+    "HDFC": "HDFC Bank Credit Card Statement\nRegalia",
+    "ICICI": "ICICI Bank Credit Card Statement\nPlatinum",
+    "SBI": "SBI Card Statement\nSignature",
+    "Axis Bank": "Axis Bank Credit Card Statement\nPlatinum",
+    "American Express": "American Express Statement\nPlatinum",
+}
+
+def legacy_extract_data_from_text(text: str) -> dict:
+    """The regex chain the rule engine replaced, kept here as the baseline."""
+    issuer = "Unknown"
+    if re.search(r'HDFC Bank', text, re.IGNORECASE): issuer = "HDFC"
+    elif re.search(r'ICICI Bank', text, re.IGNORECASE): issuer = "ICICI"
+    elif re.search(r'State Bank of India|SBI', text, re.IGNORECASE): issuer = "SBI"
+    elif re.search(r'Axis Bank', text, re.IGNORECASE): issuer = "Axis Bank"
+    elif re.search(r'American Express|AMEX', text, re.IGNORECASE): issuer = "American Express"
+    card_no_pattern = re.search(r'Card No.*?(\d{4})', text, re.IGNORECASE | re.DOTALL)
+    due_date_pattern = re.search(r'Payment Due Date.*?(\d{2}[-/]\d{2}[-/]\d{4})', text, re.IGNORECASE | re.DOTALL)
+    total_due_pattern = re.search(r'Total Amount Due.*?([0-9,]+\.\d{2})', text, re.IGNORECASE | re.DOTALL)
+    statement_date_pattern = re.search(r'Statement Date.*?(\d{2}[-/]\d{2}[-/]\d{4})', text, re.IGNORECASE | re.DOTALL)
+    card_variant_pattern = re.search(r'\b(Platinum|Millennia|Regalia|Infinia|Signature|Ultimate)\b', text, re.IGNORECASE)
+    return {
+        "issuer": issuer, "last_4_digits": card_no_pattern.group(1) if card_no_pattern else "N/A",
+        "card_variant": card_variant_pattern.group(1) if card_variant_pattern else "N/A",
+        "billing_cycle": statement_date_pattern.group(1) if statement_date_pattern else "N/A",
+        "payment_due_date": due_date_pattern.group(1) if due_date_pattern else "N/A",
+        "total_balance": total_due_pattern.group(1) if total_due_pattern else "N/A",
+    }
+
+def synthetic_statement(issuer: str, size: int, seed: int = 0, with_header: bool = True) -> str:
+    """
+    Builds a statement-like text of roughly `size` characters: a summary
+    block followed by transaction lines. Without the header the summary
+    labels are present but their values are missing, which is the worst
+    case for the old unbounded `.*?` patterns.
+    """
+    rng = random.Random(seed)
+    if with_header:
+        header = (
+            f"{ISSUER_HEADERS[issuer]}\nCard No: XXXX XXXX XXXX {rng.randint(1000, 9999)}\n"
+            "Statement Date: 15/09/2025\nPayment Due Date: 05/10/2025\nTotal Amount Due: 45,210.50\n"
+        )
+    else:
+        header = f"{ISSUER_HEADERS[issuer]}\nCard No:\nStatement Date:\nPayment Due Date:\nTotal Amount Due:\n"
+    merchants = ["AMAZON PAY", "SWIGGY", "UBER INDIA", "FLIPKART", "IRCTC", "BIGBASKET", "ZOMATO", "SHELL FUEL"]
+    lines = [header]
+    length = len(header)
+    while length < size:
+        line = f"{rng.randint(1, 28):02d}/09/2025 {rng.choice(merchants)} REF{rng.randint(10**7, 10**8)} {rng.randint(10, 50000):,}\n"
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)
+
+def time_function(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run(size: int, repeat: int) -> list:
+    results = []
+    for issuer in ISSUER_HEADERS:
+        for with_header in (True, False):
+            text = synthetic_statement(issuer, size, with_header=with_header)
+            legacy = time_function(legacy_extract_data_from_text, text, repeat)
+            engine = time_function(extract_data_from_text, text, repeat)
+            results.append({
+                "benchmark": "parser",
+                "issuer": issuer,
+                "case": "complete" if with_header else "missing_values",
+                "text_bytes": len(text),
+                "legacy_ms": round(legacy * 1000, 3),
+                "rule_engine_ms": round(engine * 1000, 3),
+                "speedup": round(legacy / engine, 1) if engine else None,
+            })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the rule engine against the legacy regex chain.")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="Characters of synthetic text per statement.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best one is reported.")
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat)
+    for r in results:
+        print(f"{r['issuer']:<18} {r['case']:<15} legacy {r['legacy_ms']:>10.3f} ms   rule engine {r['rule_engine_ms']:>8.3f} ms   x{r['speedup']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
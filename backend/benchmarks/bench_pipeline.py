@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from bench_parser import ISSUER_HEADERS
+from synthetic import scanned_pdf, text_pdf
+
+from app.core.extraction import extract_text_first, extract_with_ocr
+
+STRATEGIES = {
+    "text_first": extract_text_first,
+    "ocr": extract_with_ocr,
+}
+
+def time_extraction(extract, pdf_path: str, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extract(pdf_path)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def run(pages: int, repeat: int, strategies: list) -> list:
+    """
+    Times each extraction strategy on the text-layer and scanned variant of
+    every issuer's statement. A strategy that cannot run here (e.g. OCR
+    without tesseract installed) is reported with its error instead of a time.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        for issuer in ISSUER_HEADERS:
+            for variant, render in (("text", text_pdf), ("scanned", scanned_pdf)):
+                pdf_path = os.path.join(tmp, f"{variant}.pdf")
+                with open(pdf_path, "wb") as f:
+                    f.write(render(issuer, pages))
+                for name in strategies:
+                    record = {"benchmark": "pipeline", "issuer": issuer, "variant": variant, "strategy": name, "pages": pages}
+                    try:
+                        seconds, result = time_extraction(STRATEGIES[name], pdf_path, repeat)
+                    except Exception as e:
+                        record["error"] = f"{type(e).__name__}: {e}"
+                    else:
+                        record.update({
+                            "ms": round(seconds * 1000, 1),
+                            "ms_per_page": round(seconds * 1000 / pages, 1),
+                            "method": result.method,
+                            "ocr_pages": len(result.ocr_pages),
+                            "issuer_detected": result.data.get("issuer") == issuer,
+                        })
+                    results.append(record)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare text-layer and OCR extraction on synthetic statements.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per statement.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the best one is reported.")
+    parser.add_argument("--strategy", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.repeat, args.strategy)
+    for r in results:
+        outcome = r.get("error") or f"{r['ms']:>9.1f} ms  {r['ms_per_page']:>8.1f} ms/page  method {r['method']}"
+        print(f"{r['issuer']:<18} {r['variant']:<8} {r['strategy']:<10} {outcome}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from bench_parser import ISSUER_HEADERS
+from synthetic import LINES_PER_PAGE, text_pdf
+
+import pdfplumber
+
+from app.core.transactions import parse_rows, parse_text, rows_from_words
+
+def _timed(func, *args, repeat: int = 1):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def _read_rows(pdf_path: str) -> list:
+    with pdfplumber.open(pdf_path) as pdf:
+        return [row for page in pdf.pages for row in rows_from_words(page.extract_words())]
+
+def _read_text(pdf_path: str) -> str:
+    with pdfplumber.open(pdf_path) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+def _row_dicts_bytes(transactions) -> int:
+    """Size of the same transactions as a list of dicts, the obvious alternative."""
+    rows = [{"posted_on": d, "description": m, "amount_paise": a} for d, m, a in transactions.rows()]
+    return sys.getsizeof(rows) + sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values()) for row in rows
+    )
+
+def run(pages: int, repeat: int) -> list:
+    """
+    Times reading the words of a statement, which is dominated by pdfplumber,
+    separately from parsing them into transactions, and compares the size of
+    the columnar result with a list of dicts.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_transactions_") as tmp:
+        for issuer in ISSUER_HEADERS:
+            pdf_path = os.path.join(tmp, "statement.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(text_pdf(issuer, pages))
+            words_seconds, rows = _timed(_read_rows, pdf_path)
+            text_seconds, text = _timed(_read_text, pdf_path)
+            parse_seconds, transactions = _timed(parse_rows, rows, issuer, repeat=repeat)
+            parse_text_seconds, _ = _timed(parse_text, text, issuer, repeat=repeat)
+            columns_bytes = sum(a.buffer_info()[1] * a.itemsize for a in (
+                transactions.dates, transactions.amounts, transactions.merchant_ids,
+            )) + sum(sys.getsizeof(m) for m in transactions.merchants)
+            results.append({
+                "benchmark": "transactions", "issuer": issuer, "pages": pages,
+                "lines": pages * LINES_PER_PAGE, "transactions": len(transactions),
+                "read_words_ms": round(words_seconds * 1000, 1),
+                "read_text_ms": round(text_seconds * 1000, 1),
+                "parse_rows_ms": round(parse_seconds * 1000, 3),
+                "parse_text_ms": round(parse_text_seconds * 1000, 3),
+                "columns_bytes": columns_bytes,
+                "pickled_bytes": len(pickle.dumps(transactions)),
+                "row_dicts_bytes": _row_dicts_bytes(transactions),
+            })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure transaction extraction on synthetic statements.")
+    parser.add_argument("--pages", type=int, default=34, help="Pages per statement (30 lines each).")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parse measurement; the best one is reported.")
+    parser.add_argument("--json", help="Write the results to this file as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.repeat)
+    for r in results:
+        print(f"{r['issuer']:<18} {r['transactions']:>5} rows  words {r['read_words_ms']:>8.1f} ms  text {r['read_text_ms']:>8.1f} ms  "
+              f"parse {r['parse_rows_ms']:>7.3f} ms  columns {r['columns_bytes']:>7} B  dicts {r['row_dicts_bytes']:>8} B")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,87 @@
+import argparse
+import json
+
+from common import run_metadata
+
+# Fields that hold measurements or outcomes; the remaining fields identify
+# a measurement so it can be paired with the same one from another run
+METRIC_SUFFIXES = ("_ms", "_per_sec", "_bytes")
+METRIC_FIELDS = ("ms", "ms_per_page", "speedup")
+OUTCOME_FIELDS = (
+    "statuses", "requests", "error", "method", "ocr_pages", "issuer_detected", "text_bytes",
+    "ocr_profile", "fields_found", "transactions", "lines", "cached_pages",
+)
+
+def _is_metric(key: str) -> bool:
+    return key not in OUTCOME_FIELDS and (key.endswith(METRIC_SUFFIXES) or key in METRIC_FIELDS)
+
+def _identity(record: dict) -> tuple:
+    return tuple(sorted(
+        (k, v) for k, v in record.items()
+        if not _is_metric(k) and k not in OUTCOME_FIELDS
+    ))
+
+def compare(baseline: dict, current: dict) -> list:
+    """Pairs up measurements from two runs and reports the relative change of each metric."""
+    previous = {_identity(r): r for r in baseline["results"]}
+    changes = []
+    for record in current["results"]:
+        before = previous.get(_identity(record))
+        if before is None:
+            continue
+        for key, value in record.items():
+            old = before.get(key)
+            if _is_metric(key) and isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                changes.append({
+                    "benchmark": dict(_identity(record)),
+                    "metric": key, "before": old, "after": value,
+                    "change_pct": round((value - old) / old * 100, 1),
+                })
+    return changes
+
+def run(args) -> dict:
+    results = []
+    if "parser" in args.suites:
+        import bench_parser
+        results += bench_parser.run(args.parser_size, repeat=3)
+    if "pipeline" in args.suites:
+        import bench_pipeline
+        results += bench_pipeline.run(args.pages, repeat=1, strategies=list(bench_pipeline.STRATEGIES))
+    if "transactions" in args.suites:
+        import bench_transactions
+        results += bench_transactions.run(pages=34, repeat=3)
+    if "ocr_profiles" in args.suites:
+        import bench_ocr_profiles
+        results += bench_ocr_profiles.run(args.pages, repeat=1, configurations=list(bench_ocr_profiles.CONFIGURATIONS))
+    if "page_cache" in args.suites:
+        import bench_page_cache
+        results += bench_page_cache.run(args.pages)
+    if "api" in args.suites:
+        import bench_api
+        results += bench_api.run(args)
+    return {"metadata": run_metadata(), "results": results}
+
+if __name__ == "__main__":
+    import bench_api
+
+    parser = argparse.ArgumentParser(description="Run the benchmark suites and write one JSON report.")
+    parser.add_argument("--suites", nargs="+", choices=["parser", "pipeline", "transactions", "ocr_profiles", "page_cache", "api"],
+                        default=["parser", "pipeline", "transactions", "ocr_profiles", "page_cache", "api"])
+    parser.add_argument("--parser-size", type=int, default=256 * 1024, help="Characters of synthetic text per parser measurement.")
+    bench_api.add_arguments(parser)
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the report.")
+    parser.add_argument("--compare", help="A previous report; prints how each metric changed against it.")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} measurement(s) to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for change in compare(baseline, report):
+            labels = " ".join(str(v) for k, v in change["benchmark"].items() if k != "benchmark")
+            print(f"{change['benchmark']['benchmark']:<9} {labels:<60} {change['metric']:<16} "
+                  f"{change['before']:>10} -> {change['after']:>10}  ({change['change_pct']:+.1f}%)")
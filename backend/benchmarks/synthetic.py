@@ -0,0 +1,89 @@
+import argparse
+import io
+import random
+from pathlib import Path
+
+from fpdf import FPDF
+from PIL import Image, ImageDraw, ImageFont
+
+from common import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+from bench_parser import ISSUER_HEADERS
+
+MERCHANTS = ["AMAZON PAY", "SWIGGY", "UBER INDIA", "FLIPKART", "IRCTC", "BIGBASKET", "ZOMATO", "SHELL FUEL"]
+LINES_PER_PAGE = 30
+# Scanned pages are rendered at 150 dpi A4
+SCAN_SIZE = (1240, 1754)
+SCAN_MARGIN = 90
+
+def statement_lines(issuer: str, pages: int, seed: int = 0) -> list:
+    """Text of a statement for `issuer`: a summary block followed by transactions."""
+    rng = random.Random(seed)
+    lines = ISSUER_HEADERS[issuer].split("\n") + [
+        f"Card No: XXXX XXXX XXXX {rng.randint(1000, 9999)}",
+        "Statement Date: 15/09/2025",
+        "Payment Due Date: 05/10/2025",
+        f"Total Amount Due: {rng.randint(1000, 99999):,}.{rng.randint(0, 99):02d}",
+    ]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(f"{rng.randint(1, 28):02d}/09/2025 {rng.choice(MERCHANTS)} REF{rng.randint(10**7, 10**8)} {rng.randint(10, 50000):,}.00")
+    return lines
+
+def _paged(lines: list) -> list:
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+def pdf_from_pages(pages: list) -> bytes:
+    """A PDF with an embedded text layer, one page per list of lines."""
+    pdf = FPDF()
+    pdf.set_font("Arial", size=11)
+    for page in pages:
+        pdf.add_page()
+        for line in page:
+            pdf.cell(190, 8, txt=line, ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+def text_pdf(issuer: str, pages: int = 2, seed: int = 0) -> bytes:
+    """A statement PDF with an embedded text layer."""
+    return pdf_from_pages(_paged(statement_lines(issuer, pages, seed)))
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no scalable default font
+        return ImageFont.load_default()
+
+def scanned_pdf(issuer: str, pages: int = 2, seed: int = 0) -> bytes:
+    """The same statement as images only, like a scanned paper statement, so it needs OCR."""
+    font = _font(28)
+    images = []
+    for page in _paged(statement_lines(issuer, pages, seed)):
+        image = Image.new("L", SCAN_SIZE, 255)
+        draw = ImageDraw.Draw(image)
+        for i, line in enumerate(page):
+            draw.text((SCAN_MARGIN, SCAN_MARGIN + i * 50), line, fill=0, font=font)
+        images.append(image)
+    output = io.BytesIO()
+    images[0].save(output, "PDF", save_all=True, append_images=images[1:], resolution=150)
+    return output.getvalue()
+
+def write_corpus(output_dir: str, pages: int = 2, copies: int = 1) -> list:
+    """Writes a text and a scanned statement per issuer (times `copies`) and returns their paths."""
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for issuer in ISSUER_HEADERS:
+        slug = issuer.lower().replace(" ", "_")
+        for copy in range(copies):
+            for kind, render in (("text", text_pdf), ("scanned", scanned_pdf)):
+                path = out / f"{slug}_{kind}_{copy}.pdf"
+                path.write_bytes(render(issuer, pages, seed=copy))
+                paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic statement PDFs for every supported issuer.")
+    parser.add_argument("output_dir", help="Directory the PDFs are written to.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per statement.")
+    parser.add_argument("--copies", type=int, default=1, help="Statements per issuer and variant, each with different values.")
+    args = parser.parse_args()
+    paths = write_corpus(args.output_dir, args.pages, args.copies)
+    print(f"Wrote {len(paths)} statement(s) to {args.output_dir}")
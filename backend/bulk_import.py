@@ -0,0 +1,229 @@
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from app.core.cache import extraction_cache
+from app.core.extraction import statement_transactions
+from app.core.ingest import CHUNK_SIZE
+from app.core.jobs import run_extraction
+from app.core.persistence import ParsedUpload, existing_hashes, save_uploads
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.models.models import Base, User
+
+def _copy_to_scratch(src, scratch_dir):
+    """Copies a file object to a new file in `scratch_dir`; returns its path and SHA-256 hex digest."""
+    digest = hashlib.sha256()
+    fd, dest_path = tempfile.mkstemp(suffix=".pdf", dir=scratch_dir)
+    with os.fdopen(fd, "wb") as out:
+        while chunk := src.read(CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+    return dest_path, digest.hexdigest()
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def iter_statements(sources, scratch_dir):
+    """
+    Yields (name, path, file_hash) for every PDF in the given directories,
+    glob patterns, zip and tar archives. `name` is the file's own name, or
+    the member's for archives, as it would be for an upload. Archive members
+    are copied to `scratch_dir` one at a time so the workers can open them
+    by path.
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for path in sorted(Path(source).rglob("*")):
+                if path.suffix.lower() == ".pdf" and path.is_file():
+                    yield path.name, str(path), _hash_file(path)
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                        continue
+                    with archive.open(member) as src:
+                        dest, file_hash = _copy_to_scratch(src, scratch_dir)
+                    yield posixpath.basename(member.filename), dest, file_hash
+        elif os.path.isfile(source) and tarfile.is_tarfile(source):
+            with tarfile.open(source) as archive:
+                for member in archive:
+                    if not member.isfile() or not member.name.lower().endswith(".pdf"):
+                        continue
+                    with archive.extractfile(member) as src:
+                        dest, file_hash = _copy_to_scratch(src, scratch_dir)
+                    yield posixpath.basename(member.name), dest, file_hash
+        elif os.path.isfile(source):
+            yield os.path.basename(source), source, _hash_file(source)
+        else:
+            matches = sorted(glob.glob(source, recursive=True))
+            if not matches:
+                print(f"{source}: no such file, directory or pattern")
+            for path in matches:
+                if path.lower().endswith(".pdf") and os.path.isfile(path):
+                    yield os.path.basename(path), path, _hash_file(path)
+
+class BulkImporter:
+    """
+    Extracts statements on a process pool and saves them for one user in
+    batches. Files whose hash the user already has are skipped, so an
+    interrupted import can simply be run again.
+    """
+
+    def __init__(self, user, workers, batch_size):
+        self.user = user
+        self.workers = workers
+        self.batch_size = batch_size
+        self.seen = set()
+        self.batch = []
+        self.pages = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failures = []
+
+    def _record_failure(self, name, error):
+        print(f"{name}: failed ({error})")
+        self.failures.append({"file": name, "error": error})
+
+    def _flush(self, db):
+        if not self.batch:
+            return
+        parsed = [
+            ParsedUpload(name, file_hash, outcome["data"], outcome.get("transactions"))
+            for name, file_hash, outcome in self.batch
+        ]
+        for _, file_hash, outcome in self.batch:
+            if "text" in outcome:
+                extraction_cache.put(db, file_hash, outcome["text"], outcome["data"], outcome["method"])
+        saved, failed = save_uploads(db, self.user.id, parsed)
+        db.commit()
+        self.imported += len(saved)
+        for item, error in failed:
+            self._record_failure(item.filename, error)
+        self.batch = []
+
+    def _collect(self, db, future, name, file_hash, path, scratch_dir):
+        try:
+            outcome = future.result()
+        except Exception as e:
+            self._record_failure(name, str(e) or type(e).__name__)
+            return
+        finally:
+            if path.startswith(scratch_dir): os.remove(path)
+        self._add(db, name, file_hash, outcome)
+
+    def _add(self, db, name, file_hash, outcome):
+        self.pages += outcome["pages"]
+        self.batch.append((name, file_hash, outcome))
+        if len(self.batch) >= self.batch_size:
+            self._flush(db)
+
+    def run(self, sources):
+        scratch_dir = tempfile.mkdtemp(prefix="bulk_import_")
+        db = SessionLocal()
+        in_flight = {}
+        started = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                for group in _grouped(iter_statements(sources, scratch_dir), self.batch_size):
+                    known = existing_hashes(db, self.user.id, [file_hash for _, _, file_hash in group])
+                    for name, path, file_hash in group:
+                        if file_hash in known or file_hash in self.seen:
+                            self.skipped += 1
+                            if path.startswith(scratch_dir): os.remove(path)
+                            continue
+                        self.seen.add(file_hash)
+
+                        cached = extraction_cache.get(db, file_hash)
+                        if cached is not None:
+                            transactions = statement_transactions(path, cached.data, cached.text)
+                            self._add(db, name, file_hash, {"data": cached.data, "method": cached.method, "pages": 0, "transactions": transactions})
+                            if path.startswith(scratch_dir): os.remove(path)
+                            continue
+
+                        # Keep a bounded number of files queued ahead of the workers
+                        while len(in_flight) >= self.workers * 2:
+                            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                self._collect(db, future, *in_flight.pop(future), scratch_dir)
+                        in_flight[pool.submit(run_extraction, path)] = (name, file_hash, path)
+                    db.commit()  # end the read transaction between groups
+
+                for future in list(in_flight):
+                    self._collect(db, future, *in_flight.pop(future), scratch_dir)
+                self._flush(db)
+        finally:
+            db.close()
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        return time.perf_counter() - started
+
+def _grouped(items, size):
+    group = []
+    for item in items:
+        group.append(item)
+        if len(group) == size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+def bulk_import(sources, username, workers, batch_size, report=None):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+    finally:
+        db.close()
+    if user is None:
+        print(f"User '{username}' does not exist.")
+        return 1
+
+    print(f"--- Importing statements for '{username}' with {workers} worker(s), batches of {batch_size} ---")
+    importer = BulkImporter(user, workers, batch_size)
+    elapsed = importer.run(sources)
+
+    print("--- Import Complete ---")
+    print(f"Imported: {importer.imported}  Skipped (already uploaded): {importer.skipped}  Failed: {len(importer.failures)}")
+    print(f"Elapsed: {elapsed:.1f}s  {importer.imported / elapsed:.2f} files/sec  {importer.pages / elapsed:.2f} pages/sec")
+    if importer.failures:
+        print("Failures:")
+        for failure in importer.failures:
+            print(f"    {failure['file']}: {failure['error']}")
+    if report:
+        with open(report, "w") as f:
+            json.dump({
+                "imported": importer.imported, "skipped": importer.skipped,
+                "pages": importer.pages, "seconds": round(elapsed, 3),
+                "failures": importer.failures,
+            }, f, indent=2)
+    return 1 if importer.failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a directory, glob or zip/tar archive of statements for a user.")
+    parser.add_argument("sources", nargs="+", help="PDF files, directories, glob patterns or zip/tar archives.")
+    parser.add_argument("--user", required=True, help="Username the statements are imported for.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of extraction processes.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Files saved per database commit.")
+    parser.add_argument("--report", help="Write a JSON summary with the failures to this file.")
+    args = parser.parse_args()
+    sys.exit(bulk_import(args.sources, args.user, args.workers, args.batch_size, args.report))
@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from app.core.config import settings
+from app.core.pages import extract_pages
+from app.core.parser import extract_data_from_text
+
+def extract_files(paths, jobs, ocr, output_dir=None):
+    print(f"--- Extracting {len(paths)} file(s) with {jobs} job(s), OCR {'on' if ocr else 'off'} ---")
+    report = []
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            results = extract_pages(str(path), ocr=ocr, jobs=jobs)
+        except Exception as e:
+            print(f"{path}: failed ({e})")
+            report.append({"file": str(path), "error": str(e)})
+            continue
+
+        text = "".join(r.text + "\n" for r in results if r.text)
+        elapsed = time.perf_counter() - started
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            (Path(output_dir) / f"{path.stem}.txt").write_text(text)
+
+        print(f"{path}: {len(results)} page(s) in {elapsed:.2f}s")
+        for r in results:
+            print(f"    page {r.number}: {r.seconds:.2f}s")
+        report.append({
+            "file": str(path),
+            "seconds": round(elapsed, 3),
+            "pages": [{"page": r.number, "seconds": round(r.seconds, 3)} for r in results],
+            "data": extract_data_from_text(text),
+        })
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text from statement PDFs page-parallel, outside the API.")
+    parser.add_argument("paths", nargs="+", type=Path, help="PDF files to extract.")
+    parser.add_argument("--jobs", type=int, default=settings.PAGE_JOBS, help="Number of pages processed concurrently.")
+    parser.add_argument("--no-ocr", action="store_true", help="Read the embedded text layer instead of running OCR.")
+    parser.add_argument("--output-dir", help="Write each file's extracted text to this directory.")
+    parser.add_argument("--report", help="Write a JSON report with per-page timings to this file.")
+    args = parser.parse_args()
+
+    report = extract_files(args.paths, args.jobs, not args.no_ocr, args.output_dir)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
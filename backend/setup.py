@@ -5,6 +5,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent))
 
 from app.db.session import engine
+from app.db.migrations import run_migrations
 from app.models.models import User, UserRole, Base
 from app.core.auth import get_password_hash
 from app.db.session import SessionLocal
@@ -14,6 +15,7 @@ def setup_database_and_admin(username, password):
     
     print("Initializing database and creating all tables...")
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     print("Tables created successfully.")
     
     db = SessionLocal()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its settings and creates its tables on import, so the test
+# database has to be configured before any test module imports it.
+_tmp = tempfile.mkdtemp(prefix="credit_parser_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("JOB_QUEUE_ENABLED", "false")
+os.environ.setdefault("JOB_SPOOL_DIR", os.path.join(_tmp, "job_spool"))
+os.environ.setdefault("PAGE_CACHE_PATH", os.path.join(_tmp, "page_cache.db"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _BACKEND_DIR)
+# Test PDFs come from the benchmarks' generator, so both use the same documents
+sys.path.insert(1, os.path.join(_BACKEND_DIR, "benchmarks"))
+
+@pytest.fixture
+def make_pdf():
+    """Builds a text-layer PDF, one page per list of lines: make_pdf(["line", ...], ...) -> bytes."""
+    from synthetic import pdf_from_pages
+    return lambda *pages: pdf_from_pages(list(pages))
+
+@pytest.fixture
+def statement_pdf():
+    """Builds a synthetic text-layer statement: statement_pdf("HDFC", pages=2, seed=0) -> bytes."""
+    from synthetic import text_pdf
+    return text_pdf
+
+@pytest.fixture
+def api():
+    """Sends one request to the app: api("get", "/files/history", headers=...) -> httpx.Response."""
+    import asyncio
+
+    import httpx
+
+    from app.main import app
+
+    async def send(method: str, path: str, **kwargs):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60) as client:
+            return await client.request(method, path, **kwargs)
+
+    return lambda method, path, **kwargs: asyncio.run(send(method, path, **kwargs))
+
+@pytest.fixture
+def verified_user():
+    """Creates a verified user; returns (user id, Authorization headers)."""
+    import uuid
+
+    from app.core.auth import create_access_token
+    from app.db.session import SessionLocal
+    from app.main import app  # noqa: F401  (creates the tables)
+    from app.models import models
+
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    db = SessionLocal()
+    try:
+        user = models.User(username=username, hashed_password="not-used", is_verified=True)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+    return user_id, {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
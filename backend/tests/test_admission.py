@@ -0,0 +1,150 @@
+import asyncio
+import io
+import uuid
+
+import httpx
+import pytest
+
+from app.core.admission import DatabaseBackend, FairScheduler, MemoryBackend, RateLimited, SubmissionTooLarge, charge_quota, statement_slots
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+# The database backend runs against the test database, standing in for the
+# database several nodes would share
+BACKENDS = [MemoryBackend, DatabaseBackend]
+
+@pytest.fixture(params=BACKENDS, ids=lambda backend: backend.__name__)
+def backend(request):
+    return request.param()
+
+def _key() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+def test_bucket_refuses_once_empty_and_says_when_to_retry(backend):
+    key = _key()
+    assert backend.take(key, 3, rate=1, capacity=5) == 0
+    assert backend.take(key, 2, rate=1, capacity=5) == 0
+    wait = backend.take(key, 2, rate=1, capacity=5)
+    assert 1 < wait <= 2
+    # Tokens given back can be spent again
+    assert backend.take(key, -2, rate=1, capacity=5) == 0
+    assert backend.take(key, 2, rate=1, capacity=5) == 0
+
+def test_slots_are_limited_until_released(backend):
+    pool = _key()
+    first, second = backend.acquire_slot(pool, 2), backend.acquire_slot(pool, 2)
+    assert first and second
+    assert backend.acquire_slot(pool, 2) is None
+    backend.release_slot(pool, first)
+    assert backend.acquire_slot(pool, 2) is not None
+
+@pytest.mark.parametrize("ocr_slots, page_jobs, statements", [(8, 4, 2), (8, 1, 8), (2, 4, 1)])
+def test_every_statement_counts_its_page_jobs_against_the_slots(monkeypatch, ocr_slots, page_jobs, statements):
+    monkeypatch.setattr(settings, "OCR_SLOTS", ocr_slots)
+    monkeypatch.setattr(settings, "PAGE_JOBS", page_jobs)
+    assert statement_slots() == statements
+
+def test_charge_quota_spends_nothing_when_refused(monkeypatch):
+    monkeypatch.setattr(settings, "USER_FILES_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "USER_FILES_BURST", 10)
+    monkeypatch.setattr(settings, "USER_PAGES_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "USER_PAGES_BURST", 10)
+    backend = MemoryBackend()
+    charge_quota(backend, 1, files=0, pages=5)
+    with pytest.raises(RateLimited) as refused:
+        charge_quota(backend, 1, files=2, pages=6)
+    assert "pages" in refused.value.detail
+    # The two files were given back, so ten can still be submitted
+    charge_quota(backend, 1, files=10, pages=5)
+
+def test_submission_over_the_burst_is_too_large_rather_than_rate_limited(monkeypatch):
+    monkeypatch.setattr(settings, "USER_FILES_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "USER_FILES_BURST", 10)
+    monkeypatch.setattr(settings, "USER_PAGES_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "USER_PAGES_BURST", 10)
+    backend = MemoryBackend()
+    with pytest.raises(SubmissionTooLarge) as refused:
+        charge_quota(backend, 1, files=2, pages=11)
+    assert "pages" in refused.value.detail
+    charge_quota(backend, 1, files=10, pages=10)
+
+def test_held_slots_are_renewed_until_released():
+    backend = DatabaseBackend(lease_seconds=0.3)
+    pool = _key()
+
+    async def scenario():
+        scheduler = FairScheduler(backend, pool, limit=1, per_user=1, poll_interval=0.05, renew_interval=0.05)
+        lease = await scheduler.acquire(1)
+        # Held for several lease lifetimes, so another node still finds no free slot
+        await asyncio.sleep(1)
+        taken_by_other = backend.acquire_slot(pool, 1)
+        await scheduler.release(1, lease)
+        return taken_by_other
+
+    assert asyncio.run(scenario()) is None
+    assert backend.acquire_slot(pool, 1) is not None
+
+def test_waiting_users_are_served_round_robin():
+    async def scenario():
+        scheduler = FairScheduler(MemoryBackend(), "ocr", limit=1, per_user=1, poll_interval=0.05)
+        order = []
+
+        async def run(user_id: int, name: str):
+            lease = await scheduler.acquire(user_id)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            await scheduler.release(user_id, lease)
+
+        # User 1 submits a batch of three before user 2 submits one file
+        tasks = [asyncio.create_task(run(1, f"batch-{n}")) for n in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(run(2, "single")))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["batch-0", "single", "batch-1", "batch-2"]
+
+def test_over_quota_submission_gets_429_with_retry_after(monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "USER_FILES_PER_MINUTE", 1)
+    monkeypatch.setattr(settings, "USER_FILES_BURST", 2)
+    db = SessionLocal()
+    try:
+        db.add(models.User(username="quota", hashed_password="not-used", is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'quota'})}"}
+
+    async def submit(count: int) -> httpx.Response:
+        files = [("files", (f"{n}.pdf", io.BytesIO(make_pdf([f"Statement {uuid.uuid4().hex}"])), "application/pdf")) for n in range(count)]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/jobs", headers=headers, files=files)
+
+    assert asyncio.run(submit(2)).status_code == 202
+    response = asyncio.run(submit(1))
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_submission_over_the_burst_gets_413_without_retry_after(monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "USER_FILES_PER_MINUTE", 1)
+    monkeypatch.setattr(settings, "USER_FILES_BURST", 2)
+    db = SessionLocal()
+    try:
+        db.add(models.User(username="too-large", hashed_password="not-used", is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'too-large'})}"}
+
+    async def submit(path: str) -> httpx.Response:
+        files = [("files", (f"{n}.pdf", io.BytesIO(make_pdf([f"Statement {uuid.uuid4().hex}"])), "application/pdf")) for n in range(3)]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, headers=headers, files=files)
+
+    for path in ("/jobs", "/files/upload"):
+        response = asyncio.run(submit(path))
+        assert response.status_code == 413, path
+        assert "Retry-After" not in response.headers
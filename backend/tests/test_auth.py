@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+from passlib.context import CryptContext
+
+from app.api.endpoints import auth
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+def test_concurrent_registrations_of_one_username_get_a_400():
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            body = {"username": "racer", "password": "secret"}
+            # Both pass the username check while bcrypt runs
+            first, second = await asyncio.gather(
+                client.post("/auth/register", json=body), client.post("/auth/register", json=body)
+            )
+            login = await client.post("/auth/login", data=body)
+            return sorted([first.status_code, second.status_code]), login
+
+    statuses, login = asyncio.run(scenario())
+    assert statuses == [200, 400]
+    assert login.status_code == 200 and login.json()["token_type"] == "bearer"
+
+def _login_with_cheap_hash(username: str) -> httpx.Response:
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    db = SessionLocal()
+    try:
+        db.add(models.User(username=username, hashed_password=cheap))
+        db.commit()
+    finally:
+        db.close()
+
+    async def login() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/auth/login", data={"username": username, "password": "secret"})
+
+    return asyncio.run(login())
+
+def _stored_hash(username: str) -> str:
+    db = SessionLocal()
+    try:
+        return db.query(models.User.hashed_password).filter(models.User.username == username).scalar()
+    finally:
+        db.close()
+
+def test_login_rehashes_a_lower_cost_hash():
+    assert _login_with_cheap_hash("rehashed").status_code == 200
+    assert _stored_hash("rehashed").startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+def test_login_succeeds_when_the_rehash_cannot_be_stored(monkeypatch):
+    def fail(db, username, hashed_password):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(auth, "_replace_hash", fail)
+    assert _login_with_cheap_hash("not-rehashed").status_code == 200
+    assert _stored_hash("not-rehashed").startswith("$2b$04$")
@@ -0,0 +1,34 @@
+import zipfile
+
+from bulk_import import BulkImporter
+from app.db.session import SessionLocal
+from app.models import models
+
+def test_second_import_of_the_same_files_skips_them_all(tmp_path, statement_pdf, verified_user):
+    user_id, _ = verified_user
+    statements = tmp_path / "statements" / "2025"
+    statements.mkdir(parents=True)
+    (statements / "hdfc.pdf").write_bytes(statement_pdf("HDFC", pages=1, seed=11))
+    archive = tmp_path / "archive.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("september/sbi.pdf", statement_pdf("SBI", pages=1, seed=12))
+    sources = [str(tmp_path / "statements"), str(archive)]
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, user_id)
+    finally:
+        db.close()
+
+    first = BulkImporter(user, workers=1, batch_size=10)
+    first.run(sources)
+    second = BulkImporter(user, workers=1, batch_size=10)
+    second.run(sources)
+
+    assert (first.imported, first.skipped, first.failures) == (2, 0, [])
+    assert (second.imported, second.skipped, second.failures) == (0, 2, [])
+    db = SessionLocal()
+    try:
+        filenames = {name for (name,) in db.query(models.FileUpload.filename).filter(models.FileUpload.user_id == user_id)}
+    finally:
+        db.close()
+    assert filenames == {"hdfc.pdf", "sbi.pdf"}
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import cache
+from app.core.config import settings
+from app.core.parser import PARSER_VERSION, extract_data_from_text
+from app.models import models
+from synthetic import statement_lines
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _put_aged(db, extraction_cache, texts: dict):
+    """Puts one entry per file hash, the first least recently used."""
+    for file_hash, text in texts.items():
+        extraction_cache.put(db, file_hash, text, {"issuer": "HDFC"})
+    start = datetime.utcnow() - timedelta(hours=1)
+    for n, file_hash in enumerate(texts):
+        db.get(models.ExtractionCacheEntry, file_hash).last_used_at = start + timedelta(minutes=n)
+    db.commit()
+
+def _cached_hashes(db) -> set:
+    return {file_hash for (file_hash,) in db.query(models.ExtractionCacheEntry.file_hash)}
+
+def test_entry_put_for_one_upload_is_a_hit_for_any_other(db):
+    extraction_cache = cache.ExtractionCache()
+    text = "\n".join(statement_lines("HDFC", pages=1))
+    data = extract_data_from_text(text)
+    extraction_cache.put(db, "shared", text, data, "text")
+    db.commit()
+
+    # Entries carry no user, so another user's upload of the same content finds it
+    hit = extraction_cache.get(db, "shared")
+
+    assert hit.data == data and hit.text == text and hit.method == cache.METHOD_CACHE
+    assert (extraction_cache.hits, extraction_cache.misses) == (1, 0)
+    assert extraction_cache.get(db, "unknown") is None
+    assert extraction_cache.misses == 1
+
+def test_entry_from_an_older_parser_is_reparsed_from_its_text(db, monkeypatch):
+    extraction_cache = cache.ExtractionCache()
+    text = "\n".join(statement_lines("HDFC", pages=1))
+    extraction_cache.put(db, "stale", text, {"issuer": "left over by the old rules"})
+    db.commit()
+
+    monkeypatch.setattr(cache, "PARSER_VERSION", "rules-changed")
+    hit = extraction_cache.get(db, "stale")
+
+    assert hit.data == extract_data_from_text(text)
+    assert db.get(models.ExtractionCacheEntry, "stale").parser_version == "rules-changed"
+    assert extraction_cache.reparsed == 1
+
+def test_entry_that_no_longer_parses_is_dropped(db, monkeypatch):
+    extraction_cache = cache.ExtractionCache()
+    extraction_cache.put(db, "unparseable", "nothing a statement would say", {"issuer": "HDFC"})
+    db.commit()
+    assert db.get(models.ExtractionCacheEntry, "unparseable").parser_version == PARSER_VERSION
+
+    monkeypatch.setattr(cache, "PARSER_VERSION", "rules-changed")
+
+    assert extraction_cache.get(db, "unparseable") is None
+    assert _cached_hashes(db) == set()
+    assert (extraction_cache.hits, extraction_cache.misses) == (0, 1)
+
+def test_least_recently_used_entry_is_evicted_over_the_entry_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_MAX_ENTRIES", 3)
+    extraction_cache = cache.ExtractionCache()
+    _put_aged(db, extraction_cache, {"a": "text", "b": "text", "c": "text"})
+    extraction_cache.get(db, "a")
+
+    extraction_cache.put(db, "d", "text", {"issuer": "HDFC"})
+
+    assert _cached_hashes(db) == {"a", "c", "d"}
+    assert extraction_cache.evictions == 1
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_MAX_BYTES", 10)
+    extraction_cache = cache.ExtractionCache()
+    _put_aged(db, extraction_cache, {"a": "four", "b": "four"})
+    extraction_cache.get(db, "a")
+
+    extraction_cache.put(db, "c", "four", {"issuer": "HDFC"})
+
+    assert _cached_hashes(db) == {"a", "c"}
+    assert extraction_cache.stats(db)["size_bytes"] == 8
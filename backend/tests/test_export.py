@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.endpoints import export
+from app.core.executors import BoundedExecutor
+
+def test_document_is_built_while_the_response_streams():
+    built = []
+
+    def chunks():
+        built.append("document")
+        yield b"%PDF-"
+        yield b"%%EOF"
+
+    async def scenario():
+        response = await export._export_response(chunks(), "exported_data.pdf", "application/pdf")
+        started = list(built)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return response, started, body
+
+    response, built_before_response, body = asyncio.run(scenario())
+    assert response.headers["content-disposition"] == 'attachment; filename="exported_data.pdf"'
+    assert built_before_response == []
+    assert body == b"%PDF-%%EOF"
+
+def test_busy_export_executor_is_a_503(monkeypatch):
+    monkeypatch.setattr(export, "export_executor", BoundedExecutor("export", workers=1, max_pending=0))
+
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(export._export_response(iter([b"data"]), "exported_data.csv", "text/csv"))
+    assert refused.value.status_code == 503
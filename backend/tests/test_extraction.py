@@ -0,0 +1,113 @@
+import ocrmypdf
+
+from app.core import extraction
+from app.core.config import settings
+from app.core.extraction import METHOD_MIXED, METHOD_OCR, METHOD_TEXT, extract_incremental, extract_text_first
+from app.core.pdfio import read_pages
+
+FILLER = [f"0{day}/09/2025 IRCTC BOOKING {day}00.00" for day in range(1, 6)]
+
+def _write(tmp_path, make_pdf, *pages) -> str:
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf(*pages))
+    return str(path)
+
+def _text_layer_as_ocr(monkeypatch) -> list:
+    """Stands in for OCR by returning the text layer; records the pages each call was asked for."""
+    calls = []
+
+    def fake_ocr_pages(pdf_path, page_numbers=None, timings=None, profile=None, cached=None):
+        calls.append((list(page_numbers), profile))
+        texts = read_pages(pdf_path)
+        return {n: texts[n - 1] for n in page_numbers}
+
+    monkeypatch.setattr(extraction, "_ocr_pages", fake_ocr_pages)
+    return calls
+
+def test_incremental_stops_once_the_required_fields_are_found(tmp_path, make_pdf):
+    # No card variant anywhere, which must not keep it reading
+    summary = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234", "Payment Due Date: 05/10/2025", "Total Amount Due: 1,000.00"]
+    pdf_path = _write(tmp_path, make_pdf, summary + FILLER, FILLER, FILLER, FILLER)
+
+    result = extract_incremental(pdf_path)
+
+    assert (result.pages_read, result.page_count, result.method) == (1, 4, METHOD_TEXT)
+    assert result.data["payment_due_date"] == "05/10/2025"
+    assert result.data["card_variant"] == "N/A"
+
+def test_incremental_reads_at_most_max_pages(tmp_path, make_pdf, monkeypatch):
+    ocr_calls = _text_layer_as_ocr(monkeypatch)
+    summary = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234", "Total Amount Due: 1,000.00"]
+    pdf_path = _write(tmp_path, make_pdf, summary + FILLER, FILLER, FILLER, FILLER, ["Payment Due Date: 05/10/2025"] + FILLER)
+
+    result = extract_incremental(pdf_path, max_pages=3)
+
+    assert (result.pages_read, result.page_count) == (3, 5)
+    assert result.data["payment_due_date"] == "N/A"
+    # The missing field sends only the pages already read to OCR
+    assert [pages for pages, _ in ocr_calls] and all(pages == [1, 2, 3] for pages, _ in ocr_calls)
+
+def test_incremental_pairs_a_label_and_value_split_across_pages(tmp_path, make_pdf):
+    summary = ["HDFC Bank Credit Card Statement", "Card No: XXXX XXXX XXXX 4321", "Payment Due Date: 05/10/2025"]
+    pdf_path = _write(tmp_path, make_pdf, summary + FILLER + ["Total Amount Due:"], ["45,210.50"] + FILLER, FILLER)
+
+    result = extract_incremental(pdf_path)
+
+    assert result.pages_read == 2
+    assert result.data["total_balance"] == "45,210.50"
+
+def _fake_ocrmypdf(monkeypatch, scanned: dict) -> list:
+    """
+    Stands in for ocrmypdf.ocr, recognising `scanned` (page number -> text)
+    and marking the pages it was not asked for as skipped, as ocrmypdf does.
+    Records the pages of each call.
+    """
+    calls = []
+    monkeypatch.setattr(settings, "PAGE_JOBS", 1)
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+
+    def fake_ocr(input_file, output_file, sidecar=None, pages=None, **options):
+        wanted = [int(n) for n in pages.split(",")] if pages else sorted(scanned)
+        calls.append(wanted)
+        sidecar.write("\f".join(
+            scanned[n] if n in wanted else f"[OCR skipped on page(s) {n}]" for n in sorted(scanned)
+        ).encode("utf-8"))
+
+    monkeypatch.setattr(ocrmypdf, "ocr", fake_ocr)
+    return calls
+
+def test_text_layer_is_used_without_ocr(tmp_path, make_pdf, monkeypatch):
+    ocr_calls = _fake_ocrmypdf(monkeypatch, {})
+    summary = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234", "Payment Due Date: 05/10/2025", "Total Amount Due: 1,000.00"]
+    pdf_path = _write(tmp_path, make_pdf, summary + FILLER, FILLER)
+
+    result = extract_text_first(pdf_path)
+
+    assert ocr_calls == []
+    assert (result.method, result.ocr_pages, result.ocr_profile) == (METHOD_TEXT, [], None)
+    assert result.data["total_balance"] == "1,000.00"
+
+def test_page_with_a_blank_or_short_text_layer_is_ocrd(tmp_path, make_pdf, monkeypatch):
+    summary = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234"] + FILLER
+    scanned = {2: "Payment Due Date: 05/10/2025", 3: "Total Amount Due: 1,000.00"}
+    ocr_calls = _fake_ocrmypdf(monkeypatch, {1: "\n".join(summary), **scanned})
+    # Page 2 is blank; page 3 only carries a page number, under TEXT_LAYER_MIN_CHARS
+    pdf_path = _write(tmp_path, make_pdf, summary, [""], ["Page 3"])
+
+    result = extract_text_first(pdf_path)
+
+    assert ocr_calls == [[2, 3]]
+    assert (result.method, result.ocr_pages) == (METHOD_MIXED, [2, 3])
+    assert result.data["payment_due_date"] == "05/10/2025"
+    assert result.data["total_balance"] == "1,000.00"
+
+def test_statement_without_a_text_layer_is_ocrd_throughout(tmp_path, make_pdf, monkeypatch):
+    summary = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234", "Payment Due Date: 05/10/2025", "Total Amount Due: 1,000.00"]
+    ocr_calls = _fake_ocrmypdf(monkeypatch, {1: "\n".join(summary), 2: "\n".join(FILLER)})
+    pdf_path = _write(tmp_path, make_pdf, [""], [""])
+
+    result = extract_text_first(pdf_path)
+
+    assert ocr_calls == [[1, 2]]
+    assert (result.method, result.ocr_pages) == (METHOD_OCR, [1, 2])
+    assert result.data["last_4_digits"] == "1234"
@@ -0,0 +1,80 @@
+import base64
+from datetime import date, datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.models import models
+
+def _add_uploads(user_id: int, rows: list) -> list:
+    """Inserts (file_hash, uploaded_at, issuer, last_4_digits, payment_due_date) rows; returns their ids."""
+    db = SessionLocal()
+    try:
+        uploads = [
+            models.FileUpload(
+                filename=f"{file_hash}.pdf", file_hash=file_hash, user_id=user_id, uploaded_at=uploaded_at,
+                issuer=issuer, last_4_digits=last_4_digits, payment_due_date=due,
+                extracted_data={"issuer": issuer, "last_4_digits": last_4_digits, "total_balance": "10.00", "card_variant": "N/A"},
+            )
+            for file_hash, uploaded_at, issuer, last_4_digits, due in rows
+        ]
+        db.add_all(uploads)
+        db.commit()
+        return [upload.id for upload in uploads]
+    finally:
+        db.close()
+
+def test_pages_cover_rows_uploaded_at_the_same_instant(api, verified_user):
+    user_id, headers = verified_user
+    now = datetime.utcnow().replace(microsecond=0)
+    # A batch commits its rows with one timestamp, so most of these tie
+    ids = _add_uploads(user_id, [(f"same-{n}", now, "HDFC", "4321", None) for n in range(5)])
+    ids += _add_uploads(user_id, [("older", now - timedelta(hours=1), "HDFC", "4321", None)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = api("get", "/files/history", headers=headers, params=params)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == sorted(ids[:5], reverse=True) + [ids[5]]
+
+def test_filters_combine(api, verified_user):
+    user_id, headers = verified_user
+    now = datetime.utcnow()
+    due = date(2025, 10, 5)
+    ids = _add_uploads(user_id, [
+        ("match", now, "HDFC", "4321", due),
+        ("other-issuer", now, "SBI", "4321", due),
+        ("other-card", now, "HDFC", "9999", due),
+        ("due-later", now, "HDFC", "4321", date(2025, 11, 5)),
+        ("uploaded-long-ago", now - timedelta(days=60), "HDFC", "4321", due),
+    ])
+
+    response = api("get", "/files/history", headers=headers, params={
+        "issuer": "HDFC", "last_4_digits": "4321", "period": "month",
+        "due_after": "2025-10-01", "due_before": "2025-10-31",
+    })
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == [ids[0]]
+
+def test_fields_project_the_extracted_data(api, verified_user):
+    user_id, headers = verified_user
+    _add_uploads(user_id, [("projected", datetime.utcnow(), "HDFC", "4321", None)])
+
+    response = api("get", "/files/history", headers=headers, params={"fields": ["issuer", "total_balance"]})
+
+    assert response.status_code == 200
+    assert [row["data"] for row in response.json()] == [{"issuer": "HDFC", "total_balance": "10.00"}]
+
+def test_bad_cursor_is_a_400(api, verified_user):
+    _, headers = verified_user
+    for cursor in ("not a cursor", base64.urlsafe_b64encode(b'{"a": 1}').decode(), base64.urlsafe_b64encode(b'["yesterday", 1]').decode()):
+        response = api("get", "/files/history", headers=headers, params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+        assert response.json()["detail"] == "Invalid cursor"
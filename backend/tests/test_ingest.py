@@ -0,0 +1,38 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.api.endpoints.files import MAX_FILE_SIZE
+from app.core.config import settings
+from app.core.ingest import UploadTooLarge, spool_upload
+
+def test_upload_over_the_limit_leaves_no_partial_spool(tmp_path):
+    # No declared size, so the limit is only caught while streaming
+    upload = UploadFile(io.BytesIO(b"%" * (MAX_FILE_SIZE + 1)), filename="big.pdf")
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(upload, MAX_FILE_SIZE, directory=str(tmp_path)))
+
+    assert os.listdir(tmp_path) == []
+
+def test_upload_at_the_limit_is_spooled(tmp_path):
+    upload = UploadFile(io.BytesIO(b"%" * MAX_FILE_SIZE), filename="limit.pdf")
+
+    spooled = asyncio.run(spool_upload(upload, MAX_FILE_SIZE, directory=str(tmp_path)))
+
+    assert spooled.size == MAX_FILE_SIZE
+    assert os.listdir(tmp_path) == [os.path.basename(spooled.path)]
+
+def test_oversized_job_upload_gets_413(api, verified_user):
+    _, headers = verified_user
+    os.makedirs(settings.JOB_SPOOL_DIR, exist_ok=True)
+    before = set(os.listdir(settings.JOB_SPOOL_DIR))
+
+    files = [("files", ("big.pdf", io.BytesIO(b"%" * (MAX_FILE_SIZE + 1)), "application/pdf"))]
+    response = api("post", "/jobs", headers=headers, files=files)
+
+    assert response.status_code == 413
+    assert set(os.listdir(settings.JOB_SPOOL_DIR)) == before
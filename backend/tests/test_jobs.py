@@ -0,0 +1,91 @@
+import asyncio
+import io
+import os
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.jobs import JobQueue
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+def test_only_jobs_with_expired_leases_are_requeued():
+    db = SessionLocal()
+    try:
+        user = models.User(username="lease", hashed_password="not-used", is_verified=True)
+        db.add(user)
+        db.flush()
+        now = datetime.utcnow()
+        for job_id, expires_at in (("lease-live", now + timedelta(minutes=1)), ("lease-expired", now - timedelta(seconds=1))):
+            db.add(models.ParseJob(
+                id=job_id, filename="a.pdf", file_hash=job_id, spool_path=f"{job_id}.pdf", user_id=user.id,
+                status=models.JobStatus.RUNNING, owner="other-node", lease_expires_at=expires_at,
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+    # A dispatcher starting elsewhere must not take over the job still being run
+    JobQueue(workers=1)._requeue_stale()
+    db = SessionLocal()
+    try:
+        statuses = dict(db.query(models.ParseJob.id, models.ParseJob.status).filter(
+            models.ParseJob.id.in_(["lease-live", "lease-expired"])
+        ))
+    finally:
+        db.close()
+    assert statuses == {"lease-live": models.JobStatus.RUNNING, "lease-expired": models.JobStatus.QUEUED}
+
+def test_rejected_batch_leaves_no_spooled_files(monkeypatch):
+    db = SessionLocal()
+    try:
+        db.add(models.User(username="spool", hashed_password="not-used", is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'spool'})}"}
+    os.makedirs(settings.JOB_SPOOL_DIR, exist_ok=True)
+    before = set(os.listdir(settings.JOB_SPOOL_DIR))
+
+    async def submit() -> httpx.Response:
+        files = [
+            ("files", ("statement.pdf", io.BytesIO(b"%PDF-1.4 spooled first"), "application/pdf")),
+            ("files", ("notes.txt", io.BytesIO(b"not a statement"), "text/plain")),
+        ]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/jobs", headers=headers, files=files)
+
+    assert asyncio.run(submit()).status_code == 400
+    assert set(os.listdir(settings.JOB_SPOOL_DIR)) == before
+
+class _Pool:
+    def __init__(self):
+        self.shutdowns = 0
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+def test_a_broken_pool_is_replaced_once(monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    from app.core import jobs
+
+    monkeypatch.setattr(jobs.admission_backend, "release_slot", lambda pool, lease: None)
+    queue = JobQueue(workers=2)
+    broken, fresh = _Pool(), _Pool()
+    monkeypatch.setattr(queue, "_new_executor", lambda: fresh)
+    queue._executor = broken
+    for job_id in ("crashed-1", "crashed-2"):
+        future = Future()
+        future.set_exception(BrokenProcessPool())
+        queue._in_flight[job_id] = (future, 1, None, broken)
+
+    queue._collect()
+
+    assert queue._executor is fresh
+    assert (broken.shutdowns, fresh.shutdowns) == (1, 0)
+    assert queue._in_flight == {}
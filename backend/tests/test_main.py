@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.auth import create_access_token
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+PROBE_INTERVAL = 0.05
+
+def _verified_user_token(username: str) -> str:
+    db = SessionLocal()
+    try:
+        db.add(models.User(username=username, hashed_password="not-used", is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": username})
+
+async def _probe(client: httpx.AsyncClient, path: str, headers: dict, done: asyncio.Event) -> list:
+    """Requests `path` until `done` is set; returns when each response arrived."""
+    answered = []
+    while not done.is_set():
+        response = await client.get(path, headers=headers)
+        answered.append(time.monotonic())
+        assert response.status_code == 200
+        await asyncio.sleep(PROBE_INTERVAL)
+    return answered
+
+def test_large_upload_does_not_block_other_requests(statement_pdf):
+    """
+    While a large statement is being extracted, / and /files/history keep
+    being answered, because the extraction runs on the CPU executor rather
+    than the event loop.
+    """
+    headers = {"Authorization": f"Bearer {_verified_user_token('upload-latency')}"}
+    statement = statement_pdf("HDFC", pages=80)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+            done = asyncio.Event()
+            probes = [
+                asyncio.create_task(_probe(client, "/", {}, done)),
+                asyncio.create_task(_probe(client, "/files/history", headers, done)),
+            ]
+            started = time.monotonic()
+            response = await client.post(
+                "/files/upload", headers=headers,
+                files={"files": ("statement.pdf", statement, "application/pdf")},
+            )
+            finished = time.monotonic()
+            done.set()
+            return response, (started, finished), await asyncio.gather(*probes)
+
+    response, (started, finished), (root, history) = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    processed = response.json()["processed"]
+    assert [f["issuer"] for f in processed] == ["HDFC"]
+    assert processed[0]["transaction_count"] > 0
+    # Both endpoints kept answering while the upload was still in flight
+    assert sum(started < t < finished for t in root) > 20
+    assert sum(started < t < finished for t in history) > 20
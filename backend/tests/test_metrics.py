@@ -0,0 +1,49 @@
+import io
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+def test_counter_and_histogram_render_the_text_format():
+    counter = Counter("ccp_test_events", "Events seen.", ("kind",))
+    counter.inc(kind='say "hi"')
+    counter.inc(2, kind='say "hi"')
+    histogram = Histogram("ccp_test_seconds", "Time taken.", ("kind",), buckets=(0.1, 1))
+    histogram.observe(0.5, kind="a")
+
+    assert list(counter.render()) == [
+        "# HELP ccp_test_events Events seen.",
+        "# TYPE ccp_test_events counter",
+        'ccp_test_events_total{kind="say \\"hi\\""} 3.0',
+    ]
+    assert list(histogram.render()) == [
+        "# HELP ccp_test_seconds Time taken.",
+        "# TYPE ccp_test_seconds histogram",
+        'ccp_test_seconds_bucket{kind="a",le="0.1"} 0',
+        'ccp_test_seconds_bucket{kind="a",le="1"} 1',
+        'ccp_test_seconds_bucket{kind="a",le="+Inf"} 1',
+        'ccp_test_seconds_sum{kind="a"} 0.5',
+        'ccp_test_seconds_count{kind="a"} 1',
+    ]
+
+def test_requests_are_labelled_by_route_template_and_status(api, verified_user, make_pdf, monkeypatch):
+    monkeypatch.setattr(settings, "USER_FILES_PER_MINUTE", 1)
+    monkeypatch.setattr(settings, "USER_FILES_BURST", 0)
+    _, headers = verified_user
+    assert api("get", "/jobs/no-such-job", headers=headers).status_code == 404
+    files = [("files", ("metrics.pdf", io.BytesIO(make_pdf(["Counted"])), "application/pdf"))]
+    assert api("post", "/jobs", headers=headers, files=files).status_code == 413
+    assert api("get", "/no-such-page").status_code == 404
+
+    response = api("get", "/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE ccp_http_request_seconds histogram" in lines
+    assert "# TYPE ccp_admission_rejected counter" in lines
+    assert any(line.startswith('ccp_admission_rejected_total{quota="files"} ') for line in lines)
+    for route in ("/jobs/{job_id}", "unmatched"):
+        labels = f'method="GET",route="{route}",status="404"'
+        assert any(line.startswith(f'ccp_http_request_seconds_bucket{{{labels},le="+Inf"}} ') for line in lines), route
+        assert any(line.startswith(f"ccp_http_request_seconds_count{{{labels}}} ") for line in lines), route
+        assert any(line.startswith(f'ccp_http_request_seconds_bucket{{{labels},le="0.005"}} ') for line in lines), route
@@ -0,0 +1,64 @@
+import json
+from datetime import date
+
+from sqlalchemy import select, text, update
+
+from app.db.migrations import DATA_MIGRATIONS, run_migrations
+from app.db.session import create_db_engine
+from app.models.models import Base, CardSummary, FileUpload, SchemaMigration
+
+# The tables as the first release created them
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, username VARCHAR NOT NULL UNIQUE, hashed_password VARCHAR NOT NULL,
+        role VARCHAR(11) NOT NULL, is_verified BOOLEAN NOT NULL, status VARCHAR(9) NOT NULL
+    )""",
+    """CREATE TABLE uploads (
+        id INTEGER PRIMARY KEY, filename VARCHAR NOT NULL, file_hash VARCHAR NOT NULL, issuer VARCHAR,
+        extracted_data JSON, uploaded_at DATETIME, user_id INTEGER NOT NULL REFERENCES users (id),
+        CONSTRAINT uix_file_hash_user UNIQUE (file_hash, user_id)
+    )""",
+]
+
+def test_baseline_database_is_migrated_once(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    data = {
+        "issuer": "HDFC", "last_4_digits": "4321", "card_variant": "Regalia", "billing_cycle": "15/09/2025",
+        "payment_due_date": "05/10/2025", "total_balance": "45,210.50",
+    }
+    try:
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text("INSERT INTO users VALUES (1, 'old', 'not-used', 'USER', 1, 'ACTIVE')"))
+            # The first release stored json.dumps() of the parser output in the JSON column
+            conn.execute(
+                text("INSERT INTO uploads (id, filename, file_hash, issuer, extracted_data, user_id) VALUES (1, 'a.pdf', 'a', 'HDFC', :data, 1)"),
+                {"data": json.dumps(json.dumps(data))},
+            )
+
+        # As on startup: new tables are created, then the existing ones migrated
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+
+        with engine.connect() as conn:
+            upload = conn.execute(select(FileUpload.__table__)).one()
+            assert upload.extracted_data == data
+            assert (upload.last_4_digits, upload.card_variant) == ("4321", "Regalia")
+            assert (upload.statement_date, upload.payment_due_date) == (date(2025, 9, 15), date(2025, 10, 5))
+            assert upload.total_balance_paise == 4521050
+            card = conn.execute(select(CardSummary.__table__)).one()
+            assert (card.user_id, card.issuer, card.last_4_digits, card.upload_count) == (1, "HDFC", "4321", 1)
+            assert set(conn.execute(select(SchemaMigration.name)).scalars()) == {name for name, _ in DATA_MIGRATIONS}
+
+        # A second run finds every migration applied and leaves the data alone
+        with engine.begin() as conn:
+            conn.execute(update(FileUpload).values(total_balance_paise=1))
+            conn.execute(update(CardSummary).values(upload_count=7))
+        run_migrations(engine)
+        with engine.connect() as conn:
+            assert conn.execute(select(FileUpload.total_balance_paise)).scalar_one() == 1
+            assert conn.execute(select(CardSummary.upload_count)).scalar_one() == 7
+            assert len(conn.execute(select(SchemaMigration.name)).scalars().all()) == len(DATA_MIGRATIONS)
+    finally:
+        engine.dispose()
@@ -0,0 +1,89 @@
+import ocrmypdf
+import pytest
+
+from app.core import extraction
+from app.core.config import settings
+from app.core.ocr import PROFILE_ACCURATE, PROFILE_FAST, parse_sidecar, profile_options, run_ocr
+from app.core.parser import extract_data_from_text
+
+SUMMARY = ["SBI Card Statement", "Card No: XXXX XXXX XXXX 1234", "Payment Due Date: 05/10/2025", "Total Amount Due: 1,000.00"]
+
+def _fake_ocrmypdf(monkeypatch, sidecars: dict, make_pdf=None) -> list:
+    """
+    Stands in for ocrmypdf.ocr: writes the sidecar given for the call's
+    profile, or a PDF of its pages when no sidecar was asked for. Records
+    the options of each call.
+    """
+    calls = []
+
+    def fake_ocr(input_file, output_file, sidecar=None, **options):
+        calls.append(options)
+        pages = sidecars[PROFILE_FAST if "tesseract_downsample_large_images" in options else PROFILE_ACCURATE]
+        if sidecar is not None:
+            sidecar.write("\f".join(pages).encode("utf-8"))
+        else:
+            with open(output_file, "wb") as out:
+                out.write(make_pdf(*[page.split("\n") for page in pages]))
+
+    monkeypatch.setattr(ocrmypdf, "ocr", fake_ocr)
+    return calls
+
+def test_fast_profile_writes_only_the_sidecar_at_page_pool_size(monkeypatch):
+    monkeypatch.setattr(settings, "PAGE_JOBS", 3)
+    options = profile_options(PROFILE_FAST)
+    assert options["output_type"] == "none" and options["optimize"] == 0
+    assert options["jobs"] == 3
+    assert options["tesseract_downsample_above"] == settings.OCR_FAST_MAX_IMAGE_SIDE
+
+def test_accurate_profile_writes_a_pdf_only_in_files_mode(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_IO_MODE", "files")
+    assert profile_options(PROFILE_ACCURATE, jobs=2) == {"force_ocr": True, "progress_bar": False, "jobs": 2}
+    monkeypatch.setattr(settings, "PDF_IO_MODE", "buffered")
+    assert profile_options(PROFILE_ACCURATE)["output_type"] == "none"
+    with pytest.raises(ValueError):
+        profile_options("thorough")
+
+def test_sidecar_skips_the_pages_ocrmypdf_marked():
+    sidecar = "page one\f[OCR skipped on page(s) 2-3]\fpage four\f[OCR skipped on page(s) 5]\fpage six"
+    assert parse_sidecar(sidecar) == {1: "page one", 4: "page four", 6: "page six"}
+    assert parse_sidecar("first\fsecond", first_page=3) == {3: "first", 4: "second"}
+
+def test_run_ocr_returns_only_the_pages_asked_for(monkeypatch):
+    calls = _fake_ocrmypdf(monkeypatch, {PROFILE_FAST: ["[OCR skipped on page(s) 1]", "page two", "page three", "[OCR skipped on page(s) 4-5]"]})
+
+    assert run_ocr("statement.pdf", [2, 3], PROFILE_FAST) == {2: "page two", 3: "page three"}
+    assert calls[0]["pages"] == "2,3"
+
+def test_run_ocr_reads_back_the_pdf_written_by_the_accurate_profile(monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "PDF_IO_MODE", "files")
+    _fake_ocrmypdf(monkeypatch, {PROFILE_ACCURATE: ["page one", "page two"]}, make_pdf)
+
+    assert run_ocr("statement.pdf", profile=PROFILE_ACCURATE) == {1: "page one", 2: "page two"}
+
+@pytest.mark.parametrize("data, profile, fallback, issuer_profiles, expected", [
+    pytest.param({"issuer": "SBI"}, PROFILE_FAST, True, {}, True, id="fields-missing"),
+    pytest.param(SUMMARY, PROFILE_FAST, True, {"SBI": PROFILE_ACCURATE}, True, id="issuer-wants-accurate"),
+    pytest.param(SUMMARY, PROFILE_FAST, True, {}, False, id="fast-was-enough"),
+    pytest.param({"issuer": "SBI"}, PROFILE_FAST, False, {}, False, id="fallback-disabled"),
+    pytest.param({"issuer": "SBI"}, PROFILE_ACCURATE, True, {}, False, id="already-accurate"),
+])
+def test_needs_accurate(monkeypatch, data, profile, fallback, issuer_profiles, expected):
+    monkeypatch.setattr(settings, "OCR_FALLBACK_TO_ACCURATE", fallback)
+    monkeypatch.setattr(settings, "OCR_ISSUER_PROFILES", issuer_profiles)
+    if data is SUMMARY:
+        data = extract_data_from_text("\n".join(SUMMARY))
+    assert extraction._needs_accurate(data, profile) is expected
+
+def test_fast_ocr_missing_fields_is_redone_with_the_accurate_profile(monkeypatch, tmp_path, make_pdf):
+    monkeypatch.setattr(settings, "PAGE_JOBS", 1)
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+    calls = _fake_ocrmypdf(monkeypatch, {PROFILE_FAST: ["\n".join(SUMMARY[:2])], PROFILE_ACCURATE: ["\n".join(SUMMARY)]})
+    pdf_path = tmp_path / "scan.pdf"
+    pdf_path.write_bytes(make_pdf(["scanned"]))
+
+    result = extraction.extract_with_ocr(str(pdf_path), profile=PROFILE_FAST)
+
+    assert ["tesseract_downsample_large_images" in options for options in calls] == [True, False]
+    assert result.ocr_profile == PROFILE_ACCURATE
+    assert result.data["payment_due_date"] == "05/10/2025"
+    assert result.data["total_balance"] == "1,000.00"
@@ -0,0 +1,37 @@
+from app.core.ocr import PROFILE_ACCURATE, PROFILE_FAST
+from app.core.page_cache import PageCache, page_keys
+from app.core import pages
+
+def _write(path, pdf: bytes) -> str:
+    path.write_bytes(pdf)
+    return str(path)
+
+def test_same_page_in_different_files_gets_the_same_key(tmp_path, make_pdf):
+    first = _write(tmp_path / "first.pdf", make_pdf(["Statement for May"], ["Terms and conditions"]))
+    second = _write(tmp_path / "second.pdf", make_pdf(["Statement for June"], ["Terms and conditions"]))
+    first_keys, second_keys = page_keys(first, None, PROFILE_ACCURATE), page_keys(second, None, PROFILE_ACCURATE)
+    assert first_keys[2] == second_keys[2]
+    assert first_keys[1] != second_keys[1]
+    # Text recognised with another profile is not reused
+    assert page_keys(first, [2], PROFILE_FAST)[2] != first_keys[2]
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"), max_bytes=20)
+    cache.put_many({"a": "x" * 8, "b": "y" * 8})
+    assert cache.get_many(["a"]) == {"a": "x" * 8}
+    cache.put_many({"c": "z" * 8})
+    assert cache.get_many(["a", "b", "c"]) == {"a": "x" * 8, "c": "z" * 8}
+
+def _no_ocr(*args):
+    raise AssertionError("cached pages were OCR'd again")
+
+def test_cached_pages_are_not_ocrd_again(tmp_path, monkeypatch, make_pdf):
+    pdf_path = _write(tmp_path / "statement.pdf", make_pdf(["Page one"], ["Page two"]))
+    cache = PageCache(str(tmp_path / "pages.db"), max_bytes=1 << 20)
+    monkeypatch.setattr(pages, "page_cache", cache)
+    keys = page_keys(pdf_path, None, PROFILE_ACCURATE)
+    cache.put_many({keys[1]: "one", keys[2]: "two"})
+    monkeypatch.setattr(pages, "run_ocr", _no_ocr)
+    cached = set()
+    assert pages.ocr_with_page_cache(pdf_path, None, PROFILE_ACCURATE, cached) == {1: "one", 2: "two"}
+    assert cached == {1, 2}
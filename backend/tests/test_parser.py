@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.parser import CARD_VARIANTS, IncrementalParser, extract_data_from_text
+from bench_parser import ISSUER_HEADERS, legacy_extract_data_from_text, synthetic_statement
+
+def _samples():
+    for issuer in ISSUER_HEADERS:
+        for with_header in (True, False):
+            yield pytest.param(synthetic_statement(issuer, 4000, seed=1, with_header=with_header), id=f"{issuer}-header={with_header}")
+        # Any issuer's statement may name any variant, e.g. a co-branded card
+        for variant in CARD_VARIANTS:
+            text = synthetic_statement(issuer, 1000, seed=2).replace(ISSUER_HEADERS[issuer].split("\n")[1], variant)
+            yield pytest.param(text, id=f"{issuer}-{variant}")
+    yield pytest.param("Credit Card Statement\nInfinia\nCard No: XXXX 1234\nTotal Amount Due: 1,000.00", id="Unknown")
+
+@pytest.mark.parametrize("text", list(_samples()))
+def test_rule_engine_agrees_with_the_regex_chain_it_replaced(text):
+    assert extract_data_from_text(text) == legacy_extract_data_from_text(text)
+
+REQUIRED = ["issuer", "last_4_digits", "payment_due_date", "total_balance"]
+
+def test_incremental_parser_is_complete_without_optional_fields():
+    parser = IncrementalParser(REQUIRED)
+    parser.feed("SBI Card Statement\nCard No: XXXX 1234\nPayment Due Date: 05/10/2025\nTotal Amount Due: 1,000.00")
+    assert parser.complete
+    assert parser.result()["card_variant"] == "N/A"
+    # Waiting for every field would never end on this statement
+    assert not IncrementalParser().complete
+
+def test_label_at_the_bottom_of_a_page_pairs_with_a_value_at_the_top_of_the_next():
+    parser = IncrementalParser(REQUIRED)
+    parser.feed("HDFC Bank Credit Card Statement\nCard No: XXXX 4321\nPayment Due Date: 05/10/2025\nTotal Amount Due:")
+    assert not parser.complete
+    parser.feed("45,210.50\n01/09/2025 SWIGGY 120.00")
+    assert parser.complete
+    assert parser.result()["total_balance"] == "45,210.50"
+    assert parser.pages_fed == 2
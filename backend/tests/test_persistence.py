@@ -0,0 +1,39 @@
+from app.core.persistence import ParsedUpload, save_uploads
+from app.core.transactions import parse_text
+from app.db.session import SessionLocal
+from app.main import app  # noqa: F401  (creates the tables)
+from app.models import models
+
+def _parsed(file_hash: str) -> ParsedUpload:
+    data = {"issuer": "SBI", "last_4_digits": "1111", "total_balance": "10.00"}
+    return ParsedUpload(f"{file_hash}.pdf", file_hash, data, parse_text("01/09/2025 IRCTC 10.00", "SBI"))
+
+def test_batch_with_a_duplicate_falls_back_to_one_savepoint_per_row():
+    db = SessionLocal()
+    try:
+        user = models.User(username="save-batch", hashed_password="not-used", is_verified=True)
+        db.add(user)
+        db.commit()
+        saved, failed = save_uploads(db, user.id, [_parsed("earlier")])
+        db.commit()
+        assert len(saved) == 1 and not failed
+
+        # The middle row breaks uix_file_hash_user, so the batch savepoint fails
+        batch = [_parsed("first"), _parsed("earlier"), _parsed("last")]
+        saved, failed = save_uploads(db, user.id, batch)
+        db.commit()
+
+        assert [upload.file_hash for upload in saved] == ["first", "last"]
+        assert failed == [(batch[1], "This file has already been uploaded.")]
+        uploads = db.query(models.FileUpload).filter(models.FileUpload.user_id == user.id).all()
+        assert sorted(upload.file_hash for upload in uploads) == ["earlier", "first", "last"]
+        # Each saved row has its transactions, and none were left from the failed batch
+        counts = {
+            upload.file_hash: db.query(models.Transaction).filter(models.Transaction.upload_id == upload.id).count()
+            for upload in uploads
+        }
+        assert counts == {"earlier": 1, "first": 1, "last": 1}
+        card = db.query(models.CardSummary).filter(models.CardSummary.user_id == user.id).one()
+        assert card.upload_count == 3
+    finally:
+        db.close()
@@ -0,0 +1,44 @@
+import asyncio
+
+import httpx
+
+from app.core.auth import create_access_token
+from app.core.principal_cache import Principal, PrincipalCache
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+def _principal(status: models.UserStatus) -> Principal:
+    return Principal(id=7, username="reader", role=models.UserRole.USER, is_verified=True, status=status)
+
+def test_user_read_before_an_invalidation_is_not_cached():
+    cache = PrincipalCache(ttl=30, max_entries=10)
+    snapshot = cache.snapshot()
+    # The request read the user, then an admin suspended them before it stored the copy
+    cache.invalidate(7)
+    cache.put(_principal(models.UserStatus.ACTIVE), snapshot)
+    assert cache.get("reader") is None
+    cache.put(_principal(models.UserStatus.SUSPENDED), cache.snapshot())
+    assert cache.get("reader").status == models.UserStatus.SUSPENDED
+
+def test_suspended_user_is_refused_on_the_next_request():
+    db = SessionLocal()
+    try:
+        user = models.User(username="suspendee", hashed_password="not-used", is_verified=True)
+        db.add_all([user, models.User(username="moderator", hashed_password="not-used", role=models.UserRole.ADMIN)])
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    def headers(username: str) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            before = await client.get("/files/history", headers=headers("suspendee"))
+            suspend = await client.post(f"/admin/users/{user_id}/toggle-suspend", headers=headers("moderator"))
+            after = await client.get("/files/history", headers=headers("suspendee"))
+            return before.status_code, suspend.status_code, after.status_code
+
+    assert asyncio.run(scenario()) == (200, 200, 403)
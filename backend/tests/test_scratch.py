@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app.core import scratch
+from app.core.config import settings
+from app.core.pdfio import PDF_IO_BUFFERED, PDF_IO_FILES, open_pdf
+from app.db.session import SessionLocal
+from app.main import app  # noqa: F401  (creates the tables)
+from app.models import models
+
+def _touch(path: str, age: float = 0):
+    with open(path, "wb") as f:
+        f.write(b"%PDF-")
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_janitor_removes_only_orphaned_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SCRATCH_DIR", str(tmp_path / "scratch"))
+    monkeypatch.setattr(settings, "JOB_SPOOL_DIR", str(tmp_path / "job_spool"))
+    monkeypatch.setattr(settings, "SCRATCH_ORPHAN_AGE_SECONDS", 60)
+    app_dir = tmp_path / "scratch" / scratch.APP_DIR_NAME
+    dead_pid = _exited_pid()
+    os.makedirs(app_dir / f"worker-{dead_pid}")
+    os.makedirs(app_dir / f"worker-{os.getpid()}")
+    # Entries the app did not create, even ones that look like its own
+    os.makedirs(tmp_path / "scratch" / str(dead_pid))
+    os.makedirs(app_dir / str(dead_pid))
+    foreign = [
+        _touch(str(tmp_path / "scratch" / "old.txt"), age=120),
+        _touch(str(app_dir / "old.txt"), age=120),
+    ]
+    os.makedirs(tmp_path / "job_spool")
+    foreign.append(_touch(str(tmp_path / "job_spool" / "notes.txt"), age=120))
+    queued = _touch(str(tmp_path / "job_spool" / "queued.pdf"), age=120)
+    partial = _touch(str(tmp_path / "job_spool" / "tmp_partial.pdf"), age=120)
+    spooling = _touch(str(tmp_path / "job_spool" / "tmp_spooling.pdf"))
+    db = SessionLocal()
+    try:
+        user = models.User(username="janitor", hashed_password="not-used", is_verified=True)
+        db.add(user)
+        db.flush()
+        db.add(models.ParseJob(id="janitor-job", filename="a.pdf", file_hash="0" * 64, spool_path=queued, user_id=user.id))
+        db.commit()
+    finally:
+        db.close()
+
+    assert scratch.clean_orphans() == {"scratch": 1, "job_spool": 1}
+    assert sorted(os.listdir(app_dir)) == sorted([str(dead_pid), "old.txt", f"worker-{os.getpid()}"])
+    assert os.path.isdir(tmp_path / "scratch" / str(dead_pid))
+    assert all(os.path.exists(path) for path in foreign)
+    assert not os.path.exists(partial)
+    assert os.path.exists(queued) and os.path.exists(spooling)
+
+@pytest.mark.parametrize("mode", [PDF_IO_BUFFERED, PDF_IO_FILES])
+def test_text_layer_reads_the_same_in_both_modes(tmp_path, monkeypatch, make_pdf, mode):
+    monkeypatch.setattr(settings, "PDF_IO_MODE", mode)
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf(["Total Amount Due: 12,345.00"]))
+    with open_pdf(str(path)) as opened:
+        assert opened.pages[0].extract_text() == "Total Amount Due: 12,345.00"
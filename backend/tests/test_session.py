@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.session import async_database_url, create_db_engine
+
+def test_file_sqlite_engine_gets_the_pool_and_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == settings.DATABASE_POOL_SIZE
+        assert engine.pool._max_overflow == settings.DATABASE_MAX_OVERFLOW
+        assert engine.pool._timeout == settings.DATABASE_POOL_TIMEOUT
+    finally:
+        engine.dispose()
+
+def test_memory_sqlite_engine_keeps_the_default_pool():
+    engine = create_db_engine("sqlite://")
+    try:
+        assert not isinstance(engine.pool, QueuePool)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+    finally:
+        engine.dispose()
+
+@pytest.mark.parametrize("database_url, expected", [
+    ("sqlite:///./credit_parser.db", "sqlite+aiosqlite:///./credit_parser.db"),
+    ("postgresql://parser:secret@db/parser", "postgresql+asyncpg://parser:secret@db/parser"),
+])
+def test_async_url_is_derived_from_the_database_url(monkeypatch, database_url, expected):
+    monkeypatch.setattr(settings, "DATABASE_URL", database_url)
+    assert async_database_url() == expected
+
+def test_async_url_setting_wins_and_unknown_backends_need_it(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "mysql://parser@db/parser")
+    with pytest.raises(RuntimeError):
+        async_database_url()
+    monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", "mysql+aiomysql://parser@db/parser")
+    assert async_database_url() == "mysql+aiomysql://parser@db/parser"
@@ -0,0 +1,38 @@
+from datetime import date
+
+from app.core import summaries
+from app.db.session import SessionLocal
+from app.main import app  # noqa: F401  (creates the tables)
+from app.models import models
+
+def _upload(user_id: int, file_hash: str, statement_date) -> models.FileUpload:
+    return models.FileUpload(
+        filename=f"{file_hash}.pdf", file_hash=file_hash, user_id=user_id, issuer="HDFC",
+        last_4_digits="4321", statement_date=statement_date, total_balance_paise=100,
+    )
+
+def test_summary_created_by_a_concurrent_flush_is_added_to(monkeypatch):
+    db = SessionLocal()
+    try:
+        user = models.User(username="summary-race", hashed_password="not-used", is_verified=True)
+        db.add(user)
+        db.commit()
+        db.add(_upload(user.id, "first", date(2025, 8, 15)))
+        db.commit()
+
+        # The second flush looks for the card's row before the first one has
+        # committed it, so it tries to create the row as well
+        lookups = []
+        real_row = summaries._summary_row
+        def row_not_yet_visible(conn, key):
+            lookups.append(key)
+            return None if len(lookups) == 1 else real_row(conn, key)
+        monkeypatch.setattr(summaries, "_summary_row", row_not_yet_visible)
+        db.add(_upload(user.id, "second", date(2025, 9, 15)))
+        db.commit()
+
+        card = db.query(models.CardSummary).filter(models.CardSummary.user_id == user.id).one()
+        second = db.query(models.FileUpload).filter(models.FileUpload.file_hash == "second").one()
+        assert (card.upload_count, card.latest_upload_id, card.statement_date) == (2, second.id, date(2025, 9, 15))
+    finally:
+        db.close()
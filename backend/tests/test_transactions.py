@@ -0,0 +1,78 @@
+import asyncio
+from datetime import date
+
+import httpx
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.extraction import statement_transactions
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import models
+
+def test_text_layer_rows_are_read_by_word_position(tmp_path, make_pdf):
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf([
+        "HDFC Bank Credit Card Statement",
+        "Total Amount Due: 45,210.50",
+        "01/09/2025 SWIGGY REF12345678 1,234.50",
+        "02/09/2025 PAYMENT RECEIVED 5,000.00 Cr",
+    ], [
+        "03/09/2025 AMAZON PAY 99.00",
+    ]))
+
+    transactions = statement_transactions(str(path), {"issuer": "HDFC"})
+
+    assert list(transactions.rows()) == [
+        (date(2025, 9, 1), "SWIGGY", 123450),
+        (date(2025, 9, 2), "PAYMENT RECEIVED", -500000),
+        (date(2025, 9, 3), "AMAZON PAY", 9900),
+    ]
+
+def test_ocr_text_is_parsed_line_by_line(tmp_path, make_pdf):
+    # OCR can drop the digits of an amount, leaving only its separators
+    ocr_text = "SBI Card Statement\n04/09/2025 UBER INDIA 310.00\n05/09/2025 ZOMATO ,.00\n"
+    # A scanned page has no words to position, so the OCR'd text is used instead
+    path = tmp_path / "scanned.pdf"
+    path.write_bytes(make_pdf([]))
+    assert list(statement_transactions(str(path), {"issuer": "SBI"}, ocr_text).rows()) == [
+        (date(2025, 9, 4), "UBER INDIA", 31000),
+    ]
+    # Text that already holds every page is parsed without opening the file
+    complete = statement_transactions("not-read.pdf", {"issuer": "SBI"}, ocr_text, text_is_complete=True)
+    assert list(complete.rows()) == [(date(2025, 9, 4), "UBER INDIA", 31000)]
+
+def test_nothing_is_read_when_transactions_are_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "TRANSACTIONS_ENABLED", False)
+    assert statement_transactions("not-read.pdf", {"issuer": "HDFC"}, "01/09/2025 SWIGGY 10.00", text_is_complete=True) is None
+
+def test_upload_saves_its_transactions(tmp_path, statement_pdf):
+    db = SessionLocal()
+    try:
+        db.add(models.User(username="transactions", hashed_password="not-used", is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'transactions'})}"}
+    statement = statement_pdf("Axis Bank", pages=2, seed=3)
+
+    async def upload() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60) as client:
+            return await client.post("/files/upload", headers=headers, files={"files": ("axis.pdf", statement, "application/pdf")})
+
+    response = asyncio.run(upload())
+    assert response.status_code == 200
+    [processed] = response.json()["processed"]
+
+    path = tmp_path / "axis.pdf"
+    path.write_bytes(statement)
+    expected = list(statement_transactions(str(path), {"issuer": "Axis Bank"}).rows())
+    db = SessionLocal()
+    try:
+        upload_row = db.query(models.FileUpload).join(models.User).filter(models.User.username == "transactions").one()
+        saved = db.query(models.Transaction).filter(models.Transaction.upload_id == upload_row.id).order_by(models.Transaction.id).all()
+        assert all(row.user_id == upload_row.user_id for row in saved)
+        assert [(row.posted_on, row.description, row.amount_paise) for row in saved] == expected
+    finally:
+        db.close()
+    assert processed["transaction_count"] == len(expected) > 40
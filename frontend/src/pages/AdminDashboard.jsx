@@ -4,16 +4,20 @@ import useAuth from "../hooks/useAuth";
 
 export default function AdminDashboard() {
   const [users, setUsers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const { user: loggedInUser } = useAuth(); // Get the currently logged-in user
 
-  const fetchUsers = async () => {
+  // Without a cursor the list is reloaded from the first page
+  const fetchUsers = async (cursor = null) => {
     setIsLoading(true);
     try {
       const res = await api.get("/admin/users", {
         headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+        params: cursor === null ? {} : { cursor },
       });
-      setUsers(res.data.users);
+      setUsers((prev) => (cursor === null ? res.data.users : [...prev, ...res.data.users]));
+      setNextCursor(res.data.next_cursor ?? null);
     } catch (err) {
       console.error(err);
       alert("Could not fetch users.");
@@ -56,7 +60,7 @@ export default function AdminDashboard() {
   return (
     <div className="p-6 max-w-6xl mx-auto bg-white rounded-lg shadow-md mt-10">
       <h2 className="text-3xl font-bold mb-6 text-neutral-800 border-b pb-4">Admin Dashboard: User Management</h2>
-      {isLoading ? (
+      {isLoading && users.length === 0 ? (
         <p className="text-neutral-500">Loading users...</p>
       ) : (
         <div className="overflow-x-auto">
@@ -68,6 +72,7 @@ export default function AdminDashboard() {
                 {/* --- NEW COLUMN HEADER --- */}
                 <th className="py-3 px-4 text-left text-sm font-semibold text-neutral-500 uppercase">Verified</th>
                 <th className="py-3 px-4 text-left text-sm font-semibold text-neutral-500 uppercase">Status</th>
+                <th className="py-3 px-4 text-right text-sm font-semibold text-neutral-500 uppercase">Uploads</th>
                 <th className="py-3 px-4 text-center text-sm font-semibold text-neutral-500 uppercase">Actions</th>
               </tr>
             </thead>
@@ -91,6 +96,7 @@ export default function AdminDashboard() {
                       <span className="bg-red-100 text-red-800 text-xs font-semibold px-2.5 py-0.5 rounded-full">Suspended</span>
                     )}
                   </td>
+                  <td className="py-3 px-4 border-b text-right">{user.upload_count}</td>
                   <td className="py-3 px-4 border-b text-center space-x-2">
                     {loggedInUser?.sub !== user.username && user.role !== 'super_admin' && (
                       <>
@@ -122,6 +128,17 @@ export default function AdminDashboard() {
               ))}
             </tbody>
           </table>
+          {nextCursor !== null && (
+            <div className="mt-4 text-center">
+              <button
+                onClick={() => fetchUsers(nextCursor)}
+                disabled={isLoading}
+                className="bg-neutral-200 text-neutral-800 text-sm py-2 px-4 rounded hover:bg-neutral-300 disabled:opacity-50"
+              >
+                {isLoading ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
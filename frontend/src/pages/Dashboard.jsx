@@ -73,6 +73,9 @@ export default function Dashboard() {
       if (res.data.skipped.length > 0) {
         alertMessage += ` ${res.data.skipped.length} file(s) were duplicates and skipped.`;
       }
+      if (res.data.failed?.length > 0) {
+        alertMessage += ` ${res.data.failed.length} file(s) could not be processed: ${res.data.failed.map((f) => f.filename).join(", ")}.`;
+      }
       alert(alertMessage);
       
       setFiles([]);